@@ -1,7 +1,7 @@
 # app/config.py
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
 class Settings(BaseSettings):
     APP_NAME: str = "The AI Company Agent"
@@ -16,6 +16,163 @@ class Settings(BaseSettings):
     }
     FRESHDESK_DOMAIN: str
     FRESHDESK_API_KEY: str
+
+    # Upstream base URLs
+    GROQ_BASE_URL: str = "https://api.groq.com"
+    GROQ_CHAT_PATH: str = "/openai/v1/chat/completions"
+    GROQ_MODEL: str = "llama3-groq-70b-8192-tool-use-preview"
+    EURON_BASE_URL: str = "https://dev-api.euron.one"
+    FRESHDESK_BASE_URL: str = "https://aicompany.freshdesk.com"
+
+    # Pooled HTTP clients (one per upstream, opened in the app lifespan)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_TIMEOUTS: Dict[str, float] = {
+        "groq": 60.0,
+        "euron": 10.0,
+        "freshdesk": 15.0,
+    }
+    HTTP2_ENABLED: bool = False  # Needs the optional `h2` package (pip install httpx[http2])
+    HTTP_PREWARM: bool = True
+    HTTP_PREWARM_CONNECTIONS: int = 2
+
+    # Event-loop lag sampling (exposed at /debug/loop; 0 disables it)
+    LOOP_LAG_INTERVAL: float = 0.05
+    LOOP_LAG_WINDOW: int = 1200
+
+    # Adds a Server-Timing header with per-stage durations (exposes internals; meant for debugging)
+    SERVER_TIMING_ENABLED: bool = False
+
+    # Tool calls within one model turn run concurrently
+    TOOL_MAX_CONCURRENCY: int = 4
+    TOOL_DEFAULT_TIMEOUT: float = 15.0
+    TOOL_TIMEOUTS: Dict[str, float] = {
+        "search_courses": 10.0,
+        "query_euron": 10.0,
+        "submit_complaint": 20.0,
+    }
+    # Start the likely lookup while the first Groq call is in flight (read-only tools only)
+    TOOL_PREFETCH_ENABLED: bool = True
+    # Reply straight from a tool's renderer when its result needs no phrasing,
+    # skipping the second Groq call; FAST_PATH_TOOLS turns it off per tool ({"name": false})
+    FAST_PATH_ENABLED: bool = True
+    FAST_PATH_TOOLS: Dict[str, bool] = {}
+
+    # Structured logging (JSON lines written by a background thread)
+    LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_FIELD_MAX_LENGTH: int = 1000
+    LOG_PAYLOADS: bool = False  # Dump Groq payloads / tool results
+    LOG_PAYLOAD_MAX_LENGTH: int = 4000
+    LOG_PAYLOAD_SAMPLE_RATES: Dict[str, float] = {
+        "DEBUG": 0.01,
+        "INFO": 0.1,
+    }
+
+    # Admission control and rate limiting for Groq (match your Groq plan's limits)
+    GROQ_MAX_CONCURRENCY: int = 16
+    GROQ_MAX_QUEUE: int = 64
+    GROQ_QUEUE_TIMEOUT: float = 10.0
+    GROQ_REQUESTS_PER_MINUTE: int = 1000
+    GROQ_TOKENS_PER_MINUTE: int = 300000
+    GROQ_EXPECTED_COMPLETION_TOKENS: int = 512  # Reserved per call until usage is reported
+    GROQ_MAX_RETRIES: int = 3
+    GROQ_RETRY_BASE_DELAY: float = 0.5
+    GROQ_RETRY_MAX_DELAY: float = 8.0
+
+    # Completion backends. Empty means Groq alone; otherwise an ordered list of
+    # OpenAI-compatible endpoints, e.g.
+    # [{"name": "groq", "base_url": "https://api.groq.com", "path": "/openai/v1/chat/completions",
+    #   "api_key": "...", "model": "llama3-groq-70b-8192-tool-use-preview", "timeout": 60}]
+    LLM_BACKENDS: List[Dict[str, Any]] = []
+    LLM_HEDGING_ENABLED: bool = True
+    LLM_HEDGE_DEFAULT_DELAY: float = 3.0  # Until enough latencies are known
+    LLM_HEDGE_MIN_DELAY: float = 0.5
+    LLM_HEDGE_MAX_DELAY: float = 10.0
+    LLM_LATENCY_WINDOW: int = 200
+    LLM_LATENCY_MIN_SAMPLES: int = 20
+    LLM_HEALTH_THRESHOLD: float = 0.5
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_COOLDOWN: float = 30.0
+
+    # Completion parameters and context budgeting
+    GROQ_MAX_TOKENS: int = 4096
+    CONTEXT_WINDOW_TOKENS: int = 8192
+    CONTEXT_SAFETY_MARGIN_TOKENS: int = 256
+    CONTEXT_TOOL_RESULT_MAX_TOKENS: int = 1500  # Tool results of the current turn
+    CONTEXT_OLD_TOOL_RESULT_MAX_TOKENS: int = 200  # Tool results of earlier turns
+    CONTEXT_SUMMARY_MAX_TOKENS: int = 300
+
+    # Cache of whole completions, keyed on the normalized conversation
+    COMPLETION_CACHE_ENABLED: bool = True
+    COMPLETION_CACHE_MAX_ENTRIES: int = 2048
+    COMPLETION_CACHE_TTL: float = 3600.0
+    COMPLETION_CACHE_DIR: Optional[str] = None  # Set to also keep entries in a local SQLite file
+
+    # Server-side conversation sessions
+    SESSION_BACKEND: str = "mongo"  # "mongo" or "memory"
+    MONGODB_URI: str = "mongodb://localhost:27017"
+    MONGODB_DB: str = "chat_agent"
+    SESSION_TTL_SECONDS: int = 86400
+    SESSION_CACHE_MAX_ENTRIES: int = 10000
+    SESSION_CACHE_TTL: float = 600.0
+
+    # Course progress: compact in-memory table, dirty records flushed in bulk
+    PROGRESS_BACKEND: str = "file"  # "file", "mongo" or "memory" (not persisted)
+    PROGRESS_PATH: str = "data/progress.jsonl"
+    PROGRESS_FLUSH_INTERVAL: float = 2.0
+    PROGRESS_FLUSH_BATCH: int = 5000
+
+    # /chat/batch: conversations run through the /chat pipeline, streamed back as NDJSON
+    CHAT_BATCH_MAX_ITEMS: int = 1000  # Larger inputs go through /chat/batch/jobs
+    CHAT_BATCH_CONCURRENCY: int = 8  # Default per batch; the Groq admission limits still apply
+    CHAT_BATCH_MAX_CONCURRENCY: int = 32
+    CHAT_BATCH_JOB_MAX_ITEMS: int = 100000
+    CHAT_BATCH_JOB_WORKERS: int = 1
+    CHAT_BATCH_JOBS_PATH: str = "data/chat_batches.sqlite3"
+    CHAT_BATCH_RESULTS_DIR: str = "data/chat_batches"
+
+    # WebSocket chat (/chat/ws): one authenticated connection per conversation
+    WS_MAX_CONNECTIONS: int = 10000  # Per worker
+    WS_MAX_MESSAGE_BYTES: int = 16384  # Per frame; also lower uvicorn's --ws-max-size to match
+    WS_MAX_PENDING_MESSAGES: int = 4  # Queued behind the running turn; more are refused
+    WS_HISTORY_MAX_TOKENS: int = 2000  # Older turns are summarized away beyond this
+    WS_IDLE_TIMEOUT: float = 300.0
+    WS_SEND_TIMEOUT: float = 10.0  # A client this far behind is disconnected
+
+    # Durable outbox for Freshdesk tickets (SQLite file drained by background workers)
+    OUTBOX_PATH: str = "data/outbox.sqlite3"
+    OUTBOX_WORKERS: int = 2
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_DELAY: float = 2.0
+    OUTBOX_RETRY_MAX_DELAY: float = 300.0
+    OUTBOX_POLL_INTERVAL: float = 5.0
+
+    # Caching of Euron course / general lookups
+    TOOL_CACHE_MAX_ENTRIES: int = 2048
+    COURSE_CACHE_TTL: float = 600.0
+    EURON_CACHE_TTL: float = 300.0
+    NOT_FOUND_CACHE_TTL: float = 60.0
+
+    # Course recommender (hashed TF-IDF and category/level features in a NumPy matrix)
+    RECOMMENDER_TEXT_FEATURES: int = 256
+    RECOMMENDER_CATEGORY_FEATURES: int = 32
+    RECOMMENDER_TOP_K: int = 5
+    RECOMMENDER_MAX_PROFILES: int = 20000  # Least recently used user profiles are dropped beyond this
+    RECOMMENDER_PROFILE_TTL: float = 86400.0
+
+    # Local index of Euron course slugs, so course names resolve without guessing URLs
+    COURSE_SLUG_INDEX_ENABLED: bool = True
+    COURSE_SLUG_REFRESH_INTERVAL: float = 300.0  # Incremental (changes since the last refresh)
+    COURSE_SLUG_FULL_REFRESH_INTERVAL: float = 86400.0  # Also drops courses removed without notice
+    COURSE_SLUG_RETRY_DELAY: float = 30.0
+    COURSE_SLUG_PAGE_SIZE: int = 200
+    COURSE_SLUG_MIN_SCORE: float = 0.45  # Below this a course isn't a candidate at all
+    COURSE_SLUG_ACCEPT_SCORE: float = 0.65  # The best match is used directly above this...
+    COURSE_SLUG_MARGIN: float = 0.1  # ...if it leads the runner-up by this much
+    COURSE_SLUG_SHORTLIST: int = 5
     
     class Config:
         env_file = ".env"
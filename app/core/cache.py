@@ -0,0 +1,131 @@
+# app/core/cache.py
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from collections import OrderedDict
+import asyncio
+import functools
+import time
+
+# Every cache registers itself here so its counters can be exposed
+# (anything with a stats() method may be registered)
+caches: Dict[str, Any] = {}
+
+_MISSING = object()
+
+
+class AsyncTTLCache:
+    # LRU-bounded cache with per-entry TTLs and single-flight loading:
+    # concurrent misses for the same key share one in-flight load.
+    def __init__(self, name: str, max_entries: int = 1024, default_ttl: float = 300.0):
+        self.name = name
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        caches[name] = self
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_for: Optional[Callable[[Any], Optional[float]]] = None
+    ) -> Any:
+        # `ttl_for` picks the TTL from the loaded value; returning None skips caching it
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._on_loaded, key, ttl_for))
+
+        # Shielded so a cancelled caller doesn't cancel the load for everyone else
+        return await asyncio.shield(task)
+
+    def _on_loaded(self, key: Hashable, ttl_for, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        value = task.result()
+        ttl = ttl_for(value) if ttl_for else self.default_ttl
+        if ttl is not None:
+            self.set(key, value, ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "inflight": len(self._inflight),
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+def cached(
+    cache: AsyncTTLCache,
+    key: Callable[..., Hashable],
+    ttl_for: Optional[Callable[[Any], Optional[float]]] = None
+):
+    # Memoizes an async function through `cache`, keyed by `key(*args, **kwargs)`
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await cache.get_or_load(
+                key(*args, **kwargs),
+                lambda: func(*args, **kwargs),
+                ttl_for
+            )
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -0,0 +1,45 @@
+# app/core/chat_batch.py
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Sequence, Tuple, TypeVar
+from collections import deque
+import asyncio
+
+T = TypeVar("T")
+
+
+async def run_batch(
+    items: Sequence[T],
+    run: Callable[[T], Awaitable[Dict[str, Any]]],
+    key: Callable[[T], str],
+    concurrency: int
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    # Runs `run` over the items with at most `concurrency` in flight and yields
+    # (index, outcome) as each one finishes, not in input order. Items with the
+    # same key run once and every copy gets the outcome; duplicates after the
+    # first carry "duplicate_of". Closing the iterator cancels what is left.
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        groups.setdefault(key(item), []).append(index)
+    pending = deque(groups.values())
+    finished: asyncio.Queue = asyncio.Queue()
+
+    async def worker() -> None:
+        while pending:
+            indexes = pending.popleft()
+            try:
+                outcome = await run(items[indexes[0]])
+            except Exception as e:
+                # `run` is expected to report its own failures; this is the backstop
+                outcome = {"status": 500, "error": str(e)}
+            finished.put_nowait((indexes, outcome))
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, min(concurrency, len(groups))))]
+    try:
+        for _ in range(len(groups)):
+            indexes, outcome = await finished.get()
+            yield indexes[0], outcome
+            for index in indexes[1:]:
+                yield index, {**outcome, "duplicate_of": indexes[0]}
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
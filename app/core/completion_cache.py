@@ -0,0 +1,219 @@
+# app/core/completion_cache.py
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from ..config import settings
+from .cache import AsyncTTLCache, caches
+from .log import get_logger
+from .tool_registry import registry
+
+logger = get_logger(__name__)
+
+Completion = Dict[str, Any]
+CompletionLoader = Callable[[], Awaitable[Completion]]
+
+
+def _is_read_only(tool_name: Optional[str]) -> bool:
+    return tool_name in registry and registry.get(tool_name).read_only
+
+
+def has_side_effects(messages: List[Dict[str, Any]]) -> bool:
+    # True when the current turn already ran a state-changing tool (e.g. a ticket
+    # was filed), so the follow-up completion must come from the model
+    for message in reversed(messages):
+        if message["role"] == "user":
+            return False
+        if message["role"] == "tool" and not _is_read_only(message.get("name")):
+            return True
+    return False
+
+
+def _requests_side_effects(response: Completion) -> bool:
+    message = (response.get("choices") or [{}])[0].get("message") or {}
+    return any(
+        not _is_read_only(call.get("function", {}).get("name"))
+        for call in message.get("tool_calls") or []
+    )
+
+
+def _normalize_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    if message["role"] == "user" and isinstance(message.get("content"), str):
+        # "Hello", "hello " and "HELLO" are the same opener
+        return {**message, "content": " ".join(message["content"].split()).casefold()}
+    return message
+
+
+def completion_key(
+    model: str,
+    system_prompt: str,
+    messages: List[Dict[str, Any]],
+    tools: Optional[List[Dict[str, Any]]],
+    **params: Any
+) -> str:
+    canonical = json.dumps(
+        {
+            "model": model,
+            "system": system_prompt,
+            "messages": [_normalize_message(message) for message in messages],
+            "tools": sorted(tool["function"]["name"] for tool in tools or []),
+            "params": params,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class DiskCompletionStore:
+    # Optional second level in a local SQLite file; survives restarts and holds
+    # far more than the in-memory LRU
+    PRUNE_EVERY = 500
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(
+            os.path.join(directory, "completions.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS completions "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM completions WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO completions (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._connection.execute("DELETE FROM completions WHERE expires_at <= ?", (time.time(),))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class CompletionCache:
+    # Entries are kept as JSON text: every hit decodes a fresh object (callers
+    # may mutate it) and its size is what a hit saves
+    def __init__(self, name: str = "completions"):
+        self._memory = AsyncTTLCache(
+            f"{name}.memory",
+            max_entries=settings.COMPLETION_CACHE_MAX_ENTRIES,
+            default_ttl=settings.COMPLETION_CACHE_TTL
+        )
+        self._disk = DiskCompletionStore(settings.COMPLETION_CACHE_DIR) if settings.COMPLETION_CACHE_DIR else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.uncacheable = 0
+        self.bytes_saved = 0
+        self.write_failures = 0
+        self._pending_writes: Set[asyncio.Future] = set()
+        caches[name] = self
+
+    def _ttl_for(self, entry: Tuple[str, bool]) -> Optional[float]:
+        return settings.COMPLETION_CACHE_TTL if entry[1] else None
+
+    async def complete(
+        self,
+        key: str,
+        messages: List[Dict[str, Any]],
+        loader: CompletionLoader
+    ) -> Completion:
+        if not settings.COMPLETION_CACHE_ENABLED or has_side_effects(messages):
+            self.bypassed += 1
+            return await loader()
+
+        loaded_here = False
+
+        async def load() -> Tuple[str, bool]:
+            nonlocal loaded_here
+            loaded_here = True
+            if self._disk is not None:
+                raw = await asyncio.to_thread(self._disk.get, key)
+                if raw is not None:
+                    self.disk_hits += 1
+                    self.bytes_saved += len(raw)
+                    return raw, True
+
+            self.misses += 1
+            response = await loader()
+            raw = json.dumps(response, separators=(",", ":"))
+            cacheable = not _requests_side_effects(response)
+            if not cacheable:
+                self.uncacheable += 1
+            elif self._disk is not None:
+                self._spill(key, raw)
+            return raw, cacheable
+
+        raw, cacheable = await self._memory.get_or_load(key, load, self._ttl_for)
+        if not loaded_here:
+            # Served from memory, or coalesced onto an identical in-flight request
+            if not cacheable:
+                # A side-effecting reply must not be shared, not even in flight
+                self.bypassed += 1
+                return await loader()
+            self.hits += 1
+            self.bytes_saved += len(raw)
+        return json.loads(raw)
+
+    def _spill(self, key: str, raw: str) -> None:
+        # Written in the background; the reply doesn't wait for the disk
+        write = asyncio.ensure_future(asyncio.to_thread(self._disk.set, key, raw, settings.COMPLETION_CACHE_TTL))
+        self._pending_writes.add(write)
+        write.add_done_callback(self._written)
+
+    def _written(self, write: asyncio.Future) -> None:
+        self._pending_writes.discard(write)
+        if not write.cancelled() and write.exception() is not None:
+            self.write_failures += 1
+            logger.error("Completion cache disk write failed", error=str(write.exception()))
+
+    async def drain(self) -> None:
+        # Waits for disk writes still in flight; called before close() on shutdown
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "uncacheable": self.uncacheable,
+            "bytes_saved": self.bytes_saved,
+            "write_failures": self.write_failures,
+            "pending_writes": len(self._pending_writes),
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "disk_enabled": self._disk is not None,
+        }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+
+
+completion_cache = CompletionCache()
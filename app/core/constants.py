@@ -34,20 +34,19 @@ USER_PROGRESS = {
     }
 }
 
-# Mock learning paths
-LEARNING_PATHS = {
-    "web_development": {
-        "beginner": [
-            {"course_id": "1", "title": "HTML & CSS Basics", "duration": "2 weeks"},
-            {"course_id": "2", "title": "JavaScript Fundamentals", "duration": "4 weeks"},
-            {"course_id": "3", "title": "React Basics", "duration": "6 weeks"}
-        ]
-    },
-    "data_science": {
-        "beginner": [
-            {"course_id": "4", "title": "Python Basics", "duration": "3 weeks"},
-            {"course_id": "5", "title": "Data Analysis", "duration": "4 weeks"},
-            {"course_id": "6", "title": "Machine Learning Intro", "duration": "6 weeks"}
-        ]
-    }
-}
\ No newline at end of file
+# Mock learning-path courses: a prerequisite DAG. `level` is the level a course
+# is taught at; learners already at a higher level skip it.
+PATH_COURSES = {
+    "1": {"title": "HTML & CSS Basics", "duration": "2 weeks", "level": "beginner", "prerequisites": []},
+    "2": {"title": "JavaScript Fundamentals", "duration": "4 weeks", "level": "beginner", "prerequisites": ["1"]},
+    "3": {"title": "React Basics", "duration": "6 weeks", "level": "intermediate", "prerequisites": ["2"]},
+    "4": {"title": "Python Basics", "duration": "3 weeks", "level": "beginner", "prerequisites": []},
+    "5": {"title": "Data Analysis", "duration": "4 weeks", "level": "intermediate", "prerequisites": ["4"]},
+    "6": {"title": "Machine Learning Intro", "duration": "6 weeks", "level": "intermediate", "prerequisites": ["5"]},
+}
+
+# The courses each goal leads up to; their prerequisites are pulled in by the planner
+LEARNING_GOALS = {
+    "web_development": ["3"],
+    "data_science": ["6"],
+}
@@ -0,0 +1,167 @@
+# app/core/context.py
+from typing import Any, Dict, List, Optional
+import json
+from ..config import settings
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# Llama-family tokenizers average roughly 4 characters per token on English text;
+# the estimate only has to be good enough to stay under the window
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_MARKER = "...[truncated]"
+SUMMARY_PREFIX = "Earlier in this conversation the user asked: "
+SUMMARY_SEPARATOR = " | "
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def estimate_message_tokens(message: Dict[str, Any]) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get("content"))
+    if message.get("tool_calls"):
+        tokens += estimate_tokens(json.dumps(message["tool_calls"], separators=(",", ":")))
+    return tokens
+
+
+def estimate_tools_tokens(tools: Optional[List[Dict]]) -> int:
+    if not tools:
+        return 0
+    # A registry ToolSet already carries its serialized form
+    encoded = getattr(tools, "json", None) or json.dumps(tools, separators=(",", ":"))
+    return estimate_tokens(encoded)
+
+
+def estimate_request_tokens(payload: Dict[str, Any], completion_tokens: int = 0) -> int:
+    return (
+        sum(estimate_message_tokens(message) for message in payload["messages"])
+        + estimate_tools_tokens(payload.get("tools"))
+        + completion_tokens
+    )
+
+
+def prompt_budget(tools: Optional[List[Dict]] = None) -> int:
+    return (
+        settings.CONTEXT_WINDOW_TOKENS
+        - settings.GROQ_MAX_TOKENS
+        - settings.CONTEXT_SAFETY_MARGIN_TOKENS
+        - estimate_tools_tokens(tools)
+    )
+
+
+def _truncate_tool_message(message: Dict[str, Any], max_tokens: int) -> Dict[str, Any]:
+    content = message.get("content") or ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(content) <= max_chars:
+        return message
+    return {**message, "content": content[:max_chars - len(TRUNCATION_MARKER)] + TRUNCATION_MARKER}
+
+
+def _split_turns(messages: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    # A turn starts at a user message and owns the assistant/tool messages after
+    # it, so tool results are never separated from the call that produced them
+    turns: List[List[Dict[str, Any]]] = []
+    for message in messages:
+        if message["role"] == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def is_summary(message: Dict[str, Any]) -> bool:
+    # The summary left by an earlier compaction, as opposed to a real system prompt
+    return message["role"] == "system" and (message.get("content") or "").startswith(SUMMARY_PREFIX)
+
+
+def _summarize(
+    turns: List[List[Dict[str, Any]]],
+    earlier: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    # Extractive: what the user asked in the dropped turns, added to what an
+    # earlier summary already lists; the newest questions are kept first
+    asked = earlier["content"][len(SUMMARY_PREFIX):].split(SUMMARY_SEPARATOR) if earlier else []
+    for turn in turns:
+        first = turn[0]
+        if first["role"] == "user" and first.get("content"):
+            asked.append(" ".join(first["content"].split())[:160])
+
+    max_chars = settings.CONTEXT_SUMMARY_MAX_TOKENS * CHARS_PER_TOKEN - len(SUMMARY_PREFIX)
+    questions: List[str] = []
+    used = 0
+    for question in reversed(asked):
+        if used + len(question) > max_chars:
+            break
+        questions.append(question)
+        used += len(question) + len(SUMMARY_SEPARATOR)
+    if not questions:
+        return None
+    return {
+        "role": "system",
+        "content": SUMMARY_PREFIX + SUMMARY_SEPARATOR.join(reversed(questions)),
+    }
+
+
+def compact_messages(
+    messages: List[Dict[str, Any]],
+    budget: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    # Keeps the system prompt(s) and the most recent turns that fit the token
+    # budget. Tool results are capped first (hardest for earlier turns), then the
+    # oldest turns are dropped and replaced by a one-line summary. Compacting the
+    # output again folds newly dropped turns into that same summary, so there is
+    # never more than one.
+    budget = prompt_budget() if budget is None else budget
+
+    pinned = [message for message in messages if message["role"] == "system" and not is_summary(message)]
+    summaries = [message for message in messages if is_summary(message)]
+    earlier = summaries[-1] if summaries else None
+    turns = _split_turns([message for message in messages if message["role"] != "system"])
+    if not turns:
+        return messages
+
+    for position, turn in enumerate(turns):
+        cap = (
+            settings.CONTEXT_TOOL_RESULT_MAX_TOKENS
+            if position == len(turns) - 1
+            else settings.CONTEXT_OLD_TOOL_RESULT_MAX_TOKENS
+        )
+        turns[position] = [
+            _truncate_tool_message(message, cap) if message["role"] == "tool" else message
+            for message in turn
+        ]
+
+    used = sum(estimate_message_tokens(message) for message in pinned)
+    turn_tokens = [sum(estimate_message_tokens(message) for message in turn) for turn in turns]
+    summary_tokens = estimate_message_tokens(earlier) if earlier else 0
+
+    if used + summary_tokens + sum(turn_tokens) <= budget:
+        kept = len(turns)
+        used += summary_tokens
+    else:
+        # Leave room for the summary of whatever gets dropped
+        used += settings.CONTEXT_SUMMARY_MAX_TOKENS + MESSAGE_OVERHEAD_TOKENS
+        # The latest turn is always kept, even if it alone exceeds the budget
+        kept = 1
+        used += turn_tokens[-1]
+        while kept < len(turns) and used + turn_tokens[-kept - 1] <= budget:
+            kept += 1
+            used += turn_tokens[-kept]
+
+    dropped = turns[:len(turns) - kept]
+    compacted = list(pinned)
+    summary = _summarize(dropped, earlier) if dropped else earlier
+    if summary is not None:
+        compacted.append(summary)
+    if dropped:
+        logger.info(
+            "Compacted conversation context",
+            dropped_turns=len(turns) - kept,
+            kept_turns=kept,
+            estimated_tokens=used,
+            budget=budget,
+        )
+    for turn in turns[len(turns) - kept:]:
+        compacted.extend(turn)
+    return compacted
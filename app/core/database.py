@@ -0,0 +1,22 @@
+# app/core/database.py
+from typing import Optional
+from ..config import settings
+
+_client = None
+
+
+def get_database(name: Optional[str] = None):
+    # pymongo is imported lazily so the in-memory backends work without it.
+    # MongoClient connects in the background and is safe to share across threads.
+    global _client
+    if _client is None:
+        from pymongo import MongoClient
+        _client = MongoClient(settings.MONGODB_URI, tz_aware=True)
+    return _client[name or settings.MONGODB_DB]
+
+
+def close_database() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
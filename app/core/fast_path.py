@@ -0,0 +1,46 @@
+# app/core/fast_path.py
+from typing import Dict, List, Optional
+from pydantic import ValidationError
+from ..config import settings
+from .log import get_logger
+from .metrics import metrics
+from .tool_registry import ToolRegistry
+
+logger = get_logger(__name__)
+
+tool_replies = metrics.counter(
+    "tool_replies_total", "How replies after tool calls were produced", ("tool", "path")
+)
+
+
+def _fast_path_enabled(tool: str) -> bool:
+    return settings.FAST_PATH_ENABLED and settings.FAST_PATH_TOOLS.get(tool, True)
+
+
+def render_tool_results(results: List[Dict], registry: ToolRegistry) -> Optional[str]:
+    # The reply for a tool turn when every call's renderer can produce one;
+    # None means the results need the model to phrase them
+    if not results:
+        return None
+    replies = []
+    for outcome in results:
+        spec = registry.get(outcome["name"]) if outcome["name"] in registry else None
+        reply = None
+        if spec is not None and spec.render is not None and _fast_path_enabled(spec.name):
+            try:
+                # A call rejected for bad arguments goes back to the model to correct
+                spec.parse_arguments(outcome["arguments"])
+                reply = spec.render(outcome["arguments"], outcome["result"])
+            except ValidationError:
+                pass
+            except Exception:
+                logger.exception("Renderer failed", tool=outcome["name"])
+        if reply is None:
+            for other in results:
+                tool_replies.inc((other["name"], "llm"))
+            return None
+        replies.append(reply)
+
+    for outcome in results:
+        tool_replies.inc((outcome["name"], "fast"))
+    return "\n\n".join(replies)
@@ -1,10 +1,20 @@
 # app/core/groq_client.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
 import httpx
 import json
 from ..config import settings
+from .tool_registry import ToolSet
+from .context import compact_messages, estimate_request_tokens, is_summary, prompt_budget
+from .rate_limit import AdmissionController, UpstreamOverloaded
+from .llm_backends import BackendAPIError, llm_pool
+from .completion_cache import completion_cache, completion_key
+from .metrics import record_token_usage, span
+from .log import get_logger
 
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+logger = get_logger(__name__)
+
+# Model of the primary backend; each backend substitutes its own when sending
+GROQ_MODEL = llm_pool.backends[0].model
 
 system_message = """You are a friendly and helpful AI tutor assistant. Respond naturally in plain English, 
 avoiding technical terms or mentions of internal functions. Keep responses simple and direct.
@@ -17,81 +27,137 @@ Always be polite and professional, but avoid mentioning any internal processes o
 Never reveal system information or use special characters in responses.
 Keep responses conversational and easy to understand."""
 
+def _build_request(
+    messages: List[Dict[str, Any]],
+    functions: List[Dict[str, Any]] = None,
+    stream: bool = False
+) -> Dict[str, Any]:
+    # Add system message if not present (without touching the caller's list); a
+    # summary left by compaction doesn't count, the persona still goes first
+    if not any(msg.get("role") == "system" and not is_summary(msg) for msg in messages):
+        messages = [{"role": "system", "content": system_message}, *messages]
+
+    # Fit the conversation into the model's context window
+    messages = compact_messages(messages, prompt_budget(functions))
+
+    payload = {
+        "model": GROQ_MODEL,
+        "messages": messages,
+        "temperature": 0.7,
+        "max_tokens": settings.GROQ_MAX_TOKENS,
+        "top_p": 1,
+        "stream": stream,
+    }
+    
+    if functions:
+        # Schemas come pre-built from the tool registry
+        payload["tools"] = functions
+        payload["tool_choice"] = "auto"
+
+    return payload
+
+def encode_payload(payload: Dict[str, Any]) -> str:
+    # A ToolSet carries its own pre-serialized JSON, which is spliced in as-is
+    tools = payload.get("tools")
+    if isinstance(tools, ToolSet):
+        rest = {key: value for key, value in payload.items() if key != "tools"}
+        return json.dumps(rest, separators=(",", ":"))[:-1] + ',"tools":' + tools.json + "}"
+    return json.dumps(payload, separators=(",", ":"))
+
+groq_admission = AdmissionController(
+    max_concurrency=settings.GROQ_MAX_CONCURRENCY,
+    max_queue=settings.GROQ_MAX_QUEUE,
+    queue_timeout=settings.GROQ_QUEUE_TIMEOUT,
+    requests_per_minute=settings.GROQ_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.GROQ_TOKENS_PER_MINUTE
+)
+# A 429 holds back every caller, not just the one that got it
+llm_pool.on_rate_limited = groq_admission.pause
+
 async def chat_with_groq(
     messages: List[Dict[str, Any]], 
     functions: List[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     try:
-        # Add system message if not present
-        if not any(msg.get("role") == "system" for msg in messages):
-            messages.insert(0, {"role": "system", "content": system_message})
-
-        headers = {
-            "Authorization": f"Bearer {settings.GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": "llama3-groq-70b-8192-tool-use-preview",
-            "messages": messages,
-            "temperature": 0.7,
-            "max_tokens": 4096,
-            "top_p": 1,
-            "stream": False,
-        }
+        payload = _build_request(messages, functions)
+
+        logger.payload("Sending request to Groq", payload)
+
+        estimated_tokens = estimate_request_tokens(payload, settings.GROQ_EXPECTED_COMPLETION_TOKENS)
+        async with groq_admission.admit(estimated_tokens):
+            # Hedged across the configured backends, failing over on overload
+            with span("llm.request"):
+                _, response = await llm_pool.complete(payload, encode_payload)
+
+        response_data = response.json()
+
+        usage = response_data.get("usage") or {}
+        record_token_usage(usage)
+        if usage.get("total_tokens"):
+            groq_admission.reconcile(estimated_tokens, usage["total_tokens"])
         
-        if functions:
-            # Convert functions to tools format if they're not already
-            tools = []
-            for func in functions:
-                if "type" not in func:  # If it's in the old format
-                    tools.append({
-                        "type": "function",
-                        "function": {
-                            "name": func.get("name", ""),
-                            "description": func.get("description", ""),
-                            "parameters": func.get("parameters", {})
-                        }
-                    })
-                else:  # If it's already in the correct format
-                    tools.append(func)
-            
-            payload["tools"] = tools
-            payload["tool_choice"] = "auto"
-
-        print("Sending request to Groq:", json.dumps(payload, indent=2))  # Debug print
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                GROQ_API_URL,
-                headers=headers,
-                json=payload
-            )
-            
-            if response.status_code != 200:
-                print(f"Groq API Error: {response.status_code}")
-                print(f"Response: {response.text}")
-                raise Exception(f"Groq API error: {response.text}")
-
-            response_data = response.json()
-            
-            # Handle tool calls in the response if present
-            if "choices" in response_data and response_data["choices"]:
-                message = response_data["choices"][0]["message"]
-                if "tool_calls" in message:
-                    # Ensure tool_calls is properly formatted
-                    for tool_call in message["tool_calls"]:
-                        if "id" not in tool_call:
-                            tool_call["id"] = f"call_{hash(tool_call['function']['name'])}"
-
-            return response_data
+        # Handle tool calls in the response if present
+        if "choices" in response_data and response_data["choices"]:
+            message = response_data["choices"][0]["message"]
+            if "tool_calls" in message:
+                # Ensure tool_calls is properly formatted
+                for tool_call in message["tool_calls"]:
+                    if "id" not in tool_call:
+                        tool_call["id"] = f"call_{hash(tool_call['function']['name'])}"
+
+        return response_data
 
+    except (BackendAPIError, UpstreamOverloaded):
+        raise
     except httpx.RequestError as e:
-        print(f"An error occurred while requesting {e.request.url!r}.")
+        logger.error("Request to Groq failed", url=str(e.request.url), error=str(e))
         raise
     except httpx.HTTPStatusError as e:
-        print(f"Error response {e.response.status_code} while requesting {e.request.url!r}.")
+        logger.error("Error response from Groq", url=str(e.request.url), status_code=e.response.status_code)
         raise
     except Exception as e:
-        print(f"Unexpected error in chat_with_groq: {str(e)}")
+        logger.error("Unexpected error in chat_with_groq", error=str(e))
         raise
+
+async def cached_chat_with_groq(
+    messages: List[Dict[str, Any]],
+    functions: List[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    # chat_with_groq behind the completion cache; identical conversations
+    # (same prompt, model, tools and parameters) share one upstream call
+    key = completion_key(
+        GROQ_MODEL,
+        system_message,
+        messages,
+        functions,
+        max_tokens=settings.GROQ_MAX_TOKENS,
+    )
+    return await completion_cache.complete(
+        key,
+        messages,
+        lambda: chat_with_groq(messages, functions)
+    )
+
+async def stream_chat_with_groq(
+    messages: List[Dict[str, Any]],
+    functions: List[Dict[str, Any]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    # Yields the raw `chat.completion.chunk` objects from Groq's SSE stream
+    payload = _build_request(messages, functions, stream=True)
+    logger.payload("Sending streaming request to Groq", payload)
+
+    estimated_tokens = estimate_request_tokens(payload, settings.GROQ_EXPECTED_COMPLETION_TOKENS)
+    # The concurrency slot is held for the whole stream
+    async with groq_admission.admit(estimated_tokens):
+        with span("llm.stream_open"):
+            _, response = await llm_pool.open_stream(payload, encode_payload)
+        try:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                yield json.loads(data)
+        finally:
+            await response.aclose()
@@ -0,0 +1,106 @@
+# app/core/http_clients.py
+from typing import Dict, Optional
+import asyncio
+import functools
+import httpx
+from ..config import settings
+from .log import get_logger
+from .metrics import record_upstream_exchange
+
+logger = get_logger(__name__)
+
+# One long-lived, pooled client per upstream service
+UPSTREAMS: Dict[str, str] = {
+    "groq": settings.GROQ_BASE_URL,
+    "euron": settings.EURON_BASE_URL,
+    "freshdesk": settings.FRESHDESK_BASE_URL,
+}
+
+DEFAULT_TIMEOUT = 30.0
+
+
+async def _count_exchange(name: str, response: httpx.Response) -> None:
+    # Sizes from Content-Length: nothing is read or buffered for this
+    record_upstream_exchange(
+        name,
+        response.status_code,
+        int(response.request.headers.get("content-length") or 0),
+        int(response.headers.get("content-length") or 0),
+    )
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ClientRegistry:
+    def __init__(self, upstreams: Dict[str, str]):
+        self._upstreams = dict(upstreams)
+        self._timeouts: Dict[str, float] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._http2 = settings.HTTP2_ENABLED and _http2_available()
+        if settings.HTTP2_ENABLED and not self._http2:
+            logger.warning("HTTP2_ENABLED is set but the `h2` package is missing, falling back to HTTP/1.1")
+
+    def _build_client(self, name: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(
+            self._timeouts.get(name) or settings.HTTP_TIMEOUTS.get(name, DEFAULT_TIMEOUT),
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+        )
+        return httpx.AsyncClient(
+            base_url=self._upstreams[name],
+            limits=limits,
+            timeout=timeout,
+            http2=self._http2,
+            event_hooks={"response": [functools.partial(_count_exchange, name)]},
+        )
+
+    def register(self, name: str, base_url: str, timeout: Optional[float] = None) -> None:
+        self._upstreams[name] = base_url
+        if timeout is not None:
+            self._timeouts[name] = timeout
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        # Created lazily so scripts that never run the app lifespan still work
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            if name not in self._upstreams:
+                raise KeyError(f"Unknown upstream: {name}")
+            client = self._build_client(name)
+            self._clients[name] = client
+        return client
+
+    async def _prewarm(self, name: str) -> None:
+        client = self.get(name)
+        # Concurrent requests force the pool to open (and keep alive) several connections,
+        # paying for DNS + TLS before the first user request does
+        requests = [client.head("/") for _ in range(max(1, settings.HTTP_PREWARM_CONNECTIONS))]
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning("Pre-warming failed", upstream=name, error=repr(failures[0]))
+
+    async def startup(self, prewarm: Optional[bool] = None) -> None:
+        for name in self._upstreams:
+            self.get(name)
+        if settings.HTTP_PREWARM if prewarm is None else prewarm:
+            await asyncio.gather(*(self._prewarm(name) for name in self._upstreams))
+
+    async def shutdown(self) -> None:
+        clients, self._clients = self._clients, {}
+        await asyncio.gather(
+            *(client.aclose() for client in clients.values()),
+            return_exceptions=True,
+        )
+
+
+http_clients = ClientRegistry(UPSTREAMS)
@@ -0,0 +1,40 @@
+# app/core/intent_router.py
+from typing import Dict, FrozenSet, List
+import re
+
+# Inflections accepted after a keyword: course -> courses, learn -> learning
+KEYWORD_SUFFIXES = r"(?:s|es|ed|ing)?"
+
+
+class IntentRouter:
+    # Compiles every tool's keywords into one word-bounded regex, so a message is
+    # scanned once regardless of keyword count. Keywords are grouped by the set of
+    # tools they select, with a named group per distinct set.
+    def __init__(self, intents: Dict[str, List[str]]):
+        keyword_tools: Dict[str, set] = {}
+        for tool, keywords in intents.items():
+            for keyword in keywords:
+                keyword_tools.setdefault(keyword.lower(), set()).add(tool)
+
+        grouped: Dict[FrozenSet[str], List[str]] = {}
+        for keyword, tools in keyword_tools.items():
+            grouped.setdefault(frozenset(tools), []).append(keyword)
+
+        self._groups: Dict[str, FrozenSet[str]] = {}
+        alternatives = []
+        for position, (tools, keywords) in enumerate(grouped.items()):
+            group = f"intent_{position}"
+            self._groups[group] = tools
+            # Longest first so "programming" wins over "program"
+            words = "|".join(re.escape(word) for word in sorted(keywords, key=len, reverse=True))
+            alternatives.append(f"(?P<{group}>{words})")
+        self._pattern = re.compile(
+            rf"\b(?:{'|'.join(alternatives) or '(?!)'}){KEYWORD_SUFFIXES}\b",
+            re.IGNORECASE
+        )
+
+    def route(self, message: str) -> FrozenSet[str]:
+        tools = frozenset()
+        for match in self._pattern.finditer(message or ""):
+            tools |= self._groups[match.lastgroup]
+        return tools
@@ -0,0 +1,268 @@
+# app/core/job_queue.py
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from ..config import settings
+from .log import get_logger
+from .rate_limit import backoff_delay
+
+logger = get_logger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class RetryableJobError(Exception):
+    # The job should be attempted again later; `retry_after` (seconds) comes from
+    # the upstream's rate limiting and also holds back every other job of the kind
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class JobStore:
+    # SQLite file in WAL mode; each enqueue is committed before it is acknowledged
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, run_at REAL NOT NULL, result TEXT, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, run_at)")
+        self._lock = threading.Lock()
+
+    def insert(self, job_id: str, kind: str, payload: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO jobs (id, kind, payload, status, run_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUED, now, now, now)
+            )
+
+    def claim(self, kinds: List[str]) -> Optional[Dict[str, Any]]:
+        # Oldest due job of a kind that isn't paused; select + update under one lock
+        if not kinds:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT * FROM jobs WHERE status = ? AND run_at <= ? AND kind IN ({','.join('?' * len(kinds))}) "
+                "ORDER BY run_at LIMIT 1",
+                (QUEUED, now, *kinds)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (RUNNING, now, row["id"])
+            )
+        job = dict(row)
+        job["attempts"] += 1
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def finish(self, job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+            )
+
+    def reschedule(self, job_id: str, run_at: float, error: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, run_at = ?, error = ?, updated_at = ? WHERE id = ?",
+                (QUEUED, run_at, error, time.time(), job_id)
+            )
+
+    def recover(self) -> int:
+        # Jobs left running by a crash or restart are run again
+        with self._lock:
+            return self._connection.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (QUEUED, time.time(), RUNNING)
+            ).rowcount
+
+    def next_run_at(self) -> Optional[float]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT MIN(run_at) FROM jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()
+        return row[0]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class JobQueue:
+    # Durable outbox: `enqueue` persists a job and returns its id straight away,
+    # and a pool of worker tasks runs the registered handler with retries
+    def __init__(self, path: str, workers: int):
+        self.path = path
+        self.workers = workers
+        self._store: Optional[JobStore] = None
+        self._handlers: Dict[str, JobHandler] = {}
+        self._paused_until: Dict[str, float] = {}
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self._counts: Dict[str, int] = {}
+
+    @property
+    def store(self) -> JobStore:
+        # Opened lazily, like the database client
+        if self._store is None:
+            self._store = JobStore(self.path)
+        return self._store
+
+    def handler(self, kind: str):
+        def decorator(func: JobHandler) -> JobHandler:
+            self._handlers[kind] = func
+            return func
+        return decorator
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> str:
+        if kind not in self._handlers:
+            raise KeyError(f"No handler for job kind: {kind}")
+        job_id = job_id or uuid.uuid4().hex
+        await asyncio.to_thread(self.store.insert, job_id, kind, payload)
+        self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def _ready_kinds(self) -> List[str]:
+        now = time.time()
+        return [kind for kind in self._handlers if self._paused_until.get(kind, 0.0) <= now]
+
+    async def _idle(self) -> None:
+        # Sleep until new work is enqueued, the next retry is due or a pause ends
+        next_run = await asyncio.to_thread(self.store.next_run_at)
+        wake_times = [t for t in [next_run, *self._paused_until.values()] if t and t > time.time()]
+        timeout = settings.OUTBOX_POLL_INTERVAL
+        if wake_times:
+            timeout = min(timeout, min(wake_times) - time.time())
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), max(0.01, timeout))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        kind, attempts = job["kind"], job["attempts"]
+        try:
+            result = await self._handlers[kind](job["payload"])
+        except RetryableJobError as e:
+            if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                self.failed += 1
+                logger.error("Job failed for good", job_id=job["id"], kind=kind, attempts=attempts, error=str(e))
+                await asyncio.to_thread(self.store.finish, job["id"], FAILED, None, str(e))
+                return
+            delay = backoff_delay(
+                attempts - 1,
+                settings.OUTBOX_RETRY_BASE_DELAY,
+                settings.OUTBOX_RETRY_MAX_DELAY,
+                e.retry_after
+            )
+            if e.retry_after is not None:
+                # Rate limited: hold back the whole kind, not only this job
+                self._paused_until[kind] = max(self._paused_until.get(kind, 0.0), time.time() + e.retry_after)
+            self.retried += 1
+            logger.warning("Job will be retried", job_id=job["id"], kind=kind, attempts=attempts, delay=round(delay, 3), error=str(e))
+            await asyncio.to_thread(self.store.reschedule, job["id"], time.time() + delay, str(e))
+        except Exception as e:
+            self.failed += 1
+            logger.exception("Job failed", job_id=job["id"], kind=kind)
+            await asyncio.to_thread(self.store.finish, job["id"], FAILED, None, str(e))
+        else:
+            self.succeeded += 1
+            await asyncio.to_thread(self.store.finish, job["id"], DONE, result)
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                # Cleared before looking, so an enqueue racing with the claim isn't missed
+                self._wakeup.clear()
+                job = await asyncio.to_thread(self.store.claim, self._ready_kinds())
+                if job is None:
+                    await self._idle()
+                    continue
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # e.g. the database is locked or the disk is full; try again shortly
+                logger.exception("Job worker error")
+                await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        recovered = await asyncio.to_thread(self.store.recover)
+        if recovered:
+            logger.info("Re-queued interrupted jobs", count=recovered)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        # A job cut off here is still marked running and is recovered on the next start
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    async def refresh_counts(self) -> Dict[str, int]:
+        # The per-status counts are a SQLite query; stats() reports the last refresh
+        self._counts = await asyncio.to_thread(self.store.counts)
+        return self._counts
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "jobs": dict(self._counts),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+            "paused": {kind: round(until - time.time(), 3) for kind, until in self._paused_until.items() if until > time.time()},
+        }
+
+
+job_queue = JobQueue(settings.OUTBOX_PATH, settings.OUTBOX_WORKERS)
@@ -0,0 +1,381 @@
+# app/core/llm_backends.py
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import deque
+import asyncio
+import time
+import httpx
+from ..config import settings
+from .http_clients import http_clients
+from .log import get_logger
+from .rate_limit import UpstreamOverloaded, backoff_delay, parse_retry_after
+
+logger = get_logger(__name__)
+
+# Rate limiting and overload responses worth retrying (and failing over on)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class BackendAPIError(Exception):
+    def __init__(self, backend: str, status_code: int, body: str, retry_after: Optional[float] = None):
+        super().__init__(f"{backend} API error: {body}")
+        self.backend = backend
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code in RETRYABLE_STATUS_CODES
+
+
+class LatencyTracker:
+    # Sliding window of recent successful latencies; p95 is recomputed lazily
+    def __init__(self, window: int):
+        self._samples: deque = deque(maxlen=window)
+        self._p95: Optional[float] = None
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._p95 = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def p95(self) -> Optional[float]:
+        if not self._samples:
+            return None
+        if self._p95 is None:
+            ordered = sorted(self._samples)
+            self._p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return self._p95
+
+
+class CircuitBreaker:
+    # closed -> open after N consecutive failures; open -> half-open after the
+    # cooldown, where a single probe decides between closed and open again
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe: Optional[object] = None  # Token of the call holding the half-open probe
+
+    def allows(self) -> bool:
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+            self.state = "half_open"
+            self._probe = None
+        if self.state == "half_open":
+            return self._probe is None
+        return self.state == "closed"
+
+    def acquire(self) -> Optional[object]:
+        # In half-open, claims the probe slot and returns its token (hand it back
+        # to release()); None otherwise. Call it right after allows(), without
+        # awaiting in between, so concurrent callers can't both take the slot.
+        if self.state == "half_open" and self._probe is None:
+            self._probe = object()
+            return self._probe
+        return None
+
+    def release(self, probe: Optional[object]) -> None:
+        # A probe that ended without an outcome (cancelled as a hedge loser, the
+        # client went away) frees the slot for the next caller. Releasing twice,
+        # or after the outcome was recorded, does nothing.
+        if probe is not None and self._probe is probe:
+            self._probe = None
+
+    def retry_in(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self._failures = 0
+        self._probe = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            self._probe = None
+
+
+class CompletionBackend:
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        model: str,
+        api_key: str = "",
+        path: str = "/v1/chat/completions",
+        timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.model = model
+        self.api_key = api_key
+        self.path = path
+        self.client_name = name if name == "groq" else f"llm:{name}"
+        http_clients.register(self.client_name, base_url, timeout)
+        self.latency = LatencyTracker(settings.LLM_LATENCY_WINDOW)
+        self.breaker = CircuitBreaker(settings.LLM_CIRCUIT_FAILURE_THRESHOLD, settings.LLM_CIRCUIT_COOLDOWN)
+        self.health = 1.0  # EWMA of call outcomes, 1.0 = every recent call succeeded
+        self._cooldown_until = 0.0
+        self.on_rate_limited: Optional[Callable[["CompletionBackend"], None]] = None
+        self.requests = 0
+        self.failures = 0
+        self.hedges_won = 0
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._cooldown_until and self.breaker.allows()
+
+    def unavailable_for(self) -> float:
+        return max(self._cooldown_until - time.monotonic(), self.breaker.retry_in())
+
+    def cool_down(self, seconds: float) -> None:
+        # The backend asked us to back off (429 + Retry-After)
+        self._cooldown_until = max(self._cooldown_until, time.monotonic() + seconds)
+        if self.on_rate_limited is not None:
+            self.on_rate_limited(self)
+
+    def hedge_delay(self) -> float:
+        p95 = self.latency.p95()
+        if p95 is None or len(self.latency) < settings.LLM_LATENCY_MIN_SAMPLES:
+            return settings.LLM_HEDGE_DEFAULT_DELAY
+        return min(settings.LLM_HEDGE_MAX_DELAY, max(settings.LLM_HEDGE_MIN_DELAY, p95))
+
+    def _record(self, ok: bool, seconds: Optional[float] = None) -> None:
+        self.health = 0.8 * self.health + 0.2 * (1.0 if ok else 0.0)
+        if ok:
+            self.breaker.record_success()
+            if seconds is not None:
+                self.latency.record(seconds)
+        else:
+            self.failures += 1
+            self.breaker.record_failure()
+
+    def claim(self) -> Tuple[bool, Optional[object]]:
+        # Checks availability and takes the half-open probe slot in one step:
+        # (False, None) if the backend can't take a call now, else (True, probe)
+        # with the probe token (or None) to pass to send()
+        if not self.available():
+            return False, None
+        return True, self.breaker.acquire()
+
+    async def send(self, body: str, stream: bool = False, probe: Optional[object] = None) -> httpx.Response:
+        # POSTs with retries on 429/5xx (honouring Retry-After), and keeps the
+        # health, latency and circuit state up to date. `probe` comes from claim().
+        self.requests += 1
+        client = http_clients.get(self.client_name)
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        started = time.monotonic()
+        try:
+            for attempt in range(settings.GROQ_MAX_RETRIES + 1):
+                request = client.build_request("POST", self.path, headers=headers, content=body)
+                response = await client.send(request, stream=stream)
+                if response.status_code == 200:
+                    # For streams this is time-to-first-byte
+                    self._record(True, time.monotonic() - started)
+                    return response
+
+                text = (await response.aread()).decode(errors="replace")
+                await response.aclose()
+                retry_after = parse_retry_after(response.headers.get("retry-after"))
+                error = BackendAPIError(self.name, response.status_code, text, retry_after)
+
+                if response.status_code == 429:
+                    self.cool_down(retry_after or settings.GROQ_RETRY_BASE_DELAY)
+                retryable = (
+                    error.retryable
+                    and attempt < settings.GROQ_MAX_RETRIES
+                    and (retry_after is None or retry_after <= settings.GROQ_RETRY_MAX_DELAY)
+                )
+                if not retryable:
+                    logger.error(
+                        "Completion backend error",
+                        backend=self.name,
+                        status_code=response.status_code,
+                        response=text
+                    )
+                    if error.retryable:
+                        self._record(False)
+                    else:
+                        # The backend is up, it just rejected this request
+                        self.breaker.record_success()
+                    raise error
+
+                delay = backoff_delay(
+                    attempt,
+                    settings.GROQ_RETRY_BASE_DELAY,
+                    settings.GROQ_RETRY_MAX_DELAY,
+                    retry_after
+                )
+                logger.warning(
+                    "Retrying completion request",
+                    backend=self.name,
+                    status_code=response.status_code,
+                    attempt=attempt + 1,
+                    delay=round(delay, 3)
+                )
+                await asyncio.sleep(delay)
+        except httpx.RequestError:
+            self._record(False)
+            raise
+        finally:
+            self.breaker.release(probe)
+        raise AssertionError("unreachable")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "state": self.breaker.state,
+            "available": self.available(),
+            "health": round(self.health, 3),
+            "p95_seconds": self.latency.p95(),
+            "hedge_delay_seconds": self.hedge_delay(),
+            "requests": self.requests,
+            "failures": self.failures,
+            "hedges_won": self.hedges_won,
+        }
+
+
+def _should_fail_over(error: BaseException) -> bool:
+    # Bad requests would fail the same way everywhere
+    if isinstance(error, BackendAPIError):
+        return error.retryable
+    return isinstance(error, httpx.RequestError)
+
+
+class BackendPool:
+    def __init__(self, backends: List[CompletionBackend]):
+        if not backends:
+            raise ValueError("At least one completion backend is required")
+        self.backends = backends
+        self.hedged = 0
+        # Called with how long every backend is backing off after a 429
+        self.on_rate_limited: Optional[Callable[[float], None]] = None
+        for backend in backends:
+            backend.on_rate_limited = self._backend_rate_limited
+
+    def _backend_rate_limited(self, backend: CompletionBackend) -> None:
+        # Only once no backend can take the request is there a point in holding
+        # back every caller, and then only until the first one is free again
+        if self.on_rate_limited is not None and not any(candidate.available() for candidate in self.backends):
+            self.on_rate_limited(min(candidate.unavailable_for() for candidate in self.backends))
+
+    async def candidates(self) -> List[CompletionBackend]:
+        # Configured order, but healthy backends ahead of struggling ones. When every
+        # backend is cooling down briefly (Retry-After) we wait; otherwise fail fast.
+        available = [backend for backend in self.backends if backend.available()]
+        if not available:
+            retry_after = min(backend.unavailable_for() for backend in self.backends)
+            if retry_after <= settings.GROQ_RETRY_MAX_DELAY:
+                await asyncio.sleep(retry_after)
+                available = [backend for backend in self.backends if backend.available()]
+            if not available:
+                raise UpstreamOverloaded("No language model backend is available", max(1.0, retry_after))
+        return sorted(available, key=lambda backend: backend.health < settings.LLM_HEALTH_THRESHOLD)
+
+    async def complete(self, payload: Dict[str, Any], encode) -> Tuple[CompletionBackend, httpx.Response]:
+        # Sends to the primary; if it hasn't answered within its p95 the same request
+        # also goes to the next backend, and whichever answers first wins (the other
+        # is cancelled). Retryable failures fail over to the next backend.
+        candidates = await self.candidates()
+        pending: Dict[asyncio.Task, CompletionBackend] = {}
+        last_error: Optional[BaseException] = None
+        hedge = settings.LLM_HEDGING_ENABLED
+        hedge_at = 0.0
+
+        def launch() -> bool:
+            nonlocal hedge_at
+            while candidates:
+                backend = candidates.pop(0)
+                # Another caller may have taken the half-open probe since the list was built
+                claimed, probe = backend.claim()
+                if not claimed:
+                    continue
+                body = encode({**payload, "model": backend.model})
+                task = asyncio.ensure_future(backend.send(body, probe=probe))
+                # send() releases the probe itself, but not if it's cancelled before it starts
+                task.add_done_callback(lambda _, breaker=backend.breaker, probe=probe: breaker.release(probe))
+                pending[task] = backend
+                hedge_at = time.monotonic() + backend.hedge_delay()
+                return True
+            return False
+
+        if not launch():
+            raise UpstreamOverloaded("No language model backend is available", 1.0)
+        try:
+            while pending:
+                timeout = max(0.0, hedge_at - time.monotonic()) if hedge and candidates else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slower than this backend's p95: race the next one (once per request)
+                    hedge = False
+                    self.hedged += 1
+                    logger.info("Hedging completion request", backend=candidates[0].name)
+                    launch()
+                    continue
+                for task in done:
+                    backend = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if pending:
+                            backend.hedges_won += 1
+                        return backend, task.result()
+                    last_error = error
+                    if not _should_fail_over(error):
+                        raise error
+                    logger.warning("Completion backend failed", backend=backend.name, error=str(error))
+                if not pending and candidates:
+                    launch()
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def open_stream(self, payload: Dict[str, Any], encode) -> Tuple[CompletionBackend, httpx.Response]:
+        # Streams are not hedged (tokens would be delivered twice), but fail over
+        # until one backend has started answering
+        last_error: Optional[BaseException] = None
+        for backend in await self.candidates():
+            claimed, probe = backend.claim()
+            if not claimed:
+                continue
+            try:
+                body = encode({**payload, "model": backend.model})
+                return backend, await backend.send(body, stream=True, probe=probe)
+            except (BackendAPIError, httpx.RequestError) as error:
+                if not _should_fail_over(error):
+                    raise
+                last_error = error
+                logger.warning("Completion backend failed", backend=backend.name, error=str(error))
+        if last_error is None:
+            raise UpstreamOverloaded("No language model backend is available", 1.0)
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedged": self.hedged,
+            "backends": {backend.name: backend.stats() for backend in self.backends},
+        }
+
+
+def load_backends() -> List[CompletionBackend]:
+    if not settings.LLM_BACKENDS:
+        return [CompletionBackend(
+            name="groq",
+            base_url=settings.GROQ_BASE_URL,
+            model=settings.GROQ_MODEL,
+            api_key=settings.GROQ_API_KEY,
+            path=settings.GROQ_CHAT_PATH,
+            timeout=settings.HTTP_TIMEOUTS.get("groq")
+        )]
+    return [CompletionBackend(**config) for config in settings.LLM_BACKENDS]
+
+
+llm_pool = BackendPool(load_backends())
@@ -0,0 +1,159 @@
+# app/core/log.py
+from typing import Any, Dict, Optional
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from ..config import settings
+
+# Correlates every log line emitted while handling one request
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+_STANDARD_KWARGS = ("exc_info", "stack_info", "stacklevel", "extra")
+
+_listener: Optional[QueueListener] = None
+
+
+def truncate(value: str, limit: Optional[int] = None) -> str:
+    limit = settings.LOG_FIELD_MAX_LENGTH if limit is None else limit
+    if len(value) <= limit:
+        return value
+    return f"{value[:limit]}...(+{len(value) - limit} chars)"
+
+
+class JsonFormatter(logging.Formatter):
+    # Runs on the background listener thread, off the event loop
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in (getattr(record, "fields", None) or {}).items():
+            if not isinstance(value, (int, float, bool, type(None))):
+                value = truncate(value if isinstance(value, str) else json.dumps(value, default=str))
+            entry[key] = value
+        if record.exc_info:
+            entry["exception"] = truncate(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    # Never blocks the caller: when the writer falls behind, records are dropped
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Captured here, in the request's context; formatting happens on the writer thread
+        record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    # logger.info("Tool finished", tool=name, ms=12.5) -- keyword arguments become
+    # structured fields. Nothing is built when the level is disabled.
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in _STANDARD_KWARGS}
+        if fields:
+            extra = dict(kwargs.get("extra") or {})
+            extra["fields"] = fields
+            kwargs["extra"] = extra
+        return msg, kwargs
+
+    def payload(self, msg: str, payload: Any, level: int = logging.DEBUG, **fields) -> None:
+        # Full payload dumps are opt-in (LOG_PAYLOADS) and sampled per level; when
+        # off this is a couple of attribute checks
+        if not settings.LOG_PAYLOADS or not self.isEnabledFor(level):
+            return
+        rate = settings.LOG_PAYLOAD_SAMPLE_RATES.get(logging.getLevelName(level), 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            return
+        # Serialized eagerly: the payload may be mutated before the writer thread formats it
+        fields["payload"] = truncate(
+            json.dumps(payload, default=str, separators=(",", ":")),
+            settings.LOG_PAYLOAD_MAX_LENGTH
+        )
+        self.log(level, msg, **fields)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(logging.getLogger(name), {})
+
+
+def configure_logging() -> None:
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+
+    app_logger = logging.getLogger("app")
+    app_logger.handlers = [_DroppingQueueHandler(log_queue)]
+    app_logger.setLevel(settings.LOG_LEVEL.upper())
+    app_logger.propagate = False
+
+
+def shutdown_logging() -> None:
+    global _listener
+    if _listener is not None:
+        # Flushes whatever is still queued
+        _listener.stop()
+        _listener = None
+    logging.getLogger("app").handlers = []
+    logging.getLogger("app").propagate = True
+
+
+class RequestIdMiddleware:
+    # Plain ASGI middleware (no extra task per request, streaming-safe): takes
+    # X-Request-ID from the client when it looks sane, otherwise generates one,
+    # and echoes it on the response
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _REQUEST_ID_PATTERN.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+        header = (b"x-request-id", request_id.encode())
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + [header]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,59 @@
+# app/core/loop_monitor.py
+from typing import Any, Dict, Optional
+from collections import deque
+import asyncio
+import time
+from ..config import settings
+
+
+class LoopLagMonitor:
+    # Sleeps for a fixed interval and records how late it wakes up: anything
+    # blocking the event loop (CPU work, sync I/O) shows up as lag
+    def __init__(self, interval: float, window: int):
+        self.interval = interval
+        self._samples: deque = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self.max_lag = 0.0
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self._samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def reset(self) -> None:
+        self._samples.clear()
+        self.max_lag = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        # Milliseconds over the recent window; `max_ms` covers everything since the last reset
+        ordered = sorted(self._samples)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 3)
+
+        return {
+            "samples": len(ordered),
+            "interval_ms": self.interval * 1000,
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(self.max_lag * 1000, 3),
+        }
+
+
+loop_monitor = LoopLagMonitor(settings.LOOP_LAG_INTERVAL, settings.LOOP_LAG_WINDOW)
@@ -0,0 +1,242 @@
+# app/core/metrics.py
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from contextvars import ContextVar
+import math
+import time
+from ..config import settings
+
+LabelValues = Tuple[str, ...]
+# A collector returns (name, type, help, [(labels, value), ...]) for values that
+# already live elsewhere (cache counters, queue depths...) and are read at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]]]
+
+# Seconds; upstream calls dominate, so the buckets reach well past a minute
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    # Plain lists per label set: an observation is one bisect and three increments
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # [per-bucket counts (last one is +Inf), sum, count]
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+class MetricsRegistry:
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._metrics: List[Any] = []
+        self._collectors: List[Collector] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(f"{self.namespace}_{name}", help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+        metric = Histogram(f"{self.namespace}_{name}", help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, collector: Collector) -> Collector:
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        # Prometheus text exposition format 0.0.4
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                name = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry("chat_agent")
+
+stage_duration = metrics.histogram(
+    "stage_duration_seconds", "Duration of each stage of a request", ("stage", "status")
+)
+stage_upstream_bytes = metrics.histogram(
+    "stage_upstream_bytes", "Bytes exchanged with upstreams during a stage", ("stage", "direction"), BYTE_BUCKETS
+)
+llm_tokens = metrics.histogram(
+    "llm_tokens", "Token usage reported by the model per call", ("kind",), TOKEN_BUCKETS
+)
+http_duration = metrics.histogram(
+    "http_request_duration_seconds", "Duration of HTTP requests", ("method", "route", "status")
+)
+upstream_requests = metrics.counter(
+    "upstream_requests_total", "Requests sent to upstream services", ("upstream", "status")
+)
+upstream_bytes = metrics.counter(
+    "upstream_bytes_total", "Bytes exchanged with upstream services", ("upstream", "direction")
+)
+
+
+# Per-request stage timings (for Server-Timing) and the innermost open span
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    # `with span("llm.first"):` -- times a stage, records its status (an exception
+    # means "error") and collects upstream bytes seen while it was open. A class
+    # rather than a generator-based context manager: this costs ~1-2us per span.
+    __slots__ = ("stage", "started", "bytes_out", "bytes_in", "status", "_token")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.status = "ok"
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self.started
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.status = "error"
+        stage_duration.observe(elapsed, (self.stage, self.status))
+        if self.bytes_out:
+            stage_upstream_bytes.observe(self.bytes_out, (self.stage, "out"))
+        if self.bytes_in:
+            stage_upstream_bytes.observe(self.bytes_in, (self.stage, "in"))
+        timings = _timings.get()
+        if timings is not None:
+            timings[self.stage] = timings.get(self.stage, 0.0) + elapsed
+
+
+def span(stage: str) -> Span:
+    return Span(stage)
+
+
+def record_token_usage(usage: Dict[str, Any]) -> None:
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage.get(kind) is not None:
+            llm_tokens.observe(usage[kind], (kind[:-len("_tokens")],))
+
+
+def record_upstream_exchange(upstream: str, status: int, sent: int, received: int) -> None:
+    # Called from the pooled clients' event hooks; bytes are also credited to the open span
+    upstream_requests.inc((upstream, str(status)))
+    upstream_bytes.inc((upstream, "out"), sent)
+    upstream_bytes.inc((upstream, "in"), received)
+    current = _current_span.get()
+    if current is not None:
+        current.bytes_out += sent
+        current.bytes_in += received
+
+
+def _server_timing(timings: Dict[str, float]) -> bytes:
+    return ", ".join(
+        f"{stage.replace('.', '-').replace(':', '-')};dur={elapsed * 1000:.1f}"
+        for stage, elapsed in timings.items()
+    ).encode("latin-1", "replace")
+
+
+class MetricsMiddleware:
+    # Times every HTTP request by route template, and (with SERVER_TIMING_ENABLED)
+    # reports the stages finished before the response started in a Server-Timing header
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING_ENABLED and timings:
+                    timings["total"] = time.perf_counter() - started
+                    message["headers"] = list(message.get("headers", ())) + [(b"server-timing", _server_timing(timings))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            route = scope.get("route")
+            http_duration.observe(
+                time.perf_counter() - started,
+                (scope["method"], getattr(route, "path", "unmatched"), str(status))
+            )
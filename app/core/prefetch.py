@@ -0,0 +1,98 @@
+# app/core/prefetch.py
+from typing import Any, Dict, Optional
+import asyncio
+from pydantic import BaseModel, ValidationError
+from ..config import settings
+from .cache import caches
+from .log import get_logger
+from .metrics import span
+from .tool_registry import ToolRegistry, ToolSet, ToolSpec, registry
+
+logger = get_logger(__name__)
+
+
+class Prefetch:
+    # One speculative tool call, started alongside the first model call
+    def __init__(self, spec: ToolSpec, arguments: BaseModel, task: asyncio.Task):
+        self.spec = spec
+        self.key = spec.call_key(arguments)
+        self.task = task
+        self.used = False
+        self.mismatched = False
+
+    def claim(self, spec: ToolSpec, arguments: BaseModel) -> Optional[asyncio.Task]:
+        # The prefetched call, if the model asked for the same lookup (once only)
+        if self.used or spec.name != self.spec.name:
+            return None
+        if spec.call_key(arguments) != self.key:
+            self.mismatched = True
+            return None
+        self.used = True
+        return self.task
+
+
+class ToolPrefetcher:
+    # Starts the likely tool lookup while the model is still deciding whether to
+    # make it. Only read-only tools with a `prefetch` hook qualify, and only when
+    # routing selected exactly one of them; an unused result is simply dropped.
+    def __init__(self, registry: ToolRegistry, name: str = "tool_prefetch"):
+        self._registry = registry
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.unused = 0
+        caches[name] = self
+
+    async def _run(self, spec: ToolSpec, arguments: BaseModel) -> Dict:
+        with span(f"prefetch.{spec.name}"):
+            return await spec.invoke(arguments)
+
+    def start(self, message: str, tools: Optional[ToolSet]) -> Optional[Prefetch]:
+        if not settings.TOOL_PREFETCH_ENABLED or not tools:
+            return None
+        candidates = [
+            spec for spec in map(self._registry.get, tools.names)
+            if spec.prefetch is not None and spec.read_only
+        ]
+        if len(candidates) != 1:
+            return None
+        spec = candidates[0]
+        guess = spec.prefetch(message)
+        if guess is None:
+            return None
+        try:
+            arguments = spec.parse_arguments(guess)
+        except ValidationError:
+            return None
+        self.started += 1
+        return Prefetch(spec, arguments, asyncio.ensure_future(self._run(spec, arguments)))
+
+    def finish(self, prefetch: Optional[Prefetch]) -> None:
+        # Called once the turn is over; drops the speculative call if nobody used it
+        if prefetch is None:
+            return
+        if prefetch.used:
+            self.hits += 1
+            return
+        if prefetch.mismatched:
+            self.misses += 1
+        else:
+            self.unused += 1
+        if prefetch.task.done():
+            if not prefetch.task.cancelled():
+                prefetch.task.exception()  # Retrieved, so asyncio doesn't warn about it
+        else:
+            prefetch.task.cancel()
+        logger.debug("Prefetch discarded", tool=prefetch.spec.name, mismatched=prefetch.mismatched)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "unused": self.unused,
+            "hit_ratio": self.hits / self.started if self.started else 0.0,
+        }
+
+
+tool_prefetcher = ToolPrefetcher(registry)
@@ -0,0 +1,367 @@
+# app/core/progress_store.py
+from typing import Any, Dict, Iterable, List, Optional, Set
+from abc import ABC, abstractmethod
+from array import array
+from datetime import datetime, timezone
+import asyncio
+import json
+import math
+import os
+from ..config import settings
+from .constants import USER_PROGRESS
+from .database import get_database
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+FIELDS = ("completion_percentage", "modules_completed", "total_modules", "last_activity", "next_milestone")
+
+# Module counts are stored as unsigned 16-bit integers
+MAX_MODULES = 65535
+
+
+def _timestamp(value: Any) -> float:
+    # ISO string / datetime / epoch seconds -> epoch seconds; NaN stands for "never"
+    if value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _isoformat(timestamp: float) -> Optional[str]:
+    if math.isnan(timestamp):
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+class _Interner:
+    # Strings that repeat across records (user ids, course ids, milestones) are
+    # stored once and referenced by index
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __call__(self, value: str) -> int:
+        number = self.index.get(value)
+        if number is None:
+            number = self.index[value] = len(self.values)
+            self.values.append(value)
+        return number
+
+
+class ProgressTable:
+    # Progress records as parallel typed arrays, one row per (user, course) pair:
+    # about 25 bytes a record instead of a dict per enrollment. Each user has an
+    # array of their row numbers, so a lookup scans only that user's enrollments.
+    def __init__(self):
+        self._users = _Interner()
+        self._courses = _Interner()
+        self._milestones = _Interner()
+        self._user_rows: List[array] = []
+        self.user = array("I")
+        self.course = array("I")
+        self.completion = array("B")
+        self.modules_completed = array("H")
+        self.total_modules = array("H")
+        self.last_activity = array("d")
+        self.milestone = array("I")
+
+    def __len__(self) -> int:
+        return len(self.user)
+
+    def find(self, user_id: str, course_id: str) -> Optional[int]:
+        user = self._users.index.get(user_id)
+        course = self._courses.index.get(course_id)
+        if user is None or course is None:
+            return None
+        for row in self._user_rows[user]:
+            if self.course[row] == course:
+                return row
+        return None
+
+    def rows(self, user_id: str) -> Iterable[int]:
+        user = self._users.index.get(user_id)
+        return () if user is None else self._user_rows[user]
+
+    @staticmethod
+    def _module_count(value: Any) -> int:
+        count = int(value)
+        if not 0 <= count <= MAX_MODULES:
+            raise ValueError(f"Module counts must be between 0 and {MAX_MODULES}, got {count}")
+        return count
+
+    def upsert(self, user_id: str, course_id: str, values: Dict[str, Any]) -> int:
+        # Everything is converted before the table is touched, so a bad value
+        # can't leave a half-written row behind
+        changes: Dict[str, Any] = {}
+        if "completion_percentage" in values:
+            changes["completion"] = max(0, min(100, int(values["completion_percentage"])))
+        if "modules_completed" in values:
+            changes["modules_completed"] = self._module_count(values["modules_completed"])
+        if "total_modules" in values:
+            changes["total_modules"] = self._module_count(values["total_modules"])
+        if "last_activity" in values:
+            changes["last_activity"] = _timestamp(values["last_activity"])
+
+        row = self.find(user_id, course_id)
+        if row is None:
+            user = self._users(user_id)
+            if user == len(self._user_rows):
+                self._user_rows.append(array("I"))
+            row = len(self.user)
+            self._user_rows[user].append(row)
+            self.user.append(user)
+            self.course.append(self._courses(course_id))
+            self.completion.append(0)
+            self.modules_completed.append(0)
+            self.total_modules.append(0)
+            self.last_activity.append(math.nan)
+            self.milestone.append(self._milestones("Start the course"))
+
+        for column, value in changes.items():
+            getattr(self, column)[row] = value
+        if values.get("next_milestone") is not None:
+            self.milestone[row] = self._milestones(values["next_milestone"])
+        return row
+
+    def record(self, row: int) -> Dict[str, Any]:
+        return {
+            "completion_percentage": self.completion[row],
+            "modules_completed": self.modules_completed[row],
+            "total_modules": self.total_modules[row],
+            "last_activity": _isoformat(self.last_activity[row]),
+            "next_milestone": self._milestones.values[self.milestone[row]],
+        }
+
+    def key(self, row: int) -> tuple:
+        return self._users.values[self.user[row]], self._courses.values[self.course[row]]
+
+    def document(self, row: int) -> Dict[str, Any]:
+        user_id, course_id = self.key(row)
+        return {"user_id": user_id, "course_id": course_id, **self.record(row)}
+
+
+class ProgressBackend(ABC):
+    @abstractmethod
+    def load(self) -> Iterable[Dict]:
+        ...
+
+    @abstractmethod
+    def write_many(self, documents: List[Dict]) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+def _flatten(progress: Dict[str, Dict[str, Dict]]) -> Iterable[Dict]:
+    for user_id, courses in progress.items():
+        for course_id, record in courses.items():
+            yield {"user_id": user_id, "course_id": course_id, **record}
+
+
+class MemoryProgressBackend(ProgressBackend):
+    # Nothing is persisted; starts from the mock data in constants
+    def load(self) -> Iterable[Dict]:
+        return _flatten(USER_PROGRESS)
+
+    def write_many(self, documents: List[Dict]) -> None:
+        pass
+
+
+class FileProgressBackend(ProgressBackend):
+    # Flushes are appended as JSON lines; loading replays them (last write wins)
+    # and rewrites the file once superseded lines outnumber the live ones
+    def __init__(self, path: str):
+        self.path = path
+        self._lines = 0
+        self._records = 0
+
+    def load(self) -> Iterable[Dict]:
+        latest: Dict[tuple, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        document = json.loads(line)
+                        latest[document["user_id"], document["course_id"]] = document
+                        self._lines += 1
+        else:
+            latest = {(document["user_id"], document["course_id"]): document for document in _flatten(USER_PROGRESS)}
+        self._records = len(latest)
+        if self._lines > 2 * self._records or not os.path.exists(self.path):
+            self._rewrite(latest.values())
+        return latest.values()
+
+    def _rewrite(self, documents: Iterable[Dict]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            for document in documents:
+                file.write(json.dumps(document, separators=(",", ":")) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        self._lines = self._records
+
+    def write_many(self, documents: List[Dict]) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write("".join(json.dumps(document, separators=(",", ":")) + "\n" for document in documents))
+            file.flush()
+            os.fsync(file.fileno())
+        self._lines += len(documents)
+
+
+class MongoProgressBackend(ProgressBackend):
+    # One document per enrollment, upserted in unordered bulk writes
+    def __init__(self, collection_name: str = "progress"):
+        self._collection = get_database()[collection_name]
+
+    def load(self) -> Iterable[Dict]:
+        self._collection.create_index("user_id")
+        return self._collection.find({}, {"_id": 0})
+
+    def write_many(self, documents: List[Dict]) -> None:
+        from pymongo import UpdateOne
+        self._collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": f"{document['user_id']}:{document['course_id']}"},
+                    {"$set": document},
+                    upsert=True
+                )
+                for document in documents
+            ],
+            ordered=False
+        )
+
+
+class ProgressStore:
+    # Reads come from the in-memory table. Updates are applied to it at once and
+    # their rows marked dirty; a background task writes dirty rows to the backend
+    # in bulk every PROGRESS_FLUSH_INTERVAL seconds, or sooner once
+    # PROGRESS_FLUSH_BATCH rows are waiting. Repeated updates of one enrollment
+    # between flushes cost a single write.
+    def __init__(
+        self,
+        backend: ProgressBackend,
+        flush_interval: float = settings.PROGRESS_FLUSH_INTERVAL,
+        flush_batch: int = settings.PROGRESS_FLUSH_BATCH
+    ):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.table = ProgressTable()
+        self._dirty: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._loaded = False
+        self.updates = 0
+        self.writes = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def _load(self) -> None:
+        for document in self.backend.load():
+            self.table.upsert(document["user_id"], document["course_id"], document)
+
+    async def start(self) -> None:
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+            self._loaded = True
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+
+    def get(self, user_id: str, course_id: str) -> Optional[Dict[str, Any]]:
+        row = self.table.find(user_id, course_id)
+        return None if row is None else self.table.record(row)
+
+    def enrollments(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        # Every course of one user, keyed by course id
+        return {self.table.key(row)[1]: self.table.record(row) for row in self.table.rows(user_id)}
+
+    def update(self, user_id: str, course_id: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        values = {key: value for key, value in values.items() if key in FIELDS}
+        values.setdefault("last_activity", datetime.now(timezone.utc))
+        row = self.table.upsert(user_id, course_id, values)
+        self._dirty.add(row)
+        self.updates += 1
+        if len(self._dirty) >= self.flush_batch:
+            self._wakeup.set()
+        return self.table.record(row)
+
+    def update_many(self, updates: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for update in updates:
+            self.update(update["user_id"], update["course_id"], update)
+            count += 1
+        return count
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+            rows, self._dirty = self._dirty, set()
+            documents = [self.table.document(row) for row in rows]
+            try:
+                await asyncio.to_thread(self.backend.write_many, documents)
+            except Exception:
+                # Keep them for the next flush; newer updates are already in the table
+                self._dirty |= rows
+                self.failures += 1
+                raise
+            self.writes += len(documents)
+            self.flushes += 1
+            return len(documents)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Progress flush failed", error=str(e), pending=len(self._dirty))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "records": len(self.table),
+            "pending": len(self._dirty),
+            "updates": self.updates,
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "failures": self.failures,
+        }
+
+
+def create_progress_store() -> ProgressStore:
+    backends = {
+        "memory": MemoryProgressBackend,
+        "file": lambda: FileProgressBackend(settings.PROGRESS_PATH),
+        "mongo": MongoProgressBackend,
+    }
+    backend = backends.get(settings.PROGRESS_BACKEND)
+    if backend is None:
+        raise ValueError(f"Unknown PROGRESS_BACKEND: {settings.PROGRESS_BACKEND}")
+    return ProgressStore(backend())
+
+
+progress_store = create_progress_store()
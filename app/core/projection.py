@@ -0,0 +1,73 @@
+# app/core/projection.py
+from typing import Any, Dict, Optional, Sequence
+from dataclasses import dataclass, field
+import json
+from .context import estimate_tokens
+from .log import get_logger
+from .metrics import metrics
+from .tool_registry import ToolRegistry
+
+logger = get_logger(__name__)
+
+tool_result_tokens = metrics.counter(
+    "tool_result_tokens_total", "Estimated tokens of tool results, in full and as sent to the model", ("tool", "view")
+)
+
+
+@dataclass
+class Projection:
+    # Declarative view of a tool result for the model. `fields` whitelists keys
+    # (None keeps them all), `nested` projects the value under a key, strings are
+    # cut at `max_text` characters and lists at `max_items` entries.
+    fields: Optional[Sequence[str]] = None
+    nested: Dict[str, "Projection"] = field(default_factory=dict)
+    max_text: Optional[int] = None
+    max_items: Optional[int] = None
+
+    def __call__(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            keys = [key for key in value if self.fields is None or key in self.fields or key in self.nested]
+            if not keys:
+                # Nothing whitelisted matched (an unexpected payload shape): better
+                # to send it all, trimmed, than an empty object
+                keys = list(value)
+            return {
+                key: self.nested[key](value[key]) if key in self.nested else self._trim(value[key])
+                for key in keys
+            }
+        return self._trim(value)
+
+    def _trim(self, value: Any) -> Any:
+        if isinstance(value, str):
+            if self.max_text is not None and len(value) > self.max_text:
+                return value[:self.max_text] + "..."
+            return value
+        if isinstance(value, list):
+            items = [self(item) for item in value[:self.max_items]]
+            if self.max_items is not None and len(value) > self.max_items:
+                items.append(f"... {len(value) - self.max_items} more")
+            return items
+        if isinstance(value, dict):
+            return {key: self._trim(item) for key, item in value.items()}
+        return value
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def tool_message_content(name: str, result: Any, registry: ToolRegistry) -> str:
+    # What goes into the `tool` message. Errors are passed through untouched; the
+    # full result stays in the API response.
+    spec = registry.get(name) if name in registry else None
+    if spec is None or spec.projection is None or (isinstance(result, dict) and "error" in result):
+        return _compact(result)
+
+    content = _compact(spec.projection(result))
+    # Measured against the default encoding, which is what used to be sent
+    full_tokens = estimate_tokens(json.dumps(result))
+    projected_tokens = estimate_tokens(content)
+    tool_result_tokens.inc((name, "full"), full_tokens)
+    tool_result_tokens.inc((name, "projected"), projected_tokens)
+    logger.debug("Projected tool result", tool=name, full_tokens=full_tokens, projected_tokens=projected_tokens)
+    return content
@@ -0,0 +1,156 @@
+# app/core/rate_limit.py
+from typing import Any, AsyncIterator, Dict, Optional
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+import asyncio
+import random
+import time
+from .metrics import span
+
+
+class UpstreamOverloaded(Exception):
+    # Raised instead of queueing forever; `retry_after` is a hint for the client
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After is either delta-seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    if retry_after is not None:
+        # Honour the server, plus a little jitter so waiters don't return in lockstep
+        return retry_after + random.uniform(0, min(1.0, 0.1 * retry_after + 0.05))
+    # "Equal jitter" exponential backoff
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class TokenBucket:
+    # Reservation-style bucket: callers take what they need immediately (the balance
+    # may go negative) and are told how long to wait, which keeps arrivals FIFO
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return now
+
+    def reserve(self, amount: float) -> float:
+        now = self._refill()
+        self._tokens -= amount
+        wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        return max(wait, self._paused_until - now)
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+    def pause(self, seconds: float) -> None:
+        # The upstream said "not before": nobody gets through until then
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class AdmissionController:
+    # Bounds in-flight upstream calls and paces them to requests/min and tokens/min.
+    # Callers beyond the concurrency limit wait in a bounded queue with a deadline;
+    # once the queue is full they are rejected right away.
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        requests_per_minute: float,
+        tokens_per_minute: float
+    ):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    def pause(self, seconds: float) -> None:
+        self.requests.pause(seconds)
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int) -> None:
+        # Settle the token reservation once the real usage is known
+        if actual_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+        elif actual_tokens > estimated_tokens:
+            self.tokens.reserve(actual_tokens - estimated_tokens)
+
+    def _retry_hint(self) -> float:
+        return max(1.0, self.queue_timeout / 2)
+
+    @asynccontextmanager
+    async def admit(self, estimated_tokens: int) -> AsyncIterator[None]:
+        with span("llm.admission"):
+            deadline = time.monotonic() + self.queue_timeout
+            if self._semaphore.locked():
+                if self._waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise UpstreamOverloaded("Too many requests queued for the language model", self._retry_hint())
+                self._waiting += 1
+                try:
+                    await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+                except asyncio.TimeoutError:
+                    self.timed_out += 1
+                    raise UpstreamOverloaded("Timed out waiting for the language model", self._retry_hint())
+                finally:
+                    self._waiting -= 1
+            else:
+                await self._semaphore.acquire()
+
+            try:
+                wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+                if time.monotonic() + wait > deadline:
+                    self.requests.refund(1)
+                    self.tokens.refund(estimated_tokens)
+                    self.timed_out += 1
+                    raise UpstreamOverloaded("Language model rate limit reached", max(1.0, wait))
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            except BaseException:
+                # Includes cancellation while pacing
+                self._semaphore.release()
+                raise
+
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "waiting": self._waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import Security, HTTPException
 from fastapi.security import APIKeyHeader
 from starlette.status import HTTP_403_FORBIDDEN
@@ -5,11 +6,13 @@ from ..config import settings
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
-async def verify_api_key(api_key: str = Security(api_key_header)) -> str:
+def api_key_valid(api_key: Optional[str]) -> bool:
     if settings.DEBUG:  # Allow all requests in debug mode
-        return api_key
-    
-    if not api_key or api_key != settings.APP_API_KEY:
+        return True
+    return bool(api_key) and api_key == settings.APP_API_KEY
+
+async def verify_api_key(api_key: str = Security(api_key_header)) -> str:
+    if not api_key_valid(api_key):
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN,
             detail="Invalid API key"
@@ -0,0 +1,191 @@
+# app/core/sessions.py
+from typing import Dict, List, Optional
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from weakref import WeakValueDictionary
+import asyncio
+import secrets
+from ..config import settings
+from .cache import AsyncTTLCache
+from .database import get_database
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class SessionBackend(ABC):
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def create(self, session: Dict) -> None:
+        ...
+
+    @abstractmethod
+    async def append(self, session_id: str, messages: List[Dict], expires_at: datetime) -> bool:
+        # False when the session no longer exists
+        ...
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> bool:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+def _copy_session(session: Dict) -> Dict:
+    return {**session, "messages": list(session["messages"])}
+
+
+class MemorySessionBackend(SessionBackend):
+    # Process-local backend for tests and single-instance development. Sessions are
+    # copied in and out so it behaves like a real store.
+    def __init__(self):
+        self._sessions: Dict[str, Dict] = {}
+
+    async def get(self, session_id: str) -> Optional[Dict]:
+        session = self._sessions.get(session_id)
+        if session is not None and session["expires_at"] <= _now():
+            del self._sessions[session_id]
+            return None
+        return None if session is None else _copy_session(session)
+
+    async def create(self, session: Dict) -> None:
+        self._sessions[session["_id"]] = _copy_session(session)
+
+    async def append(self, session_id: str, messages: List[Dict], expires_at: datetime) -> bool:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return False
+        session["messages"].extend(messages)
+        session["updated_at"] = _now()
+        session["expires_at"] = expires_at
+        return True
+
+    async def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+
+class MongoSessionBackend(SessionBackend):
+    # pymongo is synchronous, so every call runs in a worker thread
+    def __init__(self, collection_name: str = "sessions"):
+        self._collection = get_database()[collection_name]
+        self._indexed = False
+
+    def _ensure_indexes(self) -> None:
+        if not self._indexed:
+            # MongoDB removes documents once `expires_at` has passed
+            self._collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+
+    async def get(self, session_id: str) -> Optional[Dict]:
+        session = await asyncio.to_thread(self._collection.find_one, {"_id": session_id})
+        # The TTL monitor only runs once a minute
+        if session is not None and session["expires_at"] <= _now():
+            return None
+        return session
+
+    async def create(self, session: Dict) -> None:
+        def insert():
+            self._ensure_indexes()
+            self._collection.insert_one(session)
+        await asyncio.to_thread(insert)
+
+    async def append(self, session_id: str, messages: List[Dict], expires_at: datetime) -> bool:
+        # $push only ships the new turn, never the whole history
+        result = await asyncio.to_thread(
+            self._collection.update_one,
+            {"_id": session_id},
+            {
+                "$push": {"messages": {"$each": messages}},
+                "$set": {"updated_at": _now(), "expires_at": expires_at},
+            }
+        )
+        return result.matched_count > 0
+
+    async def delete(self, session_id: str) -> bool:
+        result = await asyncio.to_thread(self._collection.delete_one, {"_id": session_id})
+        return result.deleted_count > 0
+
+
+class SessionStore:
+    # Write-through cache in front of a backend: reads are served from process
+    # memory, every write goes to the backend first
+    def __init__(self, backend: SessionBackend, ttl_seconds: int = settings.SESSION_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self._cache = AsyncTTLCache(
+            "sessions",
+            max_entries=settings.SESSION_CACHE_MAX_ENTRIES,
+            default_ttl=settings.SESSION_CACHE_TTL
+        )
+        self._locks: "WeakValueDictionary[str, asyncio.Lock]" = WeakValueDictionary()
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        # Serializes turns within one session
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        return lock
+
+    def _cache_ttl(self, session: Optional[Dict]) -> Optional[float]:
+        if session is None:
+            return None
+        remaining = (session["expires_at"] - _now()).total_seconds()
+        return min(settings.SESSION_CACHE_TTL, remaining)
+
+    async def create(self) -> Dict:
+        now = _now()
+        session = {
+            "_id": secrets.token_urlsafe(16),
+            "messages": [],
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": now + self.ttl,
+        }
+        await self.backend.create(session)
+        self._cache.set(session["_id"], session, self._cache_ttl(session))
+        return session
+
+    async def get(self, session_id: str) -> Optional[Dict]:
+        session = await self._cache.get_or_load(
+            session_id,
+            lambda: self.backend.get(session_id),
+            self._cache_ttl
+        )
+        if session is not None and session["expires_at"] <= _now():
+            self._cache.pop(session_id)
+            return None
+        return session
+
+    async def append(self, session: Dict, messages: List[Dict]) -> bool:
+        # A session deleted meanwhile stays deleted: nothing is cached for it
+        expires_at = _now() + self.ttl
+        if not await self.backend.append(session["_id"], messages, expires_at):
+            self._cache.pop(session["_id"])
+            return False
+        session["messages"].extend(messages)
+        session["updated_at"] = _now()
+        session["expires_at"] = expires_at
+        self._cache.set(session["_id"], session, self._cache_ttl(session))
+        return True
+
+    async def delete(self, session_id: str) -> bool:
+        # Waits for a turn in progress, which would otherwise write the session back
+        async with self.lock(session_id):
+            self._cache.pop(session_id)
+            return await self.backend.delete(session_id)
+
+
+def create_session_store() -> SessionStore:
+    backends = {
+        "memory": MemorySessionBackend,
+        "mongo": MongoSessionBackend,
+    }
+    backend = backends.get(settings.SESSION_BACKEND)
+    if backend is None:
+        raise ValueError(f"Unknown SESSION_BACKEND: {settings.SESSION_BACKEND}")
+    return SessionStore(backend())
@@ -0,0 +1,80 @@
+# app/core/tool_executor.py
+from typing import Dict, List, Optional
+import asyncio
+from pydantic import ValidationError
+from ..config import settings
+from .log import get_logger
+from .metrics import span
+from .prefetch import Prefetch
+from .tool_registry import ToolRegistry
+
+logger = get_logger(__name__)
+
+
+def tool_timeout(function_name: str) -> float:
+    return settings.TOOL_TIMEOUTS.get(function_name, settings.TOOL_DEFAULT_TIMEOUT)
+
+
+async def _run_tool_call(
+    tool_call: Dict,
+    registry: ToolRegistry,
+    semaphore: asyncio.Semaphore,
+    prefetched: Optional[Prefetch] = None
+) -> Dict:
+    function_name = tool_call["function"]["name"]
+    outcome = {
+        "tool_call_id": tool_call["id"],
+        "name": function_name,
+        "arguments": {},
+    }
+
+    try:
+        spec = registry.get(function_name)
+        # Parsed and validated straight from the JSON string in one pass
+        arguments = spec.parse_arguments(tool_call["function"]["arguments"])
+    except KeyError as e:
+        logger.warning("Unknown function called", tool=function_name)
+        outcome["result"] = {"error": str(e)}
+        return outcome
+    except ValidationError as e:
+        outcome["result"] = {"error": f"Invalid arguments for {function_name}: {e}"}
+        return outcome
+    outcome["arguments"] = arguments.model_dump()
+
+    timeout = tool_timeout(function_name)
+    prefetch_task = prefetched.claim(spec, arguments) if prefetched is not None else None
+    try:
+        if prefetch_task is not None:
+            # Started alongside the model call; the timeout counts from here
+            logger.info("Using prefetched result", tool=function_name, arguments=outcome["arguments"])
+            with span(f"tool.{function_name}"):
+                outcome["result"] = await asyncio.wait_for(prefetch_task, timeout)
+        else:
+            logger.info("Executing function", tool=function_name, arguments=outcome["arguments"])
+            async with semaphore:
+                # The timeout only covers execution, not time spent waiting for a slot
+                with span(f"tool.{function_name}"):
+                    outcome["result"] = await asyncio.wait_for(spec.invoke(arguments), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Tool timed out", tool=function_name, timeout=timeout)
+        outcome["result"] = {"error": f"{function_name} timed out"}
+    except Exception as e:
+        logger.exception("Tool failed", tool=function_name)
+        outcome["result"] = {"error": f"{function_name} failed: {str(e)}"}
+    logger.payload("Function result", outcome["result"], tool=function_name)
+    return outcome
+
+
+async def execute_tool_calls(
+    tool_calls: List[Dict],
+    registry: ToolRegistry,
+    prefetched: Optional[Prefetch] = None
+) -> List[Dict]:
+    # Runs every call of one model turn concurrently (bounded by TOOL_MAX_CONCURRENCY).
+    # A failing or slow tool yields an error result instead of failing the turn, and
+    # results come back in the same order as `tool_calls`. A matching `prefetched`
+    # call is awaited instead of being made again.
+    semaphore = asyncio.Semaphore(settings.TOOL_MAX_CONCURRENCY)
+    return await asyncio.gather(
+        *(_run_tool_call(tool_call, registry, semaphore, prefetched) for tool_call in tool_calls)
+    )
@@ -0,0 +1,161 @@
+# app/core/tool_registry.py
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Type, Union
+from dataclasses import dataclass, field
+import inspect
+import json
+from pydantic import BaseModel, create_model
+
+
+class ToolSet(list):
+    # Tool schemas plus their JSON encoding, serialized once and spliced
+    # into request bodies instead of being re-encoded per request
+    def __init__(self, schemas: Iterable[Dict[str, Any]] = ()):
+        super().__init__(schemas)
+        self.json = json.dumps(self, separators=(",", ":"))
+        self.names = frozenset(schema["function"]["name"] for schema in self)
+
+
+@dataclass
+class ToolSpec:
+    name: str
+    function: Callable[..., Awaitable[Dict]]
+    description: str
+    arguments_model: Type[BaseModel]
+    schema: Dict[str, Any]
+    keywords: List[str] = field(default_factory=list)
+    read_only: bool = True
+    # Guesses the arguments from the user's message, so the call can start before
+    # the model asks for it; `prefetch_key` says which arguments count as the same call
+    prefetch: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None
+    prefetch_key: Optional[Callable[[Dict[str, Any]], Any]] = None
+    # Turns (arguments, result) into the reply itself when no phrasing is needed,
+    # e.g. errors and confirmations; returns None when the model should answer
+    render: Optional[Callable[[Dict[str, Any], Dict], Optional[str]]] = None
+    # Reduces a result to what the model needs to see (see core.projection);
+    # the caller still gets the full result
+    projection: Optional[Callable[[Any], Any]] = None
+
+    def parse_arguments(self, arguments: Union[str, Dict[str, Any], None]) -> BaseModel:
+        if isinstance(arguments, (str, bytes)):
+            return self.arguments_model.model_validate_json(arguments or "{}")
+        return self.arguments_model.model_validate(arguments or {})
+
+    def call_key(self, arguments: BaseModel) -> Any:
+        values = arguments.model_dump()
+        if self.prefetch_key is not None:
+            return self.prefetch_key(values)
+        return json.dumps(values, sort_keys=True, default=str)
+
+    async def invoke(self, arguments: BaseModel) -> Dict:
+        return await self.function(**{name: getattr(arguments, name) for name in self.arguments_model.model_fields})
+
+
+def _clean_schema(schema: Any) -> Any:
+    # Pydantic's JSON schema carries titles and anyOf-null wrappers for Optional
+    # fields; the model needs neither, and they cost prompt tokens on every call
+    if isinstance(schema, list):
+        return [_clean_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    cleaned = {key: _clean_schema(value) for key, value in schema.items() if key != "title"}
+    variants = cleaned.get("anyOf")
+    if variants:
+        non_null = [variant for variant in variants if variant.get("type") != "null"]
+        if len(non_null) == 1:
+            del cleaned["anyOf"]
+            cleaned = {**non_null[0], **cleaned}
+    if cleaned.get("default", 0) is None:
+        del cleaned["default"]
+    return cleaned
+
+
+def _build_arguments_model(name: str, function: Callable) -> Type[BaseModel]:
+    fields = {}
+    for parameter in inspect.signature(function).parameters.values():
+        annotation = parameter.annotation if parameter.annotation is not inspect.Parameter.empty else Any
+        default = parameter.default if parameter.default is not inspect.Parameter.empty else ...
+        fields[parameter.name] = (annotation, default)
+    return create_model(f"{name}_arguments", **fields)
+
+
+class ToolRegistry:
+    def __init__(self):
+        self._tools: Dict[str, ToolSpec] = {}
+        self._toolsets: Dict[FrozenSet[str], ToolSet] = {}
+
+    def tool(
+        self,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        keywords: Iterable[str] = (),
+        read_only: bool = True,
+        prefetch: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+        prefetch_key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        render: Optional[Callable[[Dict[str, Any], Dict], Optional[str]]] = None,
+        projection: Optional[Callable[[Any], Any]] = None
+    ):
+        # Registers an async function as a tool. The argument model and JSON schema
+        # are derived from its signature once, at import time; parameter descriptions
+        # come from `Annotated[..., Field(description=...)]`.
+        def decorator(function):
+            tool_name = name or function.__name__
+            if tool_name in self._tools:
+                raise ValueError(f"Tool already registered: {tool_name}")
+            if prefetch is not None and not read_only:
+                raise ValueError(f"Only read-only tools can be prefetched: {tool_name}")
+            arguments_model = _build_arguments_model(tool_name, function)
+            tool_description = description or inspect.getdoc(function) or ""
+            self._tools[tool_name] = ToolSpec(
+                name=tool_name,
+                function=function,
+                description=tool_description,
+                arguments_model=arguments_model,
+                schema={
+                    "type": "function",
+                    "function": {
+                        "name": tool_name,
+                        "description": tool_description,
+                        "parameters": _clean_schema(arguments_model.model_json_schema()),
+                    },
+                },
+                keywords=list(keywords),
+                read_only=read_only,
+                prefetch=prefetch,
+                prefetch_key=prefetch_key,
+                render=render,
+                projection=projection,
+            )
+            self._toolsets.clear()
+            return function
+        return decorator
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def get(self, name: str) -> ToolSpec:
+        spec = self._tools.get(name)
+        if spec is None:
+            raise KeyError(f"Unknown function: {name}")
+        return spec
+
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def intents(self) -> Dict[str, List[str]]:
+        return {name: spec.keywords for name, spec in self._tools.items() if spec.keywords}
+
+    def toolset(self, names: Optional[Iterable[str]] = None) -> ToolSet:
+        # Cached per distinct subset of tool names
+        key = frozenset(self._tools if names is None else names)
+        toolset = self._toolsets.get(key)
+        if toolset is None:
+            toolset = ToolSet(spec.schema for name, spec in self._tools.items() if name in key)
+            self._toolsets[key] = toolset
+        return toolset
+
+    async def call(self, name: str, arguments: Union[str, Dict[str, Any], None]) -> Dict:
+        spec = self.get(name)
+        return await spec.invoke(spec.parse_arguments(arguments))
+
+
+registry = ToolRegistry()
@@ -3,10 +3,14 @@ from .course_search import search_courses
 from .progress_tracking import get_course_progress
 from .recommendations import get_recommendations
 from .learning_path import generate_learning_path
+from .platform import search_platform_courses, query_euron, submit_complaint
 
 __all__ = [
     'search_courses',
     'get_course_progress',
     'get_recommendations',
-    'generate_learning_path'
+    'generate_learning_path',
+    'search_platform_courses',
+    'query_euron',
+    'submit_complaint'
 ]
\ No newline at end of file
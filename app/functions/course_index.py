@@ -0,0 +1,191 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import Counter
+import bisect
+import heapq
+import math
+import re
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Fields that get a bitmap per distinct value for fast filtering
+FACETS = ("skill_level", "category")
+
+# Title matches count more than description matches
+TITLE_WEIGHT = 2
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def facet_key(value: str) -> str:
+    # Facet filters come from the model in whatever case it picked
+    return str(value).strip().casefold()
+
+
+def _iter_bits(bitmap: int) -> Iterable[int]:
+    # Walks the bitmap a byte at a time; int shifts would be O(size) per bit
+    for position, byte in enumerate(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")):
+        while byte:
+            lowest = byte & -byte
+            yield position * 8 + lowest.bit_length() - 1
+            byte ^= lowest
+
+
+class CourseIndex:
+    # In-memory inverted index over the course catalog with BM25 ranking.
+    # Every course lives in an integer slot; facets are int bitmaps over slots.
+    def __init__(self, courses: Iterable[Dict] = (), k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._courses: List[Optional[Dict]] = []
+        self._terms: List[Optional[Counter]] = []
+        self._lengths: List[int] = []
+        self._slots: Dict[str, int] = {}
+        self._free_slots: List[int] = []
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._vocabulary: List[str] = []  # Sorted, for prefix expansion
+        self._total_length = 0
+        self._live = 0
+        self._facets: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+        for course in courses:
+            self.add(course)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, course: Dict) -> None:
+        course_id = str(course["id"])
+        if course_id in self._slots:
+            self.remove(course_id)
+
+        slot = self._free_slots.pop() if self._free_slots else len(self._courses)
+        if slot == len(self._courses):
+            self._courses.append(None)
+            self._terms.append(None)
+            self._lengths.append(0)
+
+        terms = Counter(tokenize(course.get("description")))
+        for token in tokenize(course.get("title")):
+            terms[token] += TITLE_WEIGHT
+
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._vocabulary, term)
+            postings[slot] = frequency
+
+        length = sum(terms.values())
+        self._courses[slot] = course
+        self._terms[slot] = terms
+        self._lengths[slot] = length
+        self._total_length += length
+        self._slots[course_id] = slot
+
+        bit = 1 << slot
+        self._live |= bit
+        for facet in FACETS:
+            value = course.get(facet)
+            if value is not None:
+                bitmaps = self._facets[facet]
+                key = facet_key(value)
+                bitmaps[key] = bitmaps.get(key, 0) | bit
+
+    def remove(self, course_id: str) -> bool:
+        slot = self._slots.pop(str(course_id), None)
+        if slot is None:
+            return False
+
+        for term in self._terms[slot]:
+            postings = self._postings[term]
+            del postings[slot]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+
+        course = self._courses[slot]
+        bit = 1 << slot
+        self._live &= ~bit
+        for facet in FACETS:
+            value = course.get(facet)
+            if value is not None:
+                self._facets[facet][facet_key(value)] &= ~bit
+
+        self._total_length -= self._lengths[slot]
+        self._courses[slot] = None
+        self._terms[slot] = None
+        self._lengths[slot] = 0
+        self._free_slots.append(slot)
+        return True
+
+    def _expand(self, token: str) -> List[str]:
+        # Exact term if indexed, otherwise every indexed term it is a prefix of
+        if token in self._postings:
+            return [token]
+        start = bisect.bisect_left(self._vocabulary, token)
+        expanded = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(token):
+                break
+            expanded.append(term)
+        return expanded
+
+    def _filter_mask(self, skill_level: Optional[str], category: Optional[str]) -> int:
+        mask = self._live
+        if skill_level:
+            mask &= self._facets["skill_level"].get(facet_key(skill_level), 0)
+        if category:
+            mask &= self._facets["category"].get(facet_key(category), 0)
+        return mask
+
+    def _score(self, tokens: List[str], mask: int, filtered: bool) -> Dict[int, float]:
+        documents = len(self._slots)
+        average_length = self._total_length / documents if documents else 0.0
+        # Byte view of the mask gives O(1) membership tests per posting
+        allowed = mask.to_bytes((len(self._courses) + 7) // 8, "little") if filtered else b""
+        scores: Dict[int, float] = {}
+        for token in set(tokens):
+            for term in self._expand(token):
+                postings = self._postings[term]
+                idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+                for slot, frequency in postings.items():
+                    if filtered and not (allowed[slot >> 3] >> (slot & 7)) & 1:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[slot] / average_length)
+                    scores[slot] = scores.get(slot, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return scores
+
+    def search(
+        self,
+        query: str,
+        skill_level: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+    ) -> Dict:
+        limit = max(0, limit)
+        offset = max(0, offset)
+        mask = self._filter_mask(skill_level, category)
+        tokens = tokenize(query)
+
+        ranked: List[Tuple[float, int]]
+        if tokens:
+            scores = self._score(tokens, mask, filtered=mask != self._live)
+            total = len(scores)
+            ranked = heapq.nlargest(offset + limit, ((score, slot) for slot, score in scores.items()))
+        else:
+            # No keywords: every course passing the filters, best rated first
+            slots = list(_iter_bits(mask))
+            total = len(slots)
+            ranked = heapq.nlargest(
+                offset + limit,
+                ((self._courses[slot].get("rating") or 0.0, slot) for slot in slots)
+            )
+
+        return {
+            "courses": [self._courses[slot] for _, slot in ranked[offset:offset + limit]],
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+        }
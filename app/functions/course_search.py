@@ -1,20 +1,33 @@
-from typing import List, Dict, Optional
+from typing import Annotated, List, Dict, Optional
+from pydantic import Field
 from ..core.constants import COURSES
+from ..core.projection import Projection
+from ..core.tool_registry import registry
+from .course_index import CourseIndex
 
+# What the model sees of a catalog entry; the id and category are for the client
+COURSE_SUMMARY = Projection(fields=["title", "description", "skill_level", "duration", "rating"], max_text=200)
+
+# Built once at import; keep it in sync with catalog changes via add()/remove()
+course_index = CourseIndex(COURSES)
+
+@registry.tool(
+    name="search_catalog",
+    description="Search the course catalog by keyword, optionally filtered by skill level and category",
+    keywords=["catalog", "beginner", "intermediate", "advanced", "category"],
+    projection=Projection(fields=["courses", "total"], nested={"courses": COURSE_SUMMARY})
+)
 async def search_courses(
-    query: str,
-    skill_level: Optional[str] = None,
-    category: Optional[str] = None
+    query: Annotated[str, Field(description="Keywords to search course titles and descriptions for")],
+    skill_level: Annotated[Optional[str], Field(description="Beginner, Intermediate or Advanced")] = None,
+    category: Annotated[Optional[str], Field(description="Course category, e.g. Programming")] = None,
+    limit: Annotated[int, Field(ge=1, le=50)] = 10,
+    offset: Annotated[int, Field(ge=0)] = 0
 ) -> Dict:
-    filtered_courses = [
-        course for course in COURSES
-        if (query.lower() in course["title"].lower() or 
-            query.lower() in course["description"].lower())
-        and (not skill_level or course["skill_level"] == skill_level)
-        and (not category or course["category"] == category)
-    ]
-    
-    return {
-        "courses": filtered_courses,
-        "total": len(filtered_courses)
-    }
\ No newline at end of file
+    return course_index.search(
+        query,
+        skill_level=skill_level,
+        category=category,
+        limit=limit,
+        offset=offset
+    )
@@ -1,17 +1,41 @@
-from typing import Dict, Optional, List
-from ..core.constants import LEARNING_PATHS
+from typing import Annotated, Dict, Optional, List
+from pydantic import Field
+from ..core.constants import LEARNING_GOALS, PATH_COURSES
+from ..core.tool_registry import registry
+from .path_planner import LearningPathPlanner
 
+# Built once at import; keep it in sync with catalog changes via update_course()/remove_course()
+path_planner = LearningPathPlanner(PATH_COURSES, LEARNING_GOALS)
+
+def render_learning_path(arguments: Dict, result: Dict) -> Optional[str]:
+    # A plan is a list of courses; it reads fine without the model rephrasing it
+    goal = arguments["goal"].replace("_", " ")
+    if "error" in result:
+        goals = ", ".join(goal.replace("_", " ") for goal in result["available_goals"])
+        return f"I don't have a learning path for {goal} yet. I can plan one for: {goals}."
+    if not result["learning_path"] and not result["deferred"]:
+        return f"You already cover every course on the {goal} path at your level. Nice work!"
+    lines = [
+        f"{number}. {course['title']} ({course['duration']})"
+        for number, course in enumerate(result["learning_path"], 1)
+    ]
+    reply = f"Here's a {goal} learning path ({result['estimated_duration']} weeks):\n" + "\n".join(lines)
+    if result["deferred"]:
+        later = ", ".join(course["title"] for course in result["deferred"])
+        if not lines:
+            weeks = result["timeline_weeks"]
+            reply = f"The first course on the {goal} path takes longer than {weeks} week{'s' if weeks != 1 else ''}."
+        reply += f"\nTo reach {result['skill_level_target']} level you'd continue with: {later}."
+    return reply
+
+@registry.tool(
+    description="Build a step-by-step learning path of courses towards a goal",
+    keywords=["roadmap", "path", "career"],
+    render=render_learning_path
+)
 async def generate_learning_path(
-    goal: str,
-    current_level: str,
-    timeline: Optional[str] = None
+    goal: Annotated[str, Field(description="Learning goal, e.g. web_development or data_science")],
+    current_level: Annotated[str, Field(description="The user's current level, e.g. beginner")],
+    timeline: Annotated[Optional[str], Field(description="Time available, e.g. 3 months")] = None
 ) -> Dict:
-    path = LEARNING_PATHS.get(goal, {}).get(current_level, [])
-    
-    return {
-        "learning_path": path,
-        "estimated_duration": sum(
-            int(item["duration"].split()[0]) for item in path
-        ),
-        "skill_level_target": "intermediate"
-    }
\ No newline at end of file
+    return path_planner.plan(goal, current_level, timeline)
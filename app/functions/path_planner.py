@@ -0,0 +1,149 @@
+# app/functions/path_planner.py
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from functools import lru_cache
+import heapq
+import re
+
+LEVELS = ("beginner", "intermediate", "advanced")
+
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(day|week|month|year)s?", re.IGNORECASE)
+WEEKS_PER_UNIT = {"day": 1 / 7, "week": 1.0, "month": 52 / 12, "year": 52.0}
+
+
+def parse_weeks(text: Optional[str]) -> Optional[int]:
+    # "8 weeks", "3 months", "1 year" -> whole weeks (rounded down); None if unreadable
+    match = DURATION_PATTERN.search(text or "")
+    if match is None:
+        return None
+    return int(float(match.group(1)) * WEEKS_PER_UNIT[match.group(2).lower()])
+
+
+def normalize_goal(goal: str) -> str:
+    return "_".join(re.findall(r"[a-z0-9]+", (goal or "").lower()))
+
+
+class LearningPathPlanner:
+    # Plans learning paths over a course prerequisite DAG. Everything that only
+    # depends on the catalog is computed when it is loaded: durations in weeks,
+    # and per goal the set of courses it needs (targets plus everything they
+    # reach through prerequisites) in topological order. Plans are memoized per
+    # (goal, level, weeks); update_course()/remove_course() reload and clear them.
+    def __init__(self, courses: Dict[str, Dict], goals: Dict[str, List[str]], memo_size: int = 1024):
+        self._memo_size = memo_size
+        self.load(courses, goals)
+
+    def load(self, courses: Dict[str, Dict], goals: Dict[str, List[str]]) -> None:
+        courses = {course_id: dict(course) for course_id, course in courses.items()}
+        for course_id, course in courses.items():
+            weeks = parse_weeks(course.get("duration"))
+            if weeks is None:
+                raise ValueError(f"Course {course_id} has an unreadable duration: {course.get('duration')!r}")
+            course["weeks"] = weeks
+            course["level_rank"] = LEVELS.index(course.get("level", "beginner"))
+            for prerequisite in course.get("prerequisites", ()):
+                if prerequisite not in courses:
+                    raise ValueError(f"Course {course_id} requires unknown course {prerequisite}")
+
+        order = self._topological_order(courses)
+        position = {course_id: index for index, course_id in enumerate(order)}
+        orders: Dict[str, Tuple[str, ...]] = {}
+        for goal, targets in goals.items():
+            required = self._reachable(courses, targets)
+            orders[goal] = tuple(sorted(required, key=position.__getitem__))
+
+        self._courses = courses
+        self._goals = {goal: list(targets) for goal, targets in goals.items()}
+        self._orders = orders
+        self._plan = lru_cache(maxsize=self._memo_size)(self._build_plan)
+
+    @staticmethod
+    def _topological_order(courses: Dict[str, Dict]) -> List[str]:
+        # Kahn's algorithm; among courses that are ready, lower levels and shorter
+        # courses go first, so plans start with the quick wins
+        dependents: Dict[str, List[str]] = {course_id: [] for course_id in courses}
+        waiting = {}
+        for course_id, course in courses.items():
+            waiting[course_id] = len(course.get("prerequisites", ()))
+            for prerequisite in course.get("prerequisites", ()):
+                dependents[prerequisite].append(course_id)
+
+        def rank(course_id: str) -> Tuple[int, int, str]:
+            return courses[course_id]["level_rank"], courses[course_id]["weeks"], course_id
+
+        ready = [rank(course_id) for course_id, count in waiting.items() if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            course_id = heapq.heappop(ready)[2]
+            order.append(course_id)
+            for dependent in dependents[course_id]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    heapq.heappush(ready, rank(dependent))
+        if len(order) != len(courses):
+            cycle = sorted(course_id for course_id, count in waiting.items() if count)
+            raise ValueError(f"Course prerequisites contain a cycle: {cycle}")
+        return order
+
+    @staticmethod
+    def _reachable(courses: Dict[str, Dict], targets: List[str]) -> FrozenSet[str]:
+        seen = set()
+        stack = [target for target in targets if target in courses]
+        while stack:
+            course_id = stack.pop()
+            if course_id not in seen:
+                seen.add(course_id)
+                stack.extend(courses[course_id].get("prerequisites", ()))
+        return frozenset(seen)
+
+    def update_course(self, course_id: str, course: Dict) -> None:
+        self.load({**self._courses, course_id: course}, self._goals)
+
+    def remove_course(self, course_id: str) -> None:
+        courses = {key: course for key, course in self._courses.items() if key != course_id}
+        for course in courses.values():
+            if course_id in course.get("prerequisites", ()):
+                course["prerequisites"] = [key for key in course["prerequisites"] if key != course_id]
+        self.load(courses, {goal: [key for key in targets if key != course_id] for goal, targets in self._goals.items()})
+
+    def set_goal(self, goal: str, targets: List[str]) -> None:
+        self.load(self._courses, {**self._goals, goal: targets})
+
+    def goals(self) -> List[str]:
+        return list(self._goals)
+
+    def plan(self, goal: str, current_level: str, timeline: Optional[str] = None) -> Dict[str, Any]:
+        # Timelines are keyed by whole weeks, so "3 months" and "13 weeks" share an
+        # entry. The result is the memoized object itself: don't modify it.
+        return self._plan(normalize_goal(goal), (current_level or "beginner").lower(), parse_weeks(timeline))
+
+    def _build_plan(self, goal: str, level: str, weeks: Optional[int]) -> Dict[str, Any]:
+        if goal not in self._orders:
+            return {"error": f"Unknown learning goal: {goal}", "available_goals": self.goals()}
+        level_rank = LEVELS.index(level) if level in LEVELS else 0
+        # Courses below the learner's level count as done
+        todo = [course_id for course_id in self._orders[goal] if self._courses[course_id]["level_rank"] >= level_rank]
+
+        # Topological order, so any prefix has its prerequisites; cut where the timeline runs out
+        path, deferred, total = [], [], 0
+        for course_id in todo:
+            course = self._courses[course_id]
+            if deferred or (weeks is not None and total + course["weeks"] > weeks):
+                deferred.append(course_id)
+            else:
+                path.append(course_id)
+                total += course["weeks"]
+
+        def entry(course_id: str) -> Dict[str, Any]:
+            course = self._courses[course_id]
+            return {"course_id": course_id, "title": course["title"], "duration": course["duration"]}
+
+        targets = [self._courses[course_id] for course_id in self._goals[goal] if course_id in self._courses]
+        return {
+            "learning_path": [entry(course_id) for course_id in path],
+            "estimated_duration": total,
+            "timeline_weeks": weeks,
+            "fits_timeline": not deferred,
+            "deferred": [entry(course_id) for course_id in deferred],
+            "skill_level_target": LEVELS[max((course["level_rank"] for course in targets), default=level_rank)],
+        }
@@ -0,0 +1,272 @@
+# app/functions/platform.py
+from typing import Annotated, Dict, Optional
+import uuid
+import httpx
+from pydantic import Field
+from ..config import settings
+from ..core.cache import AsyncTTLCache, cached
+from ..core.http_clients import http_clients
+from ..core.job_queue import RetryableJobError, job_queue
+from ..core.log import get_logger
+from ..core.projection import Projection
+from ..core.rate_limit import parse_retry_after
+from ..core.tool_registry import registry
+from .slug_index import SlugLookup, course_slugs, slug_lookups
+
+logger = get_logger(__name__)
+
+def extract_course_name(query: str) -> str:
+    # List of common phrases that might precede a course name
+    prefixes = [
+        "tell me about the course",
+        "information on the course",
+        "details about",
+        "what is",
+        "course called",
+        "course named",
+        "course titled",
+        "about the",
+        "show me",
+        "find",
+    ]
+    
+    lower_query = query.lower()
+    
+    # First try to extract the course name after any prefix
+    course_name = lower_query
+    for prefix in prefixes:
+        if prefix in lower_query:
+            course_name = lower_query.split(prefix)[-1].strip()
+            break
+    
+    # Remove common words and clean up the text
+    words_to_remove = [
+        "course", "class", "program", "training",
+        "the", "a", "an", "about", "for", "in"
+    ]
+    
+    # Split into words and filter out unwanted words
+    words = course_name.split()
+    filtered_words = [
+        word.strip() for word in words 
+        if word not in words_to_remove
+    ]
+    
+    # Join the remaining words with a hyphen, without adding "-course" suffix
+    formatted_name = "-".join(filtered_words)
+    
+    return formatted_name
+
+def resolve_course(query: str) -> SlugLookup:
+    # Matches against the local index of real slugs; until it has loaded, the
+    # extracted name is used as a guess like before
+    course_name = extract_course_name(query)
+    lookup = course_slugs.lookup(course_name.replace("-", " "))
+    if lookup.status == "unindexed":
+        lookup.slug = course_name
+    return lookup
+
+def course_call_key(arguments: Dict) -> tuple:
+    # Shortlists and misses have no slug, so the extracted name tells them apart
+    lookup = resolve_course(arguments["query"])
+    return lookup.status, lookup.slug or extract_course_name(arguments["query"])
+
+# Course and Euron lookups are cached; only 404s are negatively cached
+course_cache = AsyncTTLCache(
+    "courses",
+    max_entries=settings.TOOL_CACHE_MAX_ENTRIES,
+    default_ttl=settings.COURSE_CACHE_TTL
+)
+euron_cache = AsyncTTLCache(
+    "euron",
+    max_entries=settings.TOOL_CACHE_MAX_ENTRIES,
+    default_ttl=settings.EURON_CACHE_TTL
+)
+
+def lookup_ttl(default_ttl: float):
+    def ttl_for(result: Dict) -> Optional[float]:
+        if "error" not in result:
+            return default_ttl
+        if result.get("status_code") == 404:
+            return settings.NOT_FOUND_CACHE_TTL
+        return None  # Transient failures are never cached
+    return ttl_for
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+@cached(
+    course_cache,
+    key=lambda course_name: course_name,
+    ttl_for=lookup_ttl(settings.COURSE_CACHE_TTL)
+)
+async def fetch_course(course_name: str) -> Dict:
+    client = http_clients.get("euron")
+    try:
+        response = await client.get(f"/api/v1/courses/{course_name}")
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        logger.warning("HTTP error occurred", error=str(e))
+        return {"error": str(e), "status_code": e.response.status_code}
+    except Exception as e:
+        logger.error("An error occurred", error=str(e))
+        return {"error": "Failed to search platform courses"}
+
+def render_course_lookup(arguments: Dict, result: Dict) -> Optional[str]:
+    # Found courses need the model to describe them; failures and shortlists don't
+    if "matches" in result:
+        titles = "\n".join(f"- {match['title']}" for match in result["matches"])
+        return f"I found a few courses that could match \"{arguments['query']}\":\n{titles}\nWhich one did you mean?"
+    if "error" not in result:
+        return None
+    if result.get("status_code") == 404:
+        return (
+            f"I couldn't find a course matching \"{arguments['query']}\". Could you double-check "
+            "the name, or tell me a bit more about what you'd like to learn?"
+        )
+    return "Sorry, I can't look up courses right now. Please try again in a few minutes."
+
+@registry.tool(
+    name="search_courses",
+    description="Search for courses on the platform based on query",
+    keywords=["course", "learn", "study", "studies", "class", "program", "programming", "training"],
+    # The lookup only depends on the extracted course name, so the user's own
+    # message is usually as good a query as the one the model will come up with
+    prefetch=lambda message: {"query": message},
+    prefetch_key=course_call_key,
+    render=render_course_lookup,
+    # Enough for the model to describe the course; syllabus detail stays in the response
+    projection=Projection(
+        fields=["title", "name", "slug", "description", "level", "duration", "price", "rating", "instructor", "url", "modules", "matches"],
+        nested={
+            "modules": Projection(fields=["title", "name"], max_items=5),
+            "data": Projection(
+                fields=["title", "name", "slug", "description", "level", "duration", "price", "rating", "instructor", "url"],
+                max_text=400,
+            ),
+        },
+        max_text=400,
+    )
+)
+async def search_platform_courses(
+    query: Annotated[str, Field(description="Search query for courses")]
+) -> Dict:
+    lookup = resolve_course(query)
+    slug_lookups.inc((lookup.status,))
+    logger.debug("Searching for course", query=query, status=lookup.status, slug=lookup.slug)
+    if lookup.status == "no_match":
+        # Nothing in the catalog comes close, so Euron would only answer 404
+        return {"error": f"No course matches '{query}'", "status_code": 404}
+    if lookup.status == "shortlist":
+        return {"matches": [{"slug": slug, "title": title} for _, slug, title in lookup.matches]}
+    return await fetch_course(lookup.slug)
+
+@cached(
+    euron_cache,
+    key=normalize_query,
+    ttl_for=lookup_ttl(settings.EURON_CACHE_TTL)
+)
+async def fetch_euron(query: str) -> Dict:
+    client = http_clients.get("euron")
+    try:
+        response = await client.get("/", params={"query": query})
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        logger.warning("HTTP error occurred", error=str(e))
+        return {"error": str(e), "status_code": e.response.status_code}
+    except Exception as e:
+        logger.error("An error occurred", error=str(e))
+        return {"error": "Failed to query Euron API"}
+
+def render_euron_answer(arguments: Dict, result: Dict) -> Optional[str]:
+    if "error" not in result:
+        return None
+    return "Sorry, I can't get that information right now. Please try again in a few minutes."
+
+@registry.tool(
+    description="Query the Euron API for general information",
+    keywords=["euron", "cryptocurrency", "blockchain"],
+    render=render_euron_answer,
+    projection=Projection(max_text=1200, max_items=10)
+)
+async def query_euron(
+    query: Annotated[str, Field(description="The query about Euron")]
+) -> Dict:
+    return await fetch_euron(normalize_query(query))
+
+@job_queue.handler("freshdesk_ticket")
+async def create_freshdesk_ticket(data: Dict) -> Dict:
+    # Runs on an outbox worker; raising RetryableJobError schedules another attempt
+    client = http_clients.get("freshdesk")
+    try:
+        response = await client.post(
+            "/api/v2/tickets",
+            auth=(settings.FRESHDESK_API_KEY, 'X'),
+            json=data,
+            headers={"Content-Type": "application/json"}
+        )
+    except httpx.RequestError as e:
+        raise RetryableJobError(f"Freshdesk unreachable: {e}")
+
+    if response.status_code == 201:
+        ticket = response.json()
+        return {"ticket_id": ticket.get("id"), "ticket": ticket}
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RetryableJobError(
+            f"Freshdesk returned {response.status_code}",
+            parse_retry_after(response.headers.get("retry-after"))
+        )
+    # Anything else (validation, auth) won't succeed on a retry
+    raise ValueError(f"Failed to create ticket: {response.status_code} {response.text}")
+
+def render_complaint_receipt(arguments: Dict, result: Dict) -> Optional[str]:
+    if result.get("status") == "queued":
+        return (
+            f"Thank you, {arguments['name']}. I've passed your complaint on to our support team "
+            f"and a ticket will be created shortly. Your reference number is {result['tracking_id']}."
+        )
+    if result.get("status") == "error":
+        return "Sorry, I couldn't submit your complaint right now. Please try again in a few minutes."
+    return None
+
+@registry.tool(
+    description="Submit a user complaint or feedback to the support system",
+    keywords=["complaint", "issue", "problem", "feedback"],
+    read_only=False,
+    render=render_complaint_receipt
+)
+async def submit_complaint(
+    email: Annotated[str, Field(description="User's email address")],
+    name: Annotated[str, Field(description="User's full name")],
+    complaint: Annotated[str, Field(description="User's complaint or feedback details")]
+) -> Dict:
+    # The ticket goes into the durable outbox and is created in the background,
+    # so a slow or unavailable Freshdesk never holds up the chat
+    tracking_id = uuid.uuid4().hex
+    data = {
+        "description": complaint,
+        "subject": "Support Needed",
+        "email": email,
+        "name": name,
+        "priority": 1,
+        "status": 2,
+        # Lets support spot a duplicate if a retry follows a lost response
+        "tags": [f"tracking-{tracking_id}"]
+    }
+
+    try:
+        await job_queue.enqueue("freshdesk_ticket", data, job_id=tracking_id)
+    except Exception as e:
+        logger.exception("Error in submit_complaint")
+        return {
+            "status": "error",
+            "message": f"Failed to submit complaint: {str(e)}"
+        }
+
+    return {
+        "status": "queued",
+        "message": "Complaint received, a support ticket will be created shortly",
+        "tracking_id": tracking_id
+    }
@@ -1,17 +1,36 @@
-from typing import Dict
-from ..core.constants import USER_PROGRESS
+from typing import Annotated, Dict, Optional
+from pydantic import Field
+from ..core.progress_store import progress_store
+from ..core.tool_registry import registry
 
+def render_progress(arguments: Dict, result: Dict) -> Optional[str]:
+    # A handful of numbers: a template says it as well as the model would
+    if "error" in result:
+        return None
+    if not result.get("total_modules"):
+        return "I don't see any progress in this course yet. A good first step is to start the first module."
+    return (
+        f"You've completed {result['completion_percentage']}% of this course "
+        f"({result['modules_completed']} of {result['total_modules']} modules). "
+        f"Next up: {result['next_milestone']}."
+    )
+
+@registry.tool(
+    description="Get a user's progress in one of their enrolled courses",
+    keywords=["progress", "completed", "completion", "enrolled", "milestone"],
+    render=render_progress
+)
 async def get_course_progress(
-    course_id: str,
-    user_id: str
+    course_id: Annotated[str, Field(description="ID of the course")],
+    user_id: Annotated[str, Field(description="ID of the user")]
 ) -> Dict:
-    user_data = USER_PROGRESS.get(user_id, {})
-    course_progress = user_data.get(course_id, {
-        "completion_percentage": 0,
-        "modules_completed": 0,
-        "total_modules": 0,
-        "last_activity": None,
-        "next_milestone": "Start the course"
-    })
-    
+    course_progress = progress_store.get(user_id, course_id)
+    if course_progress is None:
+        return {
+            "completion_percentage": 0,
+            "modules_completed": 0,
+            "total_modules": 0,
+            "last_activity": None,
+            "next_milestone": "Start the course"
+        }
     return course_progress
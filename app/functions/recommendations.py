@@ -1,24 +1,43 @@
-from typing import List, Dict, Optional
+from typing import Annotated, Any, List, Dict, Optional, Tuple
+import numpy as np
+from pydantic import Field
+from ..config import settings
 from ..core.constants import COURSES
-import random
+from ..core.tool_registry import registry
+from ..core.projection import Projection
+from .course_search import COURSE_SUMMARY
+from .recommender import CourseRecommender
 
+# Built once at import; keep it in sync with catalog changes via add()/remove()
+recommender = CourseRecommender(
+    COURSES,
+    text_features=settings.RECOMMENDER_TEXT_FEATURES,
+    category_features=settings.RECOMMENDER_CATEGORY_FEATURES,
+    max_profiles=settings.RECOMMENDER_MAX_PROFILES,
+    profile_ttl=settings.RECOMMENDER_PROFILE_TTL
+)
+
+def user_vector(user_id: str, interests: Optional[List[str]], skill_level: Optional[str]) -> Tuple[Optional[np.ndarray], Any]:
+    # New interests update the user's stored profile; without any, the profile
+    # from earlier calls is used, and without that the best-rated courses
+    if interests or skill_level:
+        vector = recommender.update_profile(user_id, recommender.interest_vector(interests or [], skill_level))
+        return vector, interests or [skill_level]
+    vector = recommender.profile(user_id)
+    return vector, "profile" if vector is not None else "general"
+
+@registry.tool(
+    description="Recommend courses for a user based on their interests",
+    keywords=["recommend", "recommendation", "suggest", "suggestion"],
+    projection=Projection(nested={"recommendations": COURSE_SUMMARY})
+)
 async def get_recommendations(
-    user_id: str,
-    interests: Optional[List[str]] = None
+    user_id: Annotated[str, Field(description="ID of the user")],
+    interests: Annotated[Optional[List[str]], Field(description="Topics or course categories the user is interested in")] = None,
+    skill_level: Annotated[Optional[str], Field(description="Beginner, Intermediate or Advanced")] = None
 ) -> Dict:
-    # Simple recommendation logic based on interests
-    recommended_courses = [
-        course for course in COURSES
-        if not interests or course["category"] in interests
-    ]
-    
-    # Randomly select up to 5 courses
-    recommended_courses = random.sample(
-        recommended_courses, 
-        min(5, len(recommended_courses))
-    )
-    
+    vector, based_on = user_vector(user_id, interests, skill_level)
     return {
-        "recommendations": recommended_courses,
-        "based_on": interests if interests else "general"
-    }
\ No newline at end of file
+        "recommendations": [course for _, course in recommender.recommend(vector, settings.RECOMMENDER_TOP_K)],
+        "based_on": based_on
+    }
@@ -0,0 +1,232 @@
+# app/functions/recommender.py
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import copy
+import math
+import weakref
+import zlib
+import numpy as np
+from ..core.cache import AsyncTTLCache
+from .course_index import tokenize
+
+LEVELS = ("beginner", "intermediate", "advanced")
+
+# Relative weight of each feature block in the dot product
+TEXT_WEIGHT = 1.0
+CATEGORY_WEIGHT = 0.8
+LEVEL_WEIGHT = 0.3
+# Added per rating point (out of 5), so ties and profile-less users go to the best-rated courses
+RATING_WEIGHT = 0.05
+
+# How much a new set of interests moves a user's stored vector
+PROFILE_LEARNING_RATE = 0.5
+
+# Users scored per matrix product in recommend_many, bounding the score matrix
+BATCH_USERS = 64
+
+
+def _bucket(token: str, size: int) -> int:
+    # crc32 rather than hash(): stable across processes
+    return zlib.crc32(token.encode()) % size
+
+
+class CourseRecommender:
+    # Content-based recommender over a dense NumPy feature matrix, one row per course:
+    #   [hashed TF of title + description | hashed category one-hot | level one-hot]
+    # Text columns hold log-scaled term frequencies; IDF weights are applied to the
+    # user vector at query time, so adding or removing a course only touches its own
+    # row and the document frequencies. Top-k is one matrix-vector product plus
+    # argpartition. Rows live in slots reused after removal, like CourseIndex.
+    #
+    # The matrix is column-major: an interest vector only has a few dozen non-zero
+    # entries, so a single user's scores read just those columns, contiguously,
+    # instead of streaming the whole matrix. Empty slots carry a rating of -inf,
+    # which keeps them out of every top-k without a mask.
+    #
+    # User profiles live in an LRU with a TTL, so the number of distinct users
+    # seen doesn't grow memory without bound.
+    def __init__(
+        self,
+        courses: Iterable[Dict] = (),
+        text_features: int = 256,
+        category_features: int = 32,
+        capacity: int = 64,
+        max_profiles: int = 20000,
+        profile_ttl: float = 86400.0
+    ):
+        self.text_features = text_features
+        self.category_features = category_features
+        self._category_offset = text_features
+        self._level_offset = text_features + category_features
+        self.dimensions = self._level_offset + len(LEVELS)
+
+        self._matrix = np.zeros((capacity, self.dimensions), dtype=np.float32, order="F")
+        self._ratings = np.full(capacity, -np.inf, dtype=np.float32)
+        self._document_frequency = np.zeros(text_features, dtype=np.float32)
+        self._courses: List[Optional[Dict]] = [None] * capacity
+        self._slots: Dict[str, int] = {}
+        self._free_slots: List[int] = []
+        self._rows = 0  # High-water mark of used slots
+        self._matrix_readers: "weakref.WeakSet[CourseRecommender]" = weakref.WeakSet()  # Live snapshots of the current matrix
+        self._profiles = AsyncTTLCache("recommender_profiles", max_profiles, profile_ttl)
+        for course in courses:
+            self.add(course)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    # Feature extraction
+
+    def _text_vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.text_features, dtype=np.float32)
+        counts: Dict[int, int] = {}
+        for token in tokenize(text):
+            column = _bucket(token, self.text_features)
+            counts[column] = counts.get(column, 0) + 1
+        for column, count in counts.items():
+            vector[column] = 1.0 + math.log(count)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _features(self, text: str, categories: Sequence[str], level: Optional[str]) -> np.ndarray:
+        row = np.zeros(self.dimensions, dtype=np.float32)
+        row[:self.text_features] = TEXT_WEIGHT * self._text_vector(text)
+        for category in categories:
+            row[self._category_offset + _bucket(category.strip().lower(), self.category_features)] = CATEGORY_WEIGHT
+        if level and level.lower() in LEVELS:
+            row[self._level_offset + LEVELS.index(level.lower())] = LEVEL_WEIGHT
+        return row
+
+    def _course_features(self, course: Dict) -> np.ndarray:
+        # The title goes in twice: title matches count more, as in CourseIndex
+        text = f"{course.get('title') or ''} {course.get('title') or ''} {course.get('description') or ''}"
+        categories = [course["category"]] if course.get("category") else []
+        return self._features(text, categories, course.get("skill_level"))
+
+    # Catalog updates
+
+    def _grow(self) -> None:
+        capacity = max(len(self._courses) * 2, 64)
+        matrix = np.zeros((capacity, self.dimensions), dtype=np.float32, order="F")
+        matrix[:self._rows] = self._matrix[:self._rows]
+        self._matrix = matrix
+        self._matrix_readers.clear()
+        self._ratings = np.concatenate([self._ratings, np.full(capacity - len(self._ratings), -np.inf, dtype=np.float32)])
+        self._courses.extend([None] * (capacity - len(self._courses)))
+
+    def _own_matrix(self) -> None:
+        # Copy-on-write: the first update while a snapshot is alive leaves the old
+        # matrix to it; once every snapshot is gone the matrix is updated in place
+        if self._matrix_readers:
+            self._matrix = self._matrix.copy(order="F")
+            self._matrix_readers.clear()
+
+    def add(self, course: Dict) -> None:
+        course_id = str(course["id"])
+        if course_id in self._slots:
+            self.remove(course_id)
+        self._own_matrix()
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            if self._rows == len(self._courses):
+                self._grow()
+            slot = self._rows
+            self._rows += 1
+
+        row = self._course_features(course)
+        self._matrix[slot] = row
+        self._ratings[slot] = float(course.get("rating") or 0.0)
+        self._courses[slot] = course
+        self._slots[course_id] = slot
+        self._document_frequency += row[:self.text_features] > 0
+
+    def remove(self, course_id: str) -> None:
+        slot = self._slots.pop(str(course_id), None)
+        if slot is None:
+            return
+        self._own_matrix()
+        self._document_frequency -= self._matrix[slot, :self.text_features] > 0
+        self._matrix[slot] = 0.0
+        self._ratings[slot] = -np.inf
+        self._courses[slot] = None
+        self._free_slots.append(slot)
+
+    # User vectors
+
+    def _idf(self) -> np.ndarray:
+        return np.log((1.0 + len(self._slots)) / (1.0 + self._document_frequency)) + 1.0
+
+    def interest_vector(self, interests: Sequence[str] = (), skill_level: Optional[str] = None) -> np.ndarray:
+        # Interests count both as free text and as categories
+        return self._features(" ".join(interests), interests, skill_level)
+
+    def profile(self, user_id: str) -> Optional[np.ndarray]:
+        return self._profiles.get(user_id)
+
+    def update_profile(self, user_id: str, vector: np.ndarray) -> np.ndarray:
+        # Moves the user's stored interests towards the latest ones
+        previous = self._profiles.get(user_id)
+        profile = vector if previous is None else (1 - PROFILE_LEARNING_RATE) * previous + PROFILE_LEARNING_RATE * vector
+        self._profiles.set(user_id, profile)
+        return profile
+
+    def snapshot(self) -> "CourseRecommender":
+        # Read-only view of the catalog as it is now, for scoring off the event
+        # loop while updates go on. Only the small per-course arrays are copied;
+        # the matrix is copied by the next update made while the snapshot lives.
+        snapshot = copy.copy(self)
+        snapshot._ratings = self._ratings.copy()
+        snapshot._document_frequency = self._document_frequency.copy()
+        snapshot._courses = list(self._courses)
+        snapshot._slots = dict(self._slots)
+        snapshot._matrix_readers = weakref.WeakSet()
+        self._matrix_readers.add(snapshot)
+        return snapshot
+
+    # Scoring
+
+    def _weighted(self, vectors: np.ndarray) -> np.ndarray:
+        weighted = np.array(vectors, dtype=np.float32, copy=True)
+        weighted[..., :self.text_features] *= self._idf()
+        return weighted
+
+    def _top_k(self, scores: np.ndarray, k: int) -> List[Tuple[float, Dict]]:
+        k = min(k, len(self._slots))
+        if k <= 0:
+            return []
+        top = np.argpartition(scores, len(scores) - k)[-k:]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[slot]), self._courses[slot]) for slot in top]
+
+    def recommend(self, vector: Optional[np.ndarray], k: int = 5) -> List[Tuple[float, Dict]]:
+        # Without a vector, courses are ranked by rating alone
+        scores = RATING_WEIGHT * self._ratings[:self._rows]
+        if vector is not None:
+            weighted = self._weighted(vector)
+            columns = np.flatnonzero(weighted)
+            scores += self._matrix[:self._rows, columns] @ weighted[columns]
+        return self._top_k(scores, k)
+
+    def recommend_many(self, vectors: Sequence[Optional[np.ndarray]], k: int = 5) -> List[List[Tuple[float, Dict]]]:
+        # Scores BATCH_USERS users per matrix product, over the columns any of them use
+        k = min(k, len(self._slots))
+        if k <= 0:
+            return [[] for _ in vectors]
+        zeros = np.zeros(self.dimensions, dtype=np.float32)
+        prior = RATING_WEIGHT * self._ratings[:self._rows]
+        results = []
+        for start in range(0, len(vectors), BATCH_USERS):
+            batch = self._weighted(np.stack([zeros if vector is None else vector for vector in vectors[start:start + BATCH_USERS]]))
+            columns = np.flatnonzero(batch.any(axis=0))
+            # (users x columns) @ (columns x courses): one contiguous row of scores per user
+            scores = batch[:, columns] @ self._matrix[:self._rows, columns].T + prior
+            top = np.argpartition(scores, scores.shape[1] - k, axis=1)[:, -k:]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            results.extend(
+                [(float(score), self._courses[slot]) for score, slot in zip(row_scores, row)]
+                for row_scores, row in zip(top_scores.tolist(), top.tolist())
+            )
+        return results
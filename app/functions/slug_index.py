@@ -0,0 +1,222 @@
+# app/functions/slug_index.py
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import asyncio
+import re
+import time
+from ..config import settings
+from ..core.http_clients import http_clients
+from ..core.log import get_logger
+from ..core.metrics import metrics
+
+logger = get_logger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Entries added per event-loop turn when a full refresh builds a new index
+BUILD_CHUNK = 256
+
+slug_lookups = metrics.counter(
+    "course_slug_lookups_total", "Course name lookups against the local slug index", ("outcome",)
+)
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    # pg_trgm style: each word padded with two spaces in front and one behind
+    grams = set()
+    for word in WORD_PATTERN.findall((text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@dataclass
+class SlugLookup:
+    status: str  # "resolved", "shortlist", "no_match" or "unindexed"
+    slug: Optional[str] = None
+    # (score, slug, title), best first
+    matches: List[Tuple[float, str, str]] = field(default_factory=list)
+
+
+class CourseSlugIndex:
+    # Trigram index over the valid course slugs and their titles. A candidate's
+    # score blends Dice similarity with how much of the query it contains, so
+    # "blockchain" still lands on "Blockchain Fundamentals".
+    def __init__(self, courses: Iterable[Tuple[str, str]] = ()):
+        self._titles: Dict[str, str] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        for slug, title in courses:
+            self.put(slug, title)
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._titles
+
+    def put(self, slug: str, title: Optional[str]) -> None:
+        if slug in self._titles:
+            self.remove(slug)
+        title = title or slug.replace("-", " ")
+        grams = trigrams(f"{title} {slug}")
+        self._titles[slug] = title
+        self._grams[slug] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(slug)
+
+    def remove(self, slug: str) -> None:
+        self._titles.pop(slug, None)
+        for gram in self._grams.pop(slug, ()):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(slug)
+                if not postings:
+                    del self._postings[gram]
+
+    def match(self, text: str, limit: int = 5, min_score: float = 0.0) -> List[Tuple[float, str, str]]:
+        query = trigrams(text)
+        if not query:
+            return []
+        shared: Dict[str, int] = {}
+        for gram in query:
+            for slug in self._postings.get(gram, ()):
+                shared[slug] = shared.get(slug, 0) + 1
+
+        scored = []
+        for slug, count in shared.items():
+            dice = 2 * count / (len(query) + len(self._grams[slug]))
+            score = (dice + count / len(query)) / 2
+            if score >= min_score:
+                scored.append((round(score, 3), slug, self._titles[slug]))
+        scored.sort(key=lambda match: (-match[0], match[1]))
+        return scored[:limit]
+
+
+def _parse_courses(payload: Any) -> Tuple[List[Dict], Optional[Any]]:
+    # The listing is either a bare list or {"courses"/"data": [...], "next_page": ...}
+    if isinstance(payload, list):
+        return payload, None
+    courses = payload.get("courses") or payload.get("data") or []
+    return courses, payload.get("next_page")
+
+
+class CourseSlugCatalog:
+    # Keeps a CourseSlugIndex in sync with Euron's course listing. The first load
+    # and the periodic full refresh build a new index a chunk at a time and swap
+    # it in; the refreshes in between only fetch courses changed since the last
+    # one and patch the live index, so lookups never wait on a refresh.
+    def __init__(self):
+        self.index: Optional[CourseSlugIndex] = None
+        self.refreshed_at: Optional[float] = None
+        self.refreshes = 0
+        self.failures = 0
+        self._cursor: Optional[str] = None
+        self._full_refresh_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _fetch(self, updated_since: Optional[str]) -> List[Dict]:
+        client = http_clients.get("euron")
+        courses: List[Dict] = []
+        page: Optional[Any] = 1
+        while page is not None:
+            params = {"page": page, "per_page": settings.COURSE_SLUG_PAGE_SIZE}
+            if updated_since:
+                params["updated_since"] = updated_since
+            response = await client.get("/api/v1/courses", params=params)
+            response.raise_for_status()
+            batch, page = _parse_courses(response.json())
+            courses.extend(batch)
+        return courses
+
+    def _advance_cursor(self, courses: List[Dict], started: str) -> None:
+        # Prefer the server's own timestamps, so clock skew can't skip changes
+        # (a quiet interval keeps the old cursor)
+        stamps = [course["updated_at"] for course in courses if course.get("updated_at")]
+        if self._cursor is not None:
+            stamps.append(self._cursor)
+        self._cursor = max(stamps) if stamps else started
+
+    @staticmethod
+    def _apply(index: CourseSlugIndex, course: Dict) -> None:
+        slug = course.get("slug")
+        if not slug:
+            return
+        if course.get("deleted") or course.get("is_active") is False:
+            index.remove(slug)
+        else:
+            index.put(slug, course.get("title") or course.get("name"))
+
+    async def refresh(self, full: bool = False) -> None:
+        started = datetime.now(timezone.utc).isoformat()
+        full = full or self.index is None or time.monotonic() >= self._full_refresh_at
+        courses = await self._fetch(None if full else self._cursor)
+        if full:
+            index = CourseSlugIndex()
+            for position, course in enumerate(courses, 1):
+                self._apply(index, course)
+                if position % BUILD_CHUNK == 0:
+                    await asyncio.sleep(0)
+            self.index = index
+            self._full_refresh_at = time.monotonic() + settings.COURSE_SLUG_FULL_REFRESH_INTERVAL
+        else:
+            for course in courses:
+                self._apply(self.index, course)
+        self._advance_cursor(courses, started)
+        self.refreshes += 1
+        self.refreshed_at = time.time()
+        logger.info("Course slug index refreshed", full=full, changed=len(courses), entries=len(self.index))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                delay = settings.COURSE_SLUG_REFRESH_INTERVAL
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning("Course slug index refresh failed", error=str(e))
+                # Retry sooner while there is no index at all
+                delay = settings.COURSE_SLUG_REFRESH_INTERVAL if self.index is not None else settings.COURSE_SLUG_RETRY_DELAY
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        if settings.COURSE_SLUG_INDEX_ENABLED and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def lookup(self, text: str) -> SlugLookup:
+        # Resolves free text to a known slug, a shortlist to pick from, or nothing.
+        # "unindexed" means the listing hasn't loaded yet and the caller has to guess.
+        if self.index is None:
+            outcome = SlugLookup("unindexed")
+        else:
+            matches = self.index.match(text, settings.COURSE_SLUG_SHORTLIST, settings.COURSE_SLUG_MIN_SCORE)
+            if not matches:
+                outcome = SlugLookup("no_match")
+            elif matches[0][0] >= settings.COURSE_SLUG_ACCEPT_SCORE and (
+                len(matches) == 1 or matches[0][0] - matches[1][0] >= settings.COURSE_SLUG_MARGIN
+            ):
+                outcome = SlugLookup("resolved", matches[0][1], matches)
+            else:
+                outcome = SlugLookup("shortlist", None, matches)
+        return outcome
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.index) if self.index is not None else 0,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "refreshed_at": self.refreshed_at,
+            "cursor": self._cursor,
+        }
+
+
+course_slugs = CourseSlugCatalog()
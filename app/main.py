@@ -1,21 +1,86 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Optional
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from typing import List, Dict, Optional, AsyncIterator, Set
+from pydantic import BaseModel, Field
 import json
-import httpx
+import math
 import asyncio
+import inspect
 import os
+import uuid
 # from app.config import SWARM_SETTINGS, OPENAI_SWARM_API_KEY
 from app.config import Settings
 settings = Settings()
 from swarm import Swarm
 
-from .core.security import verify_api_key
-from .core.groq_client import chat_with_groq
+from .core.security import api_key_valid, verify_api_key
+from .core.groq_client import chat_with_groq, cached_chat_with_groq, stream_chat_with_groq, groq_admission
+from .core.completion_cache import completion_cache
+from .core.llm_backends import BackendAPIError, llm_pool
+from .core.rate_limit import UpstreamOverloaded
+from .core.http_clients import http_clients
+from .core.log import configure_logging, shutdown_logging, get_logger, RequestIdMiddleware
+from .core.tool_executor import execute_tool_calls
+from .core.prefetch import Prefetch, tool_prefetcher
+from .core.projection import tool_message_content
+from .core.context import compact_messages
+from .core.fast_path import render_tool_results
+from .core.cache import cache_stats
+from .core.loop_monitor import loop_monitor
+from .core.metrics import MetricsMiddleware, metrics, span
+from .core.intent_router import IntentRouter
+from .core.tool_registry import registry, ToolSet
+from .core.sessions import create_session_store
+from .core.database import close_database
+from .core.job_queue import JobQueue, job_queue
+from .core.chat_batch import run_batch
+from .core.progress_store import MAX_MODULES, progress_store
+from . import functions  # noqa: F401  (registers the tools)
+from .functions.slug_index import course_slugs
+from .functions.recommendations import recommender, user_vector
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    # Open pooled upstream clients once and pre-warm their connections
+    await http_clients.startup()
+    loop_monitor.start()
+    await job_queue.start()
+    await batch_jobs.start()
+    await progress_store.start()
+    course_slugs.start()
+    yield
+    # In order, each on its own: one failing step mustn't leave the rest open
+    for step in (
+        course_slugs.stop,
+        progress_store.stop,
+        batch_jobs.stop,
+        job_queue.stop,
+        loop_monitor.stop,
+        http_clients.shutdown,
+        close_database,
+        completion_cache.drain,
+        completion_cache.close,
+    ):
+        try:
+            result = step()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception("Error during shutdown", step=step.__qualname__)
+    shutdown_logging()
+
+logger = get_logger(__name__)
+
+session_store = create_session_store()
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,198 +98,9 @@ class Message(BaseModel):
     name: Optional[str] = None
 
 class ChatRequest(BaseModel):
-    messages: List[Message]
+    messages: List[Message] = Field(..., min_length=1)
     tools: Optional[List[Dict]] = None
 
-# Updated tools definition according to Groq's format
-EDTECH_TOOLS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "search_courses",
-            "description": "Search for courses on the platform based on query",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Search query for courses"
-                    }
-                },
-                "required": ["query"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "submit_complaint",
-            "description": "Submit a user complaint or feedback to the support system",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "email": {
-                        "type": "string",
-                        "description": "User's email address"
-                    },
-                    "name": {
-                        "type": "string",
-                        "description": "User's full name"
-                    },
-                    "complaint": {
-                        "type": "string",
-                        "description": "User's complaint or feedback details"
-                    }
-                },
-                "required": ["email", "name", "complaint"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "query_euron",
-            "description": "Query the Euron API for general information",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "The query about Euron"
-                    }
-                },
-                "required": ["query"]
-            }
-        }
-    }
-]
-
-def extract_course_name(query: str) -> str:
-    # List of common phrases that might precede a course name
-    prefixes = [
-        "tell me about the course",
-        "information on the course",
-        "details about",
-        "what is",
-        "course called",
-        "course named",
-        "course titled",
-        "about the",
-        "show me",
-        "find",
-    ]
-    
-    lower_query = query.lower()
-    
-    # First try to extract the course name after any prefix
-    course_name = lower_query
-    for prefix in prefixes:
-        if prefix in lower_query:
-            course_name = lower_query.split(prefix)[-1].strip()
-            break
-    
-    # Remove common words and clean up the text
-    words_to_remove = [
-        "course", "class", "program", "training",
-        "the", "a", "an", "about", "for", "in"
-    ]
-    
-    # Split into words and filter out unwanted words
-    words = course_name.split()
-    filtered_words = [
-        word.strip() for word in words 
-        if word not in words_to_remove
-    ]
-    
-    # Join the remaining words with a hyphen, without adding "-course" suffix
-    formatted_name = "-".join(filtered_words)
-    
-    return formatted_name
-
-async def search_platform_courses(query: str) -> Dict:
-    async with httpx.AsyncClient() as client:
-        try:
-            # Extract and format course name
-            course_name = extract_course_name(query)
-            print(f"Searching for course: {course_name}")  # Debug print
-            
-            response = await client.get(
-                f"https://dev-api.euron.one/api/v1/courses/{course_name}"
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            print(f"HTTP error occurred: {e}")
-            return {"error": str(e)}
-        except Exception as e:
-            print(f"An error occurred: {e}")
-            return {"error": "Failed to search platform courses"}
-
-async def query_euron(query: str) -> Dict:
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"https://dev-api.euron.one/",
-                params={"query": query}
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            print(f"HTTP error occurred: {e}")
-            return {"error": str(e)}
-        except Exception as e:
-            print(f"An error occurred: {e}")
-            return {"error": "Failed to query Euron API"}
-
-async def submit_complaint(email: str, name: str, complaint: str) -> Dict:
-    import httpx  # Use httpx for async HTTP requests
-
-    # Your Freshdesk domain and API key from settings
-    domain = settings.FRESHDESK_DOMAIN
-    api_key = settings.FRESHDESK_API_KEY
-
-    # Ticket data
-    data = {
-        "description": complaint,
-        "subject": "Support Needed",
-        "email": email,
-        "priority": 1,
-        "status": 2
-    }
-
-    # URL and headers
-    url = f"https://aicompany.freshdesk.com/api/v2/tickets"
-    headers = {"Content-Type": "application/json"}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                auth=(api_key, 'X'),
-                json=data,
-                headers=headers
-            )
-
-        if response.status_code == 201:
-            return {
-                "status": "success",
-                "message": "Ticket created successfully",
-                "ticket": response.json()
-            }
-        else:
-            return {
-                "status": "error",
-                "message": f"Failed to create ticket: {response.status_code}",
-                "details": response.json()
-            }
-
-    except Exception as e:
-        print(f"Error in submit_complaint: {str(e)}")
-        return {
-            "status": "error",
-            "message": f"Failed to submit complaint: {str(e)}"
-        }
-
 async def main():
     swarm = Swarm(api_key=settings.OPENAI_SWARM_API_KEY, **settings.SWARM_SETTINGS)
     # ... existing initialization ...
@@ -241,116 +117,615 @@ async def main():
 if __name__ == "__main__":
     asyncio.run(main())
 
+def build_groq_messages(messages: List[Message]) -> List[Dict]:
+    # Format messages properly based on role
+    groq_messages = []
+    for msg in messages:
+        message_dict = {"role": msg.role, "content": msg.content}
+        
+        # Only include tool-related fields if they exist and for appropriate roles
+        if msg.role == "tool" and msg.tool_call_id:
+            message_dict["tool_call_id"] = msg.tool_call_id
+            if msg.name:
+                message_dict["name"] = msg.name
+        
+        groq_messages.append(message_dict)
+    return groq_messages
+
+# Built once at startup from the registered tools' keywords
+intent_router = IntentRouter(registry.intents())
+
+def select_tools(latest_message: str) -> ToolSet:
+    # Only the relevant tool schemas are sent, so chit-chat carries none
+    return registry.toolset(intent_router.route(latest_message))
+
+async def run_tool_calls(
+    tool_calls: List[Dict],
+    groq_messages: List[Dict],
+    prefetched: Optional[Prefetch] = None
+) -> List[Dict]:
+    # The tool results must follow the assistant turn that requested them
+    groq_messages.append({
+        "role": "assistant",
+        "content": None,
+        "tool_calls": tool_calls
+    })
+
+    results = await execute_tool_calls(tool_calls, registry, prefetched)
+    for outcome in results:
+        groq_messages.append({
+            "role": "tool",
+            "tool_call_id": outcome["tool_call_id"],
+            "name": outcome["name"],
+            # The model gets the projected view, the response keeps the full result
+            "content": tool_message_content(outcome["name"], outcome["result"], registry)
+        })
+    return results
+
+async def run_chat_turn(groq_messages: List[Dict]) -> Dict:
+    # Runs one user turn to completion. The assistant/tool messages it produces,
+    # including the final reply, are appended to `groq_messages`.
+    user_message = groq_messages[-1].get("content") or ""
+    with span("route"):
+        tools = select_tools(user_message)
+    results = None
+    
+    if tools:
+        logger.info("Using tools for message", tools=sorted(tools.names))
+    
+    # The likely lookup runs while the model decides whether it wants it
+    prefetched = tool_prefetcher.start(user_message, tools)
+    try:
+        with span("llm.first"):
+            response = await cached_chat_with_groq(
+                messages=groq_messages,
+                functions=tools or None
+            )
+        
+        assistant_message = response["choices"][0]["message"]
+        logger.payload("Assistant message", assistant_message)
+        
+        if tools and assistant_message.get("tool_calls"):
+            with span("tools"):
+                results = await run_tool_calls(
+                    assistant_message["tool_calls"],
+                    groq_messages,
+                    prefetched
+                )
+            
+            # Simple outcomes (errors, confirmations) are answered from templates
+            reply = render_tool_results(results, registry)
+            if reply is not None:
+                assistant_message = {"role": "assistant", "content": reply}
+            else:
+                with span("llm.final"):
+                    final_response = await cached_chat_with_groq(messages=groq_messages)
+                assistant_message = final_response["choices"][0]["message"]
+    finally:
+        tool_prefetcher.finish(prefetched)
+    
+    groq_messages.append({"role": "assistant", "content": assistant_message["content"]})
+    return {
+        "response": assistant_message["content"],
+        "tool_calls": results
+    }
+
+def upstream_unavailable(e: Exception) -> Optional[HTTPException]:
+    # Overload and upstream rate limiting become a fast 503 with a retry hint
+    if isinstance(e, UpstreamOverloaded):
+        retry_after = e.retry_after
+    elif isinstance(e, BackendAPIError) and e.status_code in (429, 503):
+        retry_after = e.retry_after or settings.GROQ_RETRY_MAX_DELAY
+    else:
+        return None
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
 @app.post("/chat")
 async def chat_endpoint(
     request: ChatRequest,
     api_key: str = Depends(verify_api_key)
 ):
     try:
-        # Format messages properly based on role
-        groq_messages = []
-        for msg in request.messages:
-            message_dict = {"role": msg.role, "content": msg.content}
-            
-            # Only include tool-related fields if they exist and for appropriate roles
-            if msg.role == "tool" and msg.tool_call_id:
-                message_dict["tool_call_id"] = msg.tool_call_id
-                if msg.name:
-                    message_dict["name"] = msg.name
-            
-            groq_messages.append(message_dict)
-        
-        latest_message = request.messages[-1].content.lower()
-        
-        # Keywords for routing
-        course_keywords = ["course", "learn", "study", "class", "program", "training"]
-        complaint_keywords = ["complaint", "issue", "problem", "feedback"]
-        euron_keywords = ["euron", "cryptocurrency", "blockchain"]
+        groq_messages = build_groq_messages(request.messages)
+        return await run_chat_turn(groq_messages)
+
+    except Exception as e:
+        unavailable = upstream_unavailable(e)
+        if unavailable is not None:
+            logger.warning("Language model unavailable", error=str(e))
+            raise unavailable
+        logger.exception("Error in chat_endpoint")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def sse_event(data: Dict) -> str:
+    return f"data: {json.dumps(data)}\n\n"
+
+async def stream_completion(
+    groq_messages: List[Dict],
+    functions: Optional[List[Dict]] = None
+) -> AsyncIterator[Dict]:
+    # Relays content deltas as they arrive and buffers tool_call fragments
+    # (they are split across chunks by index) until the turn is complete
+    tool_calls: Dict[int, Dict] = {}
+    async for chunk in stream_chat_with_groq(groq_messages, functions):
+        if not chunk.get("choices"):
+            continue
+        delta = chunk["choices"][0].get("delta") or {}
         
-        # Check if we need to use tools
-        needs_tools = any(
-            keyword in latest_message 
-            for keywords in [course_keywords, complaint_keywords, euron_keywords] 
-            for keyword in keywords
-        )
+        if delta.get("content"):
+            yield {"type": "delta", "content": delta["content"]}
         
-        if needs_tools:
-            print(f"Using tools for message: {latest_message}")
-            
-            response = await chat_with_groq(
-                messages=groq_messages,
-                functions=EDTECH_TOOLS
-            )
-            
-            assistant_message = response["choices"][0]["message"]
-            print(f"Assistant message: {json.dumps(assistant_message, indent=2)}")
-            
-            if "tool_calls" in assistant_message:
-                tool_calls = assistant_message["tool_calls"]
-                results = []
-                
-                for tool_call in tool_calls:
-                    function_name = tool_call["function"]["name"]
-                    arguments = json.loads(tool_call["function"]["arguments"])
-                    
-                    print(f"Executing function: {function_name}")
-                    print(f"With arguments: {arguments}")
-                    
-                    if function_name == "search_courses":
-                        result = await search_platform_courses(
-                            query=arguments.get("query", "")
-                        )
-                    elif function_name == "submit_complaint":
-                        result = await submit_complaint(
-                            email=arguments.get("email"),
-                            name=arguments.get("name"),
-                            complaint=arguments.get("complaint")
-                        )
-                    elif function_name == "query_euron":
-                        result = await query_euron(
-                            query=arguments.get("query")
-                        )
-                    else:
-                        print(f"Unknown function called: {function_name}")
-                        raise ValueError(f"Unknown function: {function_name}")
-                    
-                    print(f"Function result: {result}")
-                    
-                    groq_messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call["id"],
-                        "name": function_name,
-                        "content": json.dumps(result)
-                    })
-                    
-                    results.append({
-                        "tool_call_id": tool_call["id"],
-                        "name": function_name,
-                        "arguments": arguments,
-                        "result": result
-                    })
-                
-                final_response = await chat_with_groq(messages=groq_messages)
-                return {
-                    "response": final_response["choices"][0]["message"]["content"],
-                    "tool_calls": results
-                }
-            
+        for fragment in delta.get("tool_calls") or []:
+            buffered = tool_calls.setdefault(fragment.get("index", 0), {
+                "id": None,
+                "type": "function",
+                "function": {"name": "", "arguments": ""}
+            })
+            if fragment.get("id"):
+                buffered["id"] = fragment["id"]
+            function = fragment.get("function") or {}
+            buffered["function"]["name"] += function.get("name") or ""
+            buffered["function"]["arguments"] += function.get("arguments") or ""
+
+    if tool_calls:
+        calls = [tool_calls[index] for index in sorted(tool_calls)]
+        for call in calls:
+            if not call["id"]:
+                call["id"] = f"call_{hash(call['function']['name'])}"
+        yield {"type": "tool_calls", "tool_calls": calls}
+
+async def chat_event_stream(groq_messages: List[Dict], tools: List[Dict]) -> AsyncIterator[Dict]:
+    tool_calls = None
+    prefetched = tool_prefetcher.start(groq_messages[-1].get("content") or "", tools)
+    try:
+        async for event in stream_completion(groq_messages, functions=tools):
+            if event["type"] == "tool_calls":
+                tool_calls = event["tool_calls"]
+            else:
+                yield event
+
+        if tool_calls:
+            # Mid-stream tool turn: run the tools, then stream the final answer
+            results = await run_tool_calls(tool_calls, groq_messages, prefetched)
+            yield {"type": "tool_results", "tool_calls": results}
+            reply = render_tool_results(results, registry)
+            if reply is not None:
+                yield {"type": "delta", "content": reply}
+            else:
+                async for event in stream_completion(groq_messages):
+                    yield event
+    finally:
+        tool_prefetcher.finish(prefetched)
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(
+    request: ChatRequest,
+    api_key: str = Depends(verify_api_key)
+):
+    groq_messages = build_groq_messages(request.messages)
+    tools = select_tools(request.messages[-1].content)
+
+    async def event_source():
+        try:
+            async for event in chat_event_stream(groq_messages, tools):
+                yield sse_event(event)
+        except Exception as e:
+            unavailable = upstream_unavailable(e)
+            if unavailable is not None:
+                yield sse_event({
+                    "type": "error",
+                    "message": unavailable.detail,
+                    "retry_after": int(unavailable.headers["Retry-After"])
+                })
+            else:
+                logger.exception("Error in chat_stream_endpoint")
+                yield sse_event({"type": "error", "message": str(e)})
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+ws_turns = metrics.counter("ws_turns_total", "WebSocket chat turns by outcome", ("outcome",))
+ws_stats = {"open": 0, "opened": 0, "rejected": 0}
+
+class SocketConversation:
+    # Per-connection state: the history (compacted after every turn, so it stays
+    # under WS_HISTORY_MAX_TOKENS), the inbox of messages waiting for their turn
+    # and the turn in progress
+    __slots__ = ("websocket", "history", "inbox", "turn")
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.history: List[Dict] = []
+        self.inbox: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_MAX_PENDING_MESSAGES)
+        self.turn: Optional[asyncio.Task] = None
+
+    async def send(self, event: Dict) -> None:
+        # Waits for the socket to drain, which in turn stops reading the model's
+        # stream; a client that falls too far behind times out
+        await asyncio.wait_for(self.websocket.send_text(json.dumps(event)), settings.WS_SEND_TIMEOUT)
+
+    async def run_turn(self, content: str) -> None:
+        groq_messages = [*self.history, {"role": "user", "content": content}]
+        reply = []
+        try:
+            async for event in chat_event_stream(groq_messages, select_tools(content)):
+                if event["type"] == "delta":
+                    reply.append(event["content"])
+                await self.send(event)
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            ws_turns.inc(("error",))
+            unavailable = upstream_unavailable(e)
+            if unavailable is not None:
+                await self.send({
+                    "type": "error",
+                    "message": unavailable.detail,
+                    "retry_after": int(unavailable.headers["Retry-After"])
+                })
+            else:
+                logger.exception("Error in chat_websocket")
+                await self.send({"type": "error", "message": str(e)})
+            return
+        groq_messages.append({"role": "assistant", "content": "".join(reply)})
+        self.history = compact_messages(groq_messages, settings.WS_HISTORY_MAX_TOKENS)
+        ws_turns.inc(("ok",))
+        await self.send({"type": "done"})
+
+    async def cancel(self) -> None:
+        # Cancels the turn in progress. A message the processor hasn't picked up
+        # yet is taken back out of the inbox instead, so that turn never starts.
+        if self.turn is not None:
+            self.turn.cancel()
+        elif not self.inbox.empty():
+            self.inbox.get_nowait()
+            ws_turns.inc(("cancelled",))
+            await self.send({"type": "cancelled"})
+
+    async def process(self) -> None:
+        # One turn at a time, in arrival order
+        while True:
+            content = await self.inbox.get()
+            self.turn = asyncio.ensure_future(self.run_turn(content))
+            try:
+                await asyncio.wait([self.turn])
+                if self.turn.cancelled():
+                    ws_turns.inc(("cancelled",))
+                    await self.send({"type": "cancelled"})
+                elif isinstance(self.turn.exception(), asyncio.TimeoutError):
+                    await self.websocket.close(code=1008, reason="Client is not reading")
+                    return
+            finally:
+                if not self.turn.done():
+                    self.turn.cancel()
+                self.turn = None
+
+def parse_frame(raw: str) -> Dict:
+    # {"content": "..."}, {"type": "cancel"}, {"type": "reset"}, or plain text
+    try:
+        frame = json.loads(raw)
+    except ValueError:
+        return {"type": "message", "content": raw}
+    if not isinstance(frame, dict):
+        return {"type": "invalid"}
+    return {"type": frame.get("type", "message"), "content": frame.get("content")}
+
+@app.websocket("/chat/ws")
+async def chat_websocket(websocket: WebSocket):
+    # The key is checked once, at the handshake. Browsers can't set headers on a
+    # WebSocket, so it may also come as ?api_key=
+    if not api_key_valid(websocket.headers.get("x-api-key") or websocket.query_params.get("api_key")):
+        await websocket.close(code=1008)
+        return
+    if ws_stats["open"] >= settings.WS_MAX_CONNECTIONS:
+        ws_stats["rejected"] += 1
+        await websocket.close(code=1013)
+        return
+
+    await websocket.accept()
+    ws_stats["open"] += 1
+    ws_stats["opened"] += 1
+    conversation = SocketConversation(websocket)
+    processor = asyncio.ensure_future(conversation.process())
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive(), settings.WS_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                if conversation.turn is not None or not conversation.inbox.empty():
+                    continue
+                await websocket.close(code=1000, reason="Idle")
+                break
+            if message["type"] == "websocket.disconnect":
+                break
+            raw = message.get("text")
+            if raw is None:
+                await websocket.close(code=1003, reason="Expected text frames")
+                break
+            if len(raw.encode()) > settings.WS_MAX_MESSAGE_BYTES:
+                await websocket.close(code=1009, reason="Message too big")
+                break
+
+            frame = parse_frame(raw)
+            if frame["type"] == "cancel":
+                await conversation.cancel()
+            elif frame["type"] == "reset":
+                conversation.history = []
+                await conversation.send({"type": "reset"})
+            elif frame["type"] == "message" and isinstance(frame["content"], str) and frame["content"].strip():
+                # Refused once WS_MAX_PENDING_MESSAGES are waiting, rather than
+                # blocking the reader: a cancel must still get through
+                try:
+                    conversation.inbox.put_nowait(frame["content"])
+                except asyncio.QueueFull:
+                    await conversation.send({"type": "error", "message": "Too many messages waiting; cancel or wait for the reply"})
+            else:
+                await conversation.send({"type": "error", "message": "Expected {\"content\": \"...\"}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        processor.cancel()
+        await asyncio.gather(processor, return_exceptions=True)
+        ws_stats["open"] -= 1
+
+class ChatBatchRequest(BaseModel):
+    requests: List[ChatRequest]
+    concurrency: int = Field(default=settings.CHAT_BATCH_CONCURRENCY, ge=1, le=settings.CHAT_BATCH_MAX_CONCURRENCY)
+
+# Large batches run as background jobs, on their own queue so they never hold up ticket delivery
+batch_jobs = JobQueue(settings.CHAT_BATCH_JOBS_PATH, settings.CHAT_BATCH_JOB_WORKERS)
+
+def batch_key(request: ChatRequest) -> str:
+    # Identical conversations in one batch are answered once
+    return json.dumps(request.model_dump(exclude_none=True), sort_keys=True)
+
+async def run_batch_item(request: ChatRequest) -> Dict:
+    # One conversation of a batch, through the same pipeline as /chat; failures
+    # are reported in the item instead of failing the batch
+    try:
+        return {"status": 200, "response": await run_chat_turn(build_groq_messages(request.messages))}
+    except Exception as e:
+        unavailable = upstream_unavailable(e)
+        if unavailable is not None:
             return {
-                "response": assistant_message["content"],
-                "tool_calls": None
+                "status": 503,
+                "error": unavailable.detail,
+                "retry_after": int(unavailable.headers["Retry-After"])
             }
-            
-        else:
-            response = await chat_with_groq(messages=groq_messages)
-            return {
-                "response": response["choices"][0]["message"]["content"],
-                "tool_calls": None
+        logger.exception("Error in chat batch item")
+        return {"status": 500, "error": str(e)}
+
+def ndjson_line(data: Dict) -> str:
+    return json.dumps(data, default=str) + "\n"
+
+@app.post("/chat/batch")
+async def chat_batch_endpoint(
+    batch: ChatBatchRequest,
+    api_key: str = Depends(verify_api_key)
+):
+    # Streams one NDJSON line per conversation as soon as it finishes
+    if len(batch.requests) > settings.CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.CHAT_BATCH_MAX_ITEMS} conversations per batch; use /chat/batch/jobs"
+        )
+
+    async def lines():
+        async for index, outcome in run_batch(batch.requests, run_batch_item, batch_key, batch.concurrency):
+            yield ndjson_line({"index": index, **outcome})
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def batch_results_path(job_id: str) -> str:
+    return os.path.join(settings.CHAT_BATCH_RESULTS_DIR, f"{job_id}.ndjson")
+
+def read_finished_indexes(path: str) -> Set[int]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as file:
+        return {json.loads(line)["index"] for line in file if line.endswith("\n")}
+
+def truncate_partial_line(path: str) -> None:
+    # A line cut off by a crash would run into the next one appended
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as file:
+        content = file.read()
+        if content and not content.endswith(b"\n"):
+            file.truncate(content.rfind(b"\n") + 1)
+
+@batch_jobs.handler("chat_batch")
+async def chat_batch_job(payload: Dict) -> Dict:
+    # Appends results to the job's NDJSON file as they finish. A job interrupted
+    # by a restart picks up where it left off: finished indexes are skipped.
+    path = batch_results_path(payload["job_id"])
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    await asyncio.to_thread(truncate_partial_line, path)
+    finished = await asyncio.to_thread(read_finished_indexes, path)
+    requests = [ChatRequest.model_validate(request) for request in payload["requests"]]
+    remaining = [index for index in range(len(requests)) if index not in finished]
+
+    failed = 0
+    with open(path, "a", encoding="utf-8") as file:
+        async for position, outcome in run_batch(
+            [requests[index] for index in remaining],
+            run_batch_item,
+            batch_key,
+            payload["concurrency"]
+        ):
+            file.write(ndjson_line({"index": remaining[position], **outcome}))
+            file.flush()
+            failed += outcome["status"] != 200
+    return {"total": len(requests), "resumed_from": len(finished), "failed": failed}
+
+@app.post("/chat/batch/jobs", status_code=202)
+async def create_chat_batch_job(
+    batch: ChatBatchRequest,
+    api_key: str = Depends(verify_api_key)
+):
+    if len(batch.requests) > settings.CHAT_BATCH_JOB_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.CHAT_BATCH_JOB_MAX_ITEMS} conversations per job")
+    job_id = uuid.uuid4().hex
+    await batch_jobs.enqueue("chat_batch", {
+        "job_id": job_id,
+        "concurrency": batch.concurrency,
+        "requests": [request.model_dump(exclude_none=True) for request in batch.requests],
+    }, job_id=job_id)
+    return {"job_id": job_id, "status": "queued", "total": len(batch.requests)}
+
+@app.get("/chat/batch/jobs/{job_id}")
+async def chat_batch_job_status(job_id: str, api_key: str = Depends(verify_api_key)):
+    job = await batch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    finished = await asyncio.to_thread(read_finished_indexes, batch_results_path(job_id))
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "total": len(job["payload"]["requests"]),
+        "completed": len(finished),
+        "result": job["result"],
+        "error": job["error"] if job["status"] != "done" else None,
+    }
+
+@app.get("/chat/batch/jobs/{job_id}/results")
+async def chat_batch_job_results(job_id: str, api_key: str = Depends(verify_api_key)):
+    # Whatever has finished so far, in completion order
+    path = batch_results_path(job_id)
+    if not os.path.exists(path):
+        if await batch_jobs.get(job_id) is None:
+            raise HTTPException(status_code=404, detail="Batch job not found")
+        return PlainTextResponse("", media_type="application/x-ndjson")
+    return FileResponse(path, media_type="application/x-ndjson")
+
+class SessionMessage(BaseModel):
+    content: str
+
+def session_view(session: Dict) -> Dict:
+    return {
+        "session_id": session["_id"],
+        "messages": session["messages"],
+        "created_at": session["created_at"],
+        "expires_at": session["expires_at"],
+    }
+
+async def get_session_or_404(session_id: str) -> Dict:
+    session = await session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+@app.post("/sessions")
+async def create_session(api_key: str = Depends(verify_api_key)):
+    session = await session_store.create()
+    return {"session_id": session["_id"], "expires_at": session["expires_at"]}
+
+@app.get("/sessions/{session_id}")
+async def read_session(session_id: str, api_key: str = Depends(verify_api_key)):
+    return session_view(await get_session_or_404(session_id))
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str, api_key: str = Depends(verify_api_key)):
+    if not await session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"status": "deleted"}
+
+@app.post("/sessions/{session_id}/messages")
+async def session_chat_endpoint(
+    session_id: str,
+    message: SessionMessage,
+    api_key: str = Depends(verify_api_key)
+):
+    # Clients send only the new turn; the history is kept server-side
+    async with session_store.lock(session_id):
+        session = await get_session_or_404(session_id)
+        history = session["messages"]
+        groq_messages = [*history, {"role": "user", "content": message.content}]
+        try:
+            result = await run_chat_turn(groq_messages)
+        except Exception as e:
+            unavailable = upstream_unavailable(e)
+            if unavailable is not None:
+                raise unavailable
+            logger.exception("Error in session_chat_endpoint", session_id=session_id)
+            raise HTTPException(status_code=500, detail=str(e))
+        await session_store.append(session, groq_messages[len(history):])
+    return {"session_id": session_id, **result}
+
+class RecommendationQuery(BaseModel):
+    user_id: str
+    interests: Optional[List[str]] = None
+    skill_level: Optional[str] = None
+
+class RecommendationBatch(BaseModel):
+    users: List[RecommendationQuery] = Field(max_length=10000)
+    limit: int = Field(default=5, ge=1, le=50)
+
+@app.post("/recommendations/batch")
+async def recommendations_batch(batch: RecommendationBatch, api_key: str = Depends(verify_api_key)):
+    # Scores every user in one pass over the course matrix, off the event loop
+    # (on a snapshot, so catalog updates meanwhile don't race the scoring)
+    vectors = [user_vector(query.user_id, query.interests, query.skill_level) for query in batch.users]
+    ranked = await asyncio.to_thread(recommender.snapshot().recommend_many, [vector for vector, _ in vectors], batch.limit)
+    return {
+        "results": [
+            {
+                "user_id": query.user_id,
+                "based_on": based_on,
+                "recommendations": [{"score": round(score, 4), **course} for score, course in courses],
             }
+            for query, (_, based_on), courses in zip(batch.users, vectors, ranked)
+        ]
+    }
 
-    except Exception as e:
-        print(f"Error in chat_endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+class ProgressUpdate(BaseModel):
+    user_id: str
+    course_id: str
+    completion_percentage: Optional[int] = Field(default=None, ge=0, le=100)
+    modules_completed: Optional[int] = Field(default=None, ge=0, le=MAX_MODULES)
+    total_modules: Optional[int] = Field(default=None, ge=0, le=MAX_MODULES)
+    next_milestone: Optional[str] = None
+
+class ProgressBatch(BaseModel):
+    updates: List[ProgressUpdate] = Field(max_length=10000)
+
+@app.post("/progress")
+async def update_progress(batch: ProgressBatch, api_key: str = Depends(verify_api_key)):
+    # Applied in memory at once; written to the progress backend by the next flush
+    count = progress_store.update_many(update.model_dump(exclude_none=True) for update in batch.updates)
+    return {"status": "accepted", "updated": count}
+
+@app.get("/users/{user_id}/progress")
+async def user_progress(user_id: str, api_key: str = Depends(verify_api_key)):
+    return {"user_id": user_id, "courses": progress_store.enrollments(user_id)}
+
+@app.get("/tickets/{tracking_id}")
+async def ticket_status(tracking_id: str, api_key: str = Depends(verify_api_key)):
+    # State of a complaint accepted by submit_complaint: queued, running, done or failed
+    job = await job_queue.get(tracking_id)
+    if job is None or job["kind"] != "freshdesk_ticket":
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return {
+        "tracking_id": tracking_id,
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "ticket_id": (job["result"] or {}).get("ticket_id"),
+        "error": job["error"] if job["status"] != "done" else None,
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
 
 # Add a test endpoint to verify Groq connection
 @app.get("/test-groq")
@@ -363,6 +738,77 @@ async def test_groq(api_key: str = Depends(verify_api_key)):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@app.get("/cache/stats")
+async def cache_stats_endpoint(api_key: str = Depends(verify_api_key)):
+    return cache_stats()
+
+@app.get("/llm/stats")
+async def llm_stats_endpoint(api_key: str = Depends(verify_api_key)):
+    return llm_pool.stats()
+
+@app.get("/debug/loop")
+async def loop_lag_endpoint(api_key: str = Depends(verify_api_key)):
+    return loop_monitor.stats()
+
+@app.post("/debug/loop/reset")
+async def loop_lag_reset_endpoint(api_key: str = Depends(verify_api_key)):
+    loop_monitor.reset()
+    return loop_monitor.stats()
+
+@metrics.collector
+def runtime_metrics():
+    # Counters kept by the caches, the admission controller and the loop monitor
+    cache_stats_by_name = cache_stats()
+    for key in ("hits", "misses", "coalesced", "evictions", "disk_hits", "bypassed", "bytes_saved"):
+        yield f"cache_{key}_total", "counter", f"Cache {key.replace('_', ' ')}", [
+            ({"cache": name}, stats[key]) for name, stats in cache_stats_by_name.items() if key in stats
+        ]
+    yield "cache_entries", "gauge", "Entries held in memory", [
+        ({"cache": name}, stats["entries"]) for name, stats in cache_stats_by_name.items() if "entries" in stats
+    ]
+    admission = groq_admission.stats()
+    yield "llm_queue_waiting", "gauge", "Calls waiting for a model slot", [({}, admission["waiting"])]
+    yield "llm_admission_rejected_total", "counter", "Calls rejected by admission control", [
+        ({"reason": "queue_full"}, admission["rejected"]),
+        ({"reason": "timeout"}, admission["timed_out"]),
+    ]
+    backends = llm_pool.stats()["backends"]
+    yield "llm_backend_health", "gauge", "EWMA success rate per model backend", [
+        ({"backend": name}, stats["health"]) for name, stats in backends.items()
+    ]
+    yield "llm_backend_requests_total", "counter", "Requests per model backend", [
+        ({"backend": name}, stats["requests"]) for name, stats in backends.items()
+    ]
+    outbox = job_queue.stats()
+    yield "outbox_jobs", "gauge", "Outbox jobs by status", [
+        ({"status": status}, count) for status, count in outbox["jobs"].items()
+    ]
+    yield "outbox_retries_total", "counter", "Outbox job attempts that will be retried", [({}, outbox["retried"])]
+    yield "ws_connections", "gauge", "Open WebSocket chat connections", [({}, ws_stats["open"])]
+    yield "ws_connections_rejected_total", "counter", "WebSocket connections refused at the limit", [({}, ws_stats["rejected"])]
+    yield "chat_batch_jobs", "gauge", "Chat batch jobs by status", [
+        ({"status": status}, count) for status, count in batch_jobs.stats()["jobs"].items()
+    ]
+    progress = progress_store.stats()
+    yield "progress_records", "gauge", "Course progress records in memory", [({}, progress["records"])]
+    yield "progress_pending_writes", "gauge", "Progress records waiting for the next flush", [({}, progress["pending"])]
+    yield "progress_updates_total", "counter", "Progress updates applied", [({}, progress["updates"])]
+    yield "progress_writes_total", "counter", "Progress records written to the backend", [({}, progress["writes"])]
+    yield "course_slug_index_entries", "gauge", "Course slugs in the local index", [
+        ({}, course_slugs.stats()["entries"])
+    ]
+    lag = loop_monitor.stats()
+    yield "event_loop_lag_seconds", "gauge", "Event loop lag over the recent window", [
+        ({"quantile": "0.5"}, lag["p50_ms"] / 1000),
+        ({"quantile": "0.99"}, lag["p99_ms"] / 1000),
+    ]
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    # Unauthenticated like /health, for Prometheus scrapers
+    await asyncio.gather(job_queue.refresh_counts(), batch_jobs.refresh_counts())
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": settings.VERSION}
@@ -0,0 +1 @@
+# Benchmark harness (mock upstreams + load generator), see bench/run.py
@@ -0,0 +1,57 @@
+# bench/compare.py
+"""Side-by-side comparison of two bench.run result files.
+
+    python -m bench.compare bench/results/old.json bench/results/new.json
+"""
+from typing import Any, Dict, Iterator, Optional, Tuple
+import json
+import sys
+
+# (label, path into the result, whether lower is better)
+METRICS = [
+    ("throughput rps", ("summary", "throughput_rps"), False),
+    ("errors", ("summary", "errors"), True),
+    ("latency p50 ms", ("summary", "latency_ms", "p50"), True),
+    ("latency p95 ms", ("summary", "latency_ms", "p95"), True),
+    ("latency p99 ms", ("summary", "latency_ms", "p99"), True),
+    ("server lag p99 ms", ("event_loop_lag_ms", "server", "p99_ms"), True),
+    ("server lag max ms", ("event_loop_lag_ms", "server", "max_ms"), True),
+]
+
+
+def lookup(result: Dict[str, Any], path: Tuple[str, ...]) -> Optional[float]:
+    for key in path:
+        if not isinstance(result, dict):
+            return None
+        result = result.get(key)
+    return result
+
+
+def rows(old: Dict[str, Any], new: Dict[str, Any]) -> Iterator[Tuple[str, Any, Any, str]]:
+    metrics = list(METRICS)
+    for name in sorted(set(old.get("scenarios", {})) | set(new.get("scenarios", {}))):
+        metrics.append((f"{name} p99 ms", ("scenarios", name, "latency_ms", "p99"), True))
+    for label, path, lower_is_better in metrics:
+        before, after = lookup(old, path), lookup(new, path)
+        change = ""
+        if isinstance(before, (int, float)) and isinstance(after, (int, float)) and before:
+            delta = (after - before) / before * 100
+            better = delta < 0 if lower_is_better else delta > 0
+            change = f"{delta:+.1f}%" + (" better" if better and abs(delta) >= 1 else "")
+        yield label, before, after, change
+
+
+def main(old_path: str, new_path: str) -> None:
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'':<22}{old['meta']['git']['commit'][:10]:>12}{new['meta']['git']['commit'][:10]:>12}")
+    for label, before, after, change in rows(old, new):
+        print(f"{label:<22}{str(before):>12}{str(after):>12}  {change}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        raise SystemExit(__doc__)
+    main(sys.argv[1], sys.argv[2])
@@ -0,0 +1,238 @@
+# bench/mocks.py
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+import asyncio
+import json
+import random
+import re
+import socket
+import time
+import uuid
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from .scenarios import Scenario, strip_marker
+
+
+@dataclass
+class LatencyProfile:
+    # Response time distribution plus an injected error rate for one mock upstream.
+    # "lognormal" is what real APIs look like: most calls near the median, a long tail.
+    distribution: str = "lognormal"  # "fixed", "uniform" or "lognormal"
+    median: float = 0.05
+    spread: float = 0.5  # sigma for lognormal, +/- fraction of the median for uniform
+    error_rate: float = 0.0
+    error_status: int = 503
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyProfile":
+        # e.g. "lognormal:median=0.4,spread=0.6,error_rate=0.01"
+        distribution, _, options = spec.partition(":")
+        profile = cls(distribution=distribution or "lognormal")
+        for option in filter(None, options.split(",")):
+            key, _, value = option.partition("=")
+            field_type = type(getattr(profile, key))
+            setattr(profile, key, field_type(value))
+        if profile.distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {profile.distribution}")
+        return profile
+
+    def sample(self) -> float:
+        if self.distribution == "fixed":
+            return self.median
+        if self.distribution == "uniform":
+            return max(0.0, random.uniform(self.median * (1 - self.spread), self.median * (1 + self.spread)))
+        return random.lognormvariate(0.0, self.spread) * self.median
+
+    async def delay(self) -> Optional[Response]:
+        # Sleeps for one sampled latency; returns an error response when one is injected
+        await asyncio.sleep(self.sample())
+        if self.error_rate and random.random() < self.error_rate:
+            headers = {"Retry-After": "1"} if self.error_status == 429 else None
+            return JSONResponse({"error": "injected failure"}, status_code=self.error_status, headers=headers)
+        return None
+
+
+def _completion(message: Dict[str, Any], prompt: List[Dict[str, Any]]) -> Dict[str, Any]:
+    prompt_tokens = sum(len(json.dumps(item)) for item in prompt) // 4
+    completion_tokens = len(json.dumps(message)) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "mock",
+        "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _stream(message: Dict[str, Any]) -> StreamingResponse:
+    def chunk(delta: Dict[str, Any]) -> str:
+        return f"data: {json.dumps({'choices': [{'index': 0, 'delta': delta}]})}\n\n"
+
+    async def chunks():
+        for word in re.findall(r"\S+\s*", message.get("content") or ""):
+            yield chunk({"content": word})
+        for index, call in enumerate(message.get("tool_calls") or []):
+            yield chunk({"tool_calls": [{"index": index, **call}]})
+        yield "data: [DONE]\n\n"
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+def groq_app(profile: LatencyProfile, scenarios: List[Scenario]) -> FastAPI:
+    # OpenAI-compatible chat completions. Tool calls are scripted per scenario:
+    # the first call of a turn requests the scenario's tools, the call after the
+    # tool results answers in plain text.
+    app = FastAPI()
+    by_message = {scenario.message: scenario for scenario in scenarios}
+
+    @app.post("/openai/v1/chat/completions")
+    async def completions(request: Request):
+        payload = await request.json()
+        error = await profile.delay()
+        if error is not None:
+            return error
+
+        messages = payload.get("messages") or []
+        last = messages[-1] if messages else {}
+        offered = {tool["function"]["name"] for tool in payload.get("tools") or []}
+        scenario = by_message.get(strip_marker(last.get("content") or "")) if last.get("role") == "user" else None
+
+        calls = [call for call in (scenario.tool_calls if scenario else []) if call[0] in offered]
+        if calls:
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{uuid.uuid4().hex[:8]}",
+                        "type": "function",
+                        "function": {"name": name, "arguments": json.dumps(arguments)},
+                    }
+                    for name, arguments in calls
+                ],
+            }
+        else:
+            message = {
+                "role": "assistant",
+                "content": "Here is what I found. " * random.randint(5, 30),
+            }
+        if payload.get("stream"):
+            return _stream(message)
+        return _completion(message, messages)
+
+    return app
+
+
+# Course titles the mock Euron knows; other slugs get a 404 like the real API
+CATALOG_TITLES = [
+    "Python for Beginners", "Advanced Python", "Blockchain Fundamentals", "Machine Learning A-Z",
+    "Deep Learning with PyTorch", "Data Science Bootcamp", "SQL for Data Analysis", "Web Development with Django",
+    "React from Scratch", "Cloud Computing on AWS", "Docker and Kubernetes", "Generative AI Essentials",
+    "Natural Language Processing", "Computer Vision Basics", "Statistics for Data Science", "Git and GitHub",
+]
+
+
+def _slugify(title: str) -> str:
+    return "-".join(re.findall(r"[a-z0-9]+", title.lower()))
+
+
+def euron_app(profile: LatencyProfile) -> FastAPI:
+    app = FastAPI()
+    catalog = [
+        {"slug": _slugify(title), "title": title, "updated_at": "2024-01-01T00:00:00+00:00"}
+        for title in CATALOG_TITLES
+    ]
+    slugs = {course["slug"] for course in catalog}
+
+    @app.get("/api/v1/courses")
+    async def courses(page: int = 1, per_page: int = 200, updated_since: str = ""):
+        error = await profile.delay()
+        if error is not None:
+            return error
+        changed = [course for course in catalog if course["updated_at"] > updated_since]
+        start = (page - 1) * per_page
+        return {
+            "courses": changed[start:start + per_page],
+            "next_page": page + 1 if start + per_page < len(changed) else None,
+        }
+
+    @app.get("/api/v1/courses/{slug}")
+    async def course(slug: str):
+        error = await profile.delay()
+        if error is not None:
+            return error
+        if slug not in slugs:
+            return JSONResponse({"detail": "Course not found"}, status_code=404)
+        return {
+            "slug": slug,
+            "title": slug.replace("-", " ").title(),
+            "description": "A hands-on course. " * 20,
+            "modules": [{"title": f"Module {i}", "lessons": 8} for i in range(1, 9)],
+            "price": 49.0,
+        }
+
+    @app.get("/")
+    async def query(query: str = ""):
+        error = await profile.delay()
+        if error is not None:
+            return error
+        return {"query": query, "answer": "Euron is a learning platform. " * 10}
+
+    return app
+
+
+def freshdesk_app(profile: LatencyProfile) -> FastAPI:
+    app = FastAPI()
+    tickets = iter(range(1, 10 ** 9))
+
+    @app.post("/api/v2/tickets")
+    async def create_ticket(request: Request):
+        payload = await request.json()
+        error = await profile.delay()
+        if error is not None:
+            return error
+        return JSONResponse({"id": next(tickets), **payload}, status_code=201)
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MockUpstreams:
+    # Runs the three mock services on local ports inside the current event loop
+    def __init__(self, profiles: Dict[str, LatencyProfile], scenarios: List[Scenario]):
+        self.apps = {
+            "groq": groq_app(profiles["groq"], scenarios),
+            "euron": euron_app(profiles["euron"]),
+            "freshdesk": freshdesk_app(profiles["freshdesk"]),
+        }
+        self.urls: Dict[str, str] = {}
+        self._servers: List[uvicorn.Server] = []
+        self._tasks: List[asyncio.Task] = []
+
+    async def __aenter__(self) -> "MockUpstreams":
+        for name, app in self.apps.items():
+            port = _free_port()
+            config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+            server = uvicorn.Server(config)
+            self._servers.append(server)
+            self._tasks.append(asyncio.ensure_future(server.serve()))
+            self.urls[name] = f"http://127.0.0.1:{port}"
+        while not all(server.started for server in self._servers):
+            await asyncio.sleep(0.01)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        for server in self._servers:
+            server.should_exit = True
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,159 @@
+# bench/progress.py
+"""Microbenchmark of the progress store: memory per record and update throughput.
+
+    python -m bench.progress --users 100000 --courses-per-user 10
+
+Loads the same synthetic enrollments into the old dict-of-dicts layout and into
+ProgressTable, measuring allocated bytes per record with tracemalloc, then times
+single updates, the coalescing of repeated updates and bulk flushes to the file
+backend.
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from .run import BASE_ENV, RESULTS_DIR
+
+# Importing the app package needs its settings
+for key, value in BASE_ENV.items():
+    os.environ.setdefault(key, value)
+
+from app.core.progress_store import FileProgressBackend, ProgressStore, ProgressTable  # noqa: E402
+
+MILESTONES = [f"Complete Module {number}" for number in range(1, 13)]
+
+
+def enrollments(users: int, per_user: int, seed: int):
+    rng = random.Random(seed)
+    for user in range(users):
+        for course in rng.sample(range(500), per_user):
+            yield f"user{user}", f"course{course}", {
+                "completion_percentage": rng.randint(0, 100),
+                "modules_completed": rng.randint(0, 12),
+                "total_modules": 12,
+                "last_activity": "2024-03-15T10:30:00Z",
+                "next_milestone": rng.choice(MILESTONES),
+            }
+
+
+def measure(build) -> Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    kept = build()
+    elapsed = time.perf_counter() - started
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return {"bytes": allocated, "seconds": elapsed}
+
+
+def build_dicts(args: argparse.Namespace) -> Dict:
+    progress: Dict[str, Dict[str, Dict]] = {}
+    for user_id, course_id, record in enrollments(args.users, args.courses_per_user, args.seed):
+        # Fresh string copies, as values decoded from a database would be
+        progress.setdefault(user_id, {})[course_id] = {**record, "last_activity": "".join(record["last_activity"])}
+    return progress
+
+
+def build_table(args: argparse.Namespace) -> ProgressTable:
+    table = ProgressTable()
+    for user_id, course_id, record in enrollments(args.users, args.courses_per_user, args.seed):
+        table.upsert(user_id, course_id, record)
+    return table
+
+
+async def updates(args: argparse.Namespace) -> Dict[str, Any]:
+    records = args.users * args.courses_per_user
+    with tempfile.TemporaryDirectory() as directory:
+        backend = FileProgressBackend(os.path.join(directory, "progress.jsonl"))
+        # Flushing is driven by hand below
+        store = ProgressStore(backend, flush_interval=3600, flush_batch=10 ** 9)
+        for user_id, course_id, record in enrollments(args.users, args.courses_per_user, args.seed):
+            store.table.upsert(user_id, course_id, record)
+
+        rng = random.Random(args.seed + 1)
+        # A skewed stream: a few active users account for most updates, as in practice
+        active = [f"user{rng.randrange(args.users)}" for _ in range(max(1, args.users // 100))]
+        stream = []
+        for _ in range(args.updates):
+            user_id = rng.choice(active)
+            course_id = store.table.key(next(iter(store.table.rows(user_id))))[1]
+            stream.append((user_id, course_id, {"completion_percentage": rng.randint(0, 100)}))
+
+        started = time.perf_counter()
+        for user_id, course_id, values in stream:
+            store.update(user_id, course_id, values)
+        update_seconds = time.perf_counter() - started
+
+        pending = len(store._dirty)
+        started = time.perf_counter()
+        written = await store.flush()
+        flush_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(1000):
+            store.enrollments(rng.choice(active))
+        read_seconds = (time.perf_counter() - started) / 1000
+
+    return {
+        "records": records,
+        "updates": args.updates,
+        "updates_per_second": round(args.updates / update_seconds),
+        "coalesced_writes": pending,
+        "flush_ms": round(flush_seconds * 1000, 2),
+        "written": written,
+        "enrollments_read_us": round(read_seconds * 1e6, 2),
+    }
+
+
+def main(args: argparse.Namespace) -> Dict[str, Any]:
+    records = args.users * args.courses_per_user
+    dicts = measure(lambda: build_dicts(args))
+    table = measure(lambda: build_table(args))
+    result = {
+        "records": records,
+        "memory": {
+            "dicts_bytes_per_record": round(dicts["bytes"] / records, 1),
+            "table_bytes_per_record": round(table["bytes"] / records, 1),
+            "dicts_load_seconds": round(dicts["seconds"], 2),
+            "table_load_seconds": round(table["seconds"], 2),
+        },
+        "updates": asyncio.run(updates(args)),
+    }
+
+    memory, writes = result["memory"], result["updates"]
+    print(f"{records} records ({args.users} users x {args.courses_per_user} courses)")
+    print(f"memory per record   dicts {memory['dicts_bytes_per_record']:>8} B   table {memory['table_bytes_per_record']:>8} B")
+    print(f"updates             {writes['updates_per_second']} /s in memory")
+    print(f"coalescing          {writes['updates']} updates -> {writes['coalesced_writes']} writes, "
+          f"flushed in {writes['flush_ms']} ms")
+    print(f"enrollments read    {writes['enrollments_read_us']} us per user")
+
+    output = args.output or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-progress.json"
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(result, file, indent=2)
+    print(f"results written to {output}")
+    return result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m bench.progress", description=__doc__.split("\n")[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--courses-per-user", type=int, default=10)
+    parser.add_argument("--updates", type=int, default=200000, help="updates in the throughput run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="result file (default: bench/results/<time>-progress.json)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
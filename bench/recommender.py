@@ -0,0 +1,144 @@
+# bench/recommender.py
+"""Microbenchmark of the course recommender against the old filter-and-sample code.
+
+    python -m bench.recommender --courses 10000 100000
+
+Builds a synthetic catalog of each size and times: building the feature matrix,
+one recommendation with the old list comprehension + random.sample, one with
+the NumPy recommender, a batch of users through recommend_many, and catalog
+updates (add/remove) on the built matrix.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+from .run import BASE_ENV, RESULTS_DIR
+
+# Importing the app package needs its settings
+for key, value in BASE_ENV.items():
+    os.environ.setdefault(key, value)
+
+from app.functions.recommender import CourseRecommender  # noqa: E402
+
+CATEGORIES = [
+    "Programming", "Data Science", "Web Development", "Cloud", "Security",
+    "Design", "Business", "Mobile", "DevOps", "AI",
+]
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+WORDS = (
+    "python java rust go sql data machine learning deep neural network cloud aws azure docker "
+    "kubernetes security network design ux product marketing finance react vue django flask api "
+    "testing agile mobile android ios devops linux statistics analytics vision language model"
+).split()
+
+
+def synthetic_courses(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": str(number),
+            "title": " ".join(rng.choices(WORDS, k=3)).title(),
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(8, 30))),
+            "skill_level": rng.choice(LEVELS),
+            "category": rng.choice(CATEGORIES),
+            "duration": f"{rng.randint(2, 16)} weeks",
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+        }
+        for number in range(count)
+    ]
+
+
+def baseline(courses: List[Dict], interests: Optional[List[str]]) -> List[Dict]:
+    # The previous get_recommendations body
+    recommended_courses = [
+        course for course in courses
+        if not interests or course["category"] in interests
+    ]
+    return random.sample(recommended_courses, min(5, len(recommended_courses)))
+
+
+def timed(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    # Milliseconds per call
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return {
+        "mean": round(statistics.fmean(samples) * 1000, 4),
+        "p50": round(statistics.median(samples) * 1000, 4),
+        "min": round(min(samples) * 1000, 4),
+    }
+
+
+def run_size(count: int, args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    courses = synthetic_courses(count, rng)
+    users = [rng.sample(CATEGORIES, 2) + rng.sample(WORDS, 2) for _ in range(args.batch)]
+
+    started = time.perf_counter()
+    recommender = CourseRecommender(courses)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    vectors = [recommender.interest_vector(interests) for interests in users]
+    extra = synthetic_courses(args.repeat, random.Random(args.seed + 1))
+    for number, course in enumerate(extra):
+        course["id"] = f"extra-{number}"
+    additions = iter(extra)
+
+    def update() -> None:
+        course = next(additions)
+        recommender.add(course)
+        recommender.remove(course["id"])
+
+    batch = timed(lambda: recommender.recommend_many(vectors, 5), max(1, args.repeat // 10))
+    return {
+        "courses": count,
+        "build_ms": round(build_ms, 1),
+        "matrix_mb": round(recommender._matrix.nbytes / 2 ** 20, 1),
+        "baseline_ms": timed(lambda: baseline(courses, users[0][:2]), args.repeat),
+        "recommend_ms": timed(lambda: recommender.recommend(vectors[0], 5), args.repeat),
+        "batch_ms": batch,
+        "batch_per_user_ms": round(batch["mean"] / len(vectors), 4),
+        "update_ms": timed(update, args.repeat),
+    }
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    print(f"{'courses':>8} {'build ms':>9} {'matrix MB':>9} {'baseline':>9} {'recommend':>9} "
+          f"{'batch/user':>10} {'add+remove':>10}")
+    for result in results:
+        print(
+            f"{result['courses']:>8} {result['build_ms']:>9} {result['matrix_mb']:>9} "
+            f"{result['baseline_ms']['p50']:>9} {result['recommend_ms']['p50']:>9} "
+            f"{result['batch_per_user_ms']:>10} {result['update_ms']['p50']:>10}"
+        )
+    print("per-call p50 in ms; batch/user is the mean batch time divided by the batch size")
+
+
+def main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = [run_size(count, args) for count in args.courses]
+    print_report(results)
+    output = args.output or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-recommender.json"
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump({"batch_users": args.batch, "results": results}, file, indent=2)
+    print(f"results written to {output}")
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m bench.recommender", description=__doc__.split("\n")[0])
+    parser.add_argument("--courses", type=int, nargs="+", default=[10000, 100000], help="catalog sizes")
+    parser.add_argument("--batch", type=int, default=1000, help="users per recommend_many call")
+    parser.add_argument("--repeat", type=int, default=50, help="timed calls per measurement")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="result file (default: bench/results/<time>-recommender.json)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
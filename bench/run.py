@@ -0,0 +1,331 @@
+# bench/run.py
+"""Load test of /chat against local mock upstreams.
+
+    python -m bench.run --mix realistic --rps 50 --duration 60
+
+Starts mock Groq / Euron / Freshdesk servers, launches the app with uvicorn
+pointed at them, drives /chat at a fixed arrival rate (open loop, so a slow
+server cannot slow the load down) and writes the results to bench/results/.
+Compare two runs with `python -m bench.compare OLD.json NEW.json`.
+"""
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+
+from .mocks import LatencyProfile, MockUpstreams
+from .scenarios import MIXES, SCENARIOS, ScenarioPicker
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "bench" / "results"
+API_KEY = "bench-key"
+
+# The app under test talks to the mocks only; rate limits are lifted so the
+# numbers measure the service rather than the throttling configuration
+BASE_ENV = {
+    "GROQ_API_KEY": "bench",
+    "APP_API_KEY": API_KEY,
+    "OPENAI_SWARM_API_KEY": "bench",
+    "FRESHDESK_DOMAIN": "bench",
+    "FRESHDESK_API_KEY": "bench",
+    "DEBUG": "false",
+    "LOG_LEVEL": "WARNING",
+    "SESSION_BACKEND": "memory",
+    "HTTP_PREWARM": "false",
+    "OUTBOX_PATH": str(RESULTS_DIR / "outbox.sqlite3"),
+    "GROQ_REQUESTS_PER_MINUTE": "1000000",
+    "GROQ_TOKENS_PER_MINUTE": "1000000000",
+}
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    # Milliseconds, nearest-rank
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 2)
+
+    return {
+        "mean": round(statistics.fmean(ordered) * 1000, 2),
+        "p50": rank(0.50),
+        "p95": rank(0.95),
+        "p99": rank(0.99),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    # A named mix, or explicit weights: "plain_chat=3,single_tool=1"
+    if spec in MIXES:
+        return MIXES[spec]
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+class LagSampler:
+    # Event-loop lag of the load generator itself; if this grows the client is
+    # the bottleneck and the run is not trustworthy
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples: List[float] = []
+
+    async def run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+
+async def start_app(port: int, env: Dict[str, str], log_path: Path) -> subprocess.Popen:
+    log_file = open(log_path, "w")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=ROOT,
+        env={**os.environ, **env},
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    log_file.close()
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f"The app exited during startup, see {log_path}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return process
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    process.terminate()
+    raise SystemExit(f"The app did not become healthy, see {log_path}")
+
+
+async def send(client: httpx.AsyncClient, scenario, number: int, unique: bool, phase: str, records: List[Dict]) -> None:
+    started = time.perf_counter()
+    try:
+        response = await client.post("/chat", json=scenario.request(number, unique))
+        status: Any = response.status_code
+        tool_calls = len((response.json() or {}).get("tool_calls") or []) if status == 200 else 0
+    except httpx.HTTPError as e:
+        status, tool_calls = f"error:{type(e).__name__}", 0
+    records.append({
+        "scenario": scenario.name,
+        "phase": phase,
+        "status": status,
+        "latency": time.perf_counter() - started,
+        "tool_calls": tool_calls,
+    })
+
+
+async def drive(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    picker = ScenarioPicker(parse_mix(args.mix), args.seed)
+    records: List[Dict] = []
+    tasks = set()
+    skipped = 0
+    lag = LagSampler()
+    lag_task = asyncio.ensure_future(lag.run())
+
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"X-API-Key": API_KEY},
+        limits=limits,
+        timeout=args.timeout,
+    ) as client:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        measuring_from = started + args.warmup
+        ends = measuring_from + args.duration
+        reset = False
+        number = 0
+        while True:
+            at = started + number / args.rps
+            if at >= ends:
+                break
+            if at > loop.time():
+                await asyncio.sleep(at - loop.time())
+            phase = "warmup" if at < measuring_from else "measure"
+            if phase == "measure" and not reset:
+                reset = True
+                lag.samples.clear()
+                await client.post("/debug/loop/reset")
+            number += 1
+            if len(tasks) >= args.max_in_flight:
+                # The server can't keep up; count it rather than queueing client-side
+                if phase == "measure":
+                    skipped += 1
+                continue
+            task = asyncio.ensure_future(send(client, picker.pick(), number, not args.cacheable, phase, records))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        wall = loop.time() - measuring_from
+        if tasks:
+            await asyncio.wait(tasks)
+        drained = loop.time() - measuring_from
+
+        server = {}
+        for name, path in [("event_loop_lag", "/debug/loop"), ("caches", "/cache/stats"), ("llm", "/llm/stats")]:
+            try:
+                server[name] = (await client.get(path)).json()
+            except (httpx.HTTPError, ValueError):
+                server[name] = None
+
+    lag_task.cancel()
+    measured = [record for record in records if record["phase"] == "measure"]
+    return summarize(measured, skipped, wall, drained, lag.samples, server, args)
+
+
+def summarize(
+    records: List[Dict],
+    skipped: int,
+    wall: float,
+    drained: float,
+    client_lag: List[float],
+    server: Dict[str, Any],
+    args: argparse.Namespace
+) -> Dict[str, Any]:
+    ok = [record for record in records if record["status"] == 200]
+    statuses: Dict[str, int] = {}
+    for record in records:
+        statuses[str(record["status"])] = statuses.get(str(record["status"]), 0) + 1
+
+    scenarios = {}
+    for name in sorted({record["scenario"] for record in records}):
+        of_scenario = [record for record in records if record["scenario"] == name]
+        succeeded = [record for record in of_scenario if record["status"] == 200]
+        scenarios[name] = {
+            "requests": len(of_scenario),
+            "ok": len(succeeded),
+            "latency_ms": percentiles([record["latency"] for record in succeeded]),
+            "tool_calls": sum(record["tool_calls"] for record in succeeded),
+        }
+
+    lag_ms = percentiles(client_lag)
+    return {
+        "summary": {
+            "offered_rps": args.rps,
+            "duration_s": round(wall, 3),
+            "drain_s": round(drained - wall, 3),
+            "requests": len(records),
+            "ok": len(ok),
+            "errors": len(records) - len(ok),
+            "skipped": skipped,
+            "statuses": statuses,
+            "throughput_rps": round(len(ok) / drained, 2) if drained > 0 else 0.0,
+            "latency_ms": percentiles([record["latency"] for record in ok]),
+        },
+        "scenarios": scenarios,
+        "event_loop_lag_ms": {
+            "server": server.get("event_loop_lag"),
+            "client": {key: lag_ms.get(key) for key in ("mean", "p50", "p99", "max")},
+        },
+        "server": {key: value for key, value in server.items() if key != "event_loop_lag"},
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    summary = result["summary"]
+    latency = summary["latency_ms"]
+    print(
+        f"{summary['ok']}/{summary['requests']} ok, {summary['throughput_rps']} req/s "
+        f"(offered {summary['offered_rps']}), skipped {summary['skipped']}"
+    )
+    if latency:
+        print(f"latency ms  p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    for name, scenario in result["scenarios"].items():
+        p = scenario["latency_ms"]
+        print(f"  {name:<12} {scenario['ok']:>6}/{scenario['requests']:<6} p50 {p.get('p50')}  p99 {p.get('p99')}")
+    server_lag = result["event_loop_lag_ms"]["server"] or {}
+    print(f"server loop lag ms  p99 {server_lag.get('p99_ms')}  max {server_lag.get('max_ms')}")
+    print(f"client loop lag ms  p99 {result['event_loop_lag_ms']['client'].get('p99')}")
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    profiles = {
+        "groq": LatencyProfile.parse(args.groq),
+        "euron": LatencyProfile.parse(args.euron),
+        "freshdesk": LatencyProfile.parse(args.freshdesk),
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{args.mix}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    async with MockUpstreams(profiles, list(SCENARIOS.values())) as mocks:
+        env = {
+            **BASE_ENV,
+            "GROQ_BASE_URL": mocks.urls["groq"],
+            "EURON_BASE_URL": mocks.urls["euron"],
+            "FRESHDESK_BASE_URL": mocks.urls["freshdesk"],
+        }
+        env.update(dict(item.split("=", 1) for item in args.env))
+        process = await start_app(args.port, env, output.with_suffix(".server.log"))
+        try:
+            result = await drive(args, f"http://127.0.0.1:{args.port}")
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    result["meta"] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mix": parse_mix(args.mix),
+        "args": vars(args),
+        "upstreams": {name: vars(profile) for name, profile in profiles.items()},
+    }
+    output.write_text(json.dumps(result, indent=2, sort_keys=True))
+    print_report(result)
+    print(f"results written to {output}")
+    return result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description=__doc__.split("\n")[0])
+    parser.add_argument("--mix", default="realistic", help=f"one of {', '.join(MIXES)} or name=weight,...")
+    parser.add_argument("--rps", type=float, default=20.0, help="target arrival rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of load before measuring")
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request client timeout")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--cacheable", action="store_true", help="repeat identical messages instead of unique ones")
+    parser.add_argument("--groq", default="lognormal:median=0.4,spread=0.5", help="latency profile of the model mock")
+    parser.add_argument("--euron", default="lognormal:median=0.08,spread=0.4")
+    parser.add_argument("--freshdesk", default="lognormal:median=0.3,spread=0.4")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra app settings")
+    parser.add_argument("--output", help="result file (default: bench/results/<time>-<mix>.json)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,93 @@
+# bench/scenarios.py
+from typing import Any, Dict, List, Tuple
+from dataclasses import dataclass, field
+import random
+import re
+
+ToolCall = Tuple[str, Dict[str, Any]]
+
+# Put in front of each message so the completion cache sees distinct conversations
+# (in front, so it doesn't end up in course names extracted from the message)
+_MARKER = re.compile(r"^#\d+\s+")
+
+
+def strip_marker(content: str) -> str:
+    return _MARKER.sub("", content)
+
+
+@dataclass
+class Scenario:
+    name: str
+    message: str
+    # What the mock model asks for when these tools are offered
+    tool_calls: List[ToolCall] = field(default_factory=list)
+    # Earlier turns sent along with the message
+    history: List[Dict[str, Any]] = field(default_factory=list)
+
+    def request(self, number: int, unique: bool = True) -> Dict[str, Any]:
+        content = f"#{number} {self.message}" if unique else self.message
+        return {"messages": [*self.history, {"role": "user", "content": content}]}
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario("plain_chat", "Hi there, how are you doing today?"),
+        Scenario(
+            "single_tool",
+            "Tell me about the course python for beginners",
+            tool_calls=[("search_courses", {"query": "python for beginners"})],
+        ),
+        Scenario(
+            "multi_tool",
+            "Is there a blockchain course, and what is Euron?",
+            tool_calls=[
+                ("search_courses", {"query": "blockchain"}),
+                ("query_euron", {"query": "what is euron"}),
+            ],
+        ),
+        Scenario(
+            "follow_up",
+            "Which course should I study next?",
+            tool_calls=[("search_courses", {"query": "machine learning"})],
+            history=[
+                {"role": "user", "content": "I finished the python basics track last week."},
+                {"role": "assistant", "content": "Congratulations, that is a great foundation to build on!"},
+                {"role": "user", "content": "I'm mostly interested in data and machine learning."},
+                {"role": "assistant", "content": "Data science and machine learning are a natural next step."},
+            ],
+        ),
+        Scenario(
+            "complaint",
+            "I have a problem with my course video, please log a complaint",
+            tool_calls=[(
+                "submit_complaint",
+                {"email": "student@example.com", "name": "Bench Student", "complaint": "The course video does not load."},
+            )],
+        ),
+    ]
+}
+
+# Scenario weights of each named mix
+MIXES: Dict[str, Dict[str, float]] = {
+    "plain": {"plain_chat": 1.0},
+    "single_tool": {"single_tool": 1.0},
+    "multi_tool": {"multi_tool": 1.0},
+    "realistic": {
+        "plain_chat": 0.45,
+        "single_tool": 0.25,
+        "multi_tool": 0.15,
+        "follow_up": 0.10,
+        "complaint": 0.05,
+    },
+}
+
+
+class ScenarioPicker:
+    def __init__(self, mix: Dict[str, float], seed: int):
+        self._names = list(mix)
+        self._weights = [mix[name] for name in self._names]
+        self._random = random.Random(seed)
+
+    def pick(self) -> Scenario:
+        return SCENARIOS[self._random.choices(self._names, self._weights)[0]]
@@ -0,0 +1,15 @@
+# tests/conftest.py
+import os
+
+# Importing the app package needs its settings; nothing here talks to a real upstream
+for key, value in {
+    "GROQ_API_KEY": "test",
+    "APP_API_KEY": "test",
+    "OPENAI_SWARM_API_KEY": "test",
+    "FRESHDESK_DOMAIN": "test",
+    "FRESHDESK_API_KEY": "test",
+    "SESSION_BACKEND": "memory",
+    "PROGRESS_BACKEND": "memory",
+    "HTTP_PREWARM": "false",
+}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,144 @@
+# tests/test_chat_websocket.py
+from contextlib import contextmanager
+import asyncio
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from app import main
+from app.config import settings
+
+
+@pytest.fixture
+def started(monkeypatch):
+    # The model is replaced by a slow stream of deltas, so turns can be cancelled
+    # midway; returns the messages whose turn began
+    started = []
+
+    async def fake_event_stream(groq_messages, tools):
+        started.append(groq_messages[-1]["content"])
+        for word in ("Hello", " there", "!"):
+            await asyncio.sleep(0.05)
+            yield {"type": "delta", "content": word}
+
+    monkeypatch.setattr(main, "chat_event_stream", fake_event_stream)
+    return started
+
+
+@pytest.fixture
+def client(started):
+    return TestClient(main.app)
+
+
+@contextmanager
+def connect(client: TestClient):
+    with client.websocket_connect("/chat/ws", headers={"X-API-Key": settings.APP_API_KEY}) as websocket:
+        yield websocket
+        # Give the handler time to wind down before the test client cancels it
+        websocket.close()
+        time.sleep(0.2)
+
+
+def receive_until(websocket, *types):
+    events = []
+    while True:
+        event = websocket.receive_json()
+        events.append(event)
+        if event["type"] in types:
+            return events
+
+
+def test_turn_streams_deltas_then_done(client):
+    with connect(client) as websocket:
+        websocket.send_json({"content": "hi"})
+        events = receive_until(websocket, "done")
+    assert "".join(event["content"] for event in events if event["type"] == "delta") == "Hello there!"
+
+
+def test_cancel_stops_the_running_turn(client):
+    with connect(client) as websocket:
+        websocket.send_json({"content": "hi"})
+        assert websocket.receive_json()["type"] == "delta"
+        websocket.send_json({"type": "cancel"})
+        events = receive_until(websocket, "cancelled", "done")
+        assert events[-1]["type"] == "cancelled"
+
+        # The connection stays usable, and the cancelled turn isn't in the history
+        websocket.send_json({"content": "again"})
+        assert receive_until(websocket, "done")[-1]["type"] == "done"
+
+
+def test_cancel_right_after_sending_cancels_that_message(client):
+    with connect(client) as websocket:
+        websocket.send_json({"content": "hi"})
+        websocket.send_json({"type": "cancel"})
+        events = receive_until(websocket, "cancelled", "done")
+        assert events[-1]["type"] == "cancelled"
+
+        websocket.send_json({"content": "next"})
+        events = receive_until(websocket, "cancelled", "done")
+        assert events[-1]["type"] == "done"
+
+
+def test_cancel_takes_back_a_message_not_yet_picked_up(started):
+    # The window TestClient rarely hits: the message is queued, but the
+    # processor hasn't turned it into a turn yet
+    class RecordingSocket:
+        def __init__(self):
+            self.sent = []
+
+        async def send_text(self, text):
+            self.sent.append(json.loads(text))
+
+    async def scenario():
+        conversation = main.SocketConversation(RecordingSocket())
+        processor = asyncio.ensure_future(conversation.process())
+        await asyncio.sleep(0)
+        conversation.inbox.put_nowait("hi")
+        await conversation.cancel()
+        await asyncio.sleep(0.3)
+        processor.cancel()
+        await asyncio.gather(processor, return_exceptions=True)
+        return conversation.websocket.sent
+
+    assert asyncio.run(scenario()) == [{"type": "cancelled"}]
+    assert started == []
+
+
+def test_message_beyond_the_pending_limit_is_refused(client, monkeypatch):
+    monkeypatch.setattr(settings, "WS_MAX_PENDING_MESSAGES", 1)
+    with connect(client) as websocket:
+        for content in ("one", "two", "three"):
+            websocket.send_json({"content": content})
+        assert receive_until(websocket, "error")[-1]["message"].startswith("Too many messages")
+
+        # The reader isn't blocked, so a cancel still gets through
+        websocket.send_json({"type": "cancel"})
+        assert receive_until(websocket, "cancelled")[-1]["type"] == "cancelled"
+
+
+def closing_code(client: TestClient, send) -> int:
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/chat/ws", headers={"X-API-Key": settings.APP_API_KEY}) as websocket:
+            send(websocket)
+            websocket.receive_json()
+    return closed.value.code
+
+
+def test_size_limit_counts_bytes(client, monkeypatch):
+    monkeypatch.setattr(settings, "WS_MAX_MESSAGE_BYTES", 10)
+    # Six characters, twelve bytes
+    assert closing_code(client, lambda websocket: websocket.send_text("éééééé")) == 1009
+
+
+def test_binary_frame_closes_the_connection(client):
+    assert closing_code(client, lambda websocket: websocket.send_bytes(b"hi")) == 1003
+
+
+def test_connection_without_api_key_is_refused(client, monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", False)
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect("/chat/ws") as websocket:
+            websocket.receive_json()
+    assert refused.value.code == 1008
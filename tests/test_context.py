@@ -0,0 +1,58 @@
+# tests/test_context.py
+from app.core.context import compact_messages, estimate_message_tokens, is_summary
+from app.core.groq_client import _build_request, system_message
+
+
+def turn(number: int):
+    return [
+        {"role": "user", "content": f"question {number} " + "about python " * 20},
+        {"role": "assistant", "content": f"answer {number} " + "with some detail " * 20},
+    ]
+
+
+def converse(turns: int, budget: int):
+    # What the WebSocket channel does: compact the history after every turn
+    history = []
+    for number in range(turns):
+        history = compact_messages([*history, *turn(number)], budget)
+    return history
+
+
+def test_repeated_compaction_keeps_a_single_summary():
+    history = converse(60, budget=2000)
+    system = [message for message in history if message["role"] == "system"]
+    assert len(system) == 1 and is_summary(system[0])
+    assert sum(estimate_message_tokens(message) for message in history) <= 2000
+
+
+def test_summary_keeps_the_most_recent_dropped_questions():
+    history = converse(60, budget=2000)
+    summary = next(message for message in history if is_summary(message))
+    kept = [message["content"] for message in history if message["role"] == "user"]
+    assert kept[-1].startswith("question 59 ")
+    # The newest dropped question sits right before the oldest kept one
+    oldest_kept = int(kept[0].split()[1])
+    assert f"question {oldest_kept - 1} " in summary["content"]
+    assert "question 0 " not in summary["content"]
+
+
+def test_compaction_is_stable_once_it_fits():
+    history = converse(30, budget=2000)
+    assert compact_messages(history, 2000) == history
+
+
+def test_system_prompts_are_kept_alongside_the_summary():
+    prompt = {"role": "system", "content": "You are a tutor."}
+    history = [prompt]
+    for number in range(20):
+        history = compact_messages([*history, *turn(number)], 400)
+    assert history[0] == prompt
+    assert sum(1 for message in history if is_summary(message)) == 1
+
+
+def test_persona_still_goes_first_after_compaction():
+    history = converse(30, budget=2000)
+    payload = _build_request([*history, {"role": "user", "content": "and now?"}])
+    messages = payload["messages"]
+    assert messages[0] == {"role": "system", "content": system_message}
+    assert is_summary(messages[1])
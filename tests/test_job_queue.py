@@ -0,0 +1,22 @@
+# tests/test_job_queue.py
+import asyncio
+from app.core.job_queue import QUEUED, JobQueue
+
+
+def test_stats_report_the_counts_of_the_last_refresh(tmp_path):
+    async def scenario():
+        queue = JobQueue(str(tmp_path / "outbox.sqlite3"), workers=1)
+
+        @queue.handler("noop")
+        async def noop(payload):
+            return {}
+
+        await queue.enqueue("noop", {})
+        before = queue.stats()["jobs"]
+        counts = await queue.refresh_counts()
+        queue.store.close()
+        return before, counts, queue.stats()["jobs"]
+
+    before, counts, after = asyncio.run(scenario())
+    assert before == {}
+    assert counts == after == {QUEUED: 1}
@@ -0,0 +1,193 @@
+# tests/test_llm_backends.py
+import asyncio
+import httpx
+import pytest
+from app.config import settings
+from app.core.http_clients import http_clients
+from app.core.llm_backends import BackendAPIError, BackendPool, CircuitBreaker, CompletionBackend
+from app.core.rate_limit import TokenBucket, UpstreamOverloaded
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allows()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allows()
+    assert breaker.retry_in() > 0
+
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+    breaker.record_failure()
+    assert breaker.allows() and breaker.state == "half_open"
+    assert breaker.acquire() is not None
+    assert not breaker.allows()
+    assert breaker.acquire() is None
+
+
+def test_half_open_probe_outcome_decides_the_state():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+    breaker.record_failure()
+    breaker.allows()
+    breaker.acquire()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    breaker.allows()
+    breaker.acquire()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allows()
+
+
+def test_released_probe_frees_the_slot():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+    breaker.record_failure()
+    breaker.allows()
+    probe = breaker.acquire()
+    breaker.release(None)
+    breaker.release(object())
+    assert not breaker.allows()
+    breaker.release(probe)
+    assert breaker.state == "half_open" and breaker.allows()
+
+
+def test_stale_release_keeps_the_next_probe():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+    breaker.record_failure()
+    breaker.allows()
+    first = breaker.acquire()
+    breaker.release(first)
+    second = breaker.acquire()
+    breaker.release(first)
+    assert not breaker.allows()
+    breaker.release(second)
+    assert breaker.allows()
+
+
+def half_open_backend(name: str, handler) -> CompletionBackend:
+    backend = CompletionBackend(name=name, base_url="http://llm.test", model="test")
+    http_clients._clients[backend.client_name] = httpx.AsyncClient(
+        base_url="http://llm.test",
+        transport=httpx.MockTransport(handler)
+    )
+    backend.breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+    backend.breaker.record_failure()
+    assert backend.available() and backend.breaker.state == "half_open"
+    return backend
+
+
+def test_cancelled_probe_does_not_leave_the_backend_unavailable():
+    async def hang(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(3600)
+
+    async def scenario():
+        backend = half_open_backend("cancelled-probe", hang)
+        claimed, token = backend.claim()
+        assert claimed and token is not None
+        probe = asyncio.ensure_future(backend.send("{}", probe=token))
+        await asyncio.sleep(0.01)
+        assert not backend.available()
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        return backend
+
+    backend = asyncio.run(scenario())
+    assert backend.breaker.state == "half_open"
+    assert backend.available()
+
+
+def test_rejected_probe_counts_as_the_backend_answering():
+    def bad_request(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(400, json={"error": "bad request"})
+
+    async def scenario():
+        backend = half_open_backend("rejected-probe", bad_request)
+        with pytest.raises(BackendAPIError):
+            await backend.send("{}", probe=backend.claim()[1])
+        return backend
+
+    backend = asyncio.run(scenario())
+    assert backend.breaker.state == "closed"
+    assert backend.available()
+
+
+def test_failed_probe_reopens_the_breaker(monkeypatch):
+    def unavailable(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503, text="down")
+
+    async def scenario():
+        backend = half_open_backend("failed-probe", unavailable)
+        backend.breaker.cooldown = 60
+        with pytest.raises(BackendAPIError):
+            await backend.send("{}", probe=backend.claim()[1])
+        return backend
+
+    monkeypatch.setattr(settings, "GROQ_MAX_RETRIES", 0)
+    backend = asyncio.run(scenario())
+    assert backend.breaker.state == "open"
+    assert not backend.available()
+
+
+def test_rate_limit_pauses_callers_once_every_backend_backs_off():
+    first = CompletionBackend(name="limited-first", base_url="http://llm.test", model="test")
+    second = CompletionBackend(name="limited-second", base_url="http://llm.test", model="test")
+    pool = BackendPool([first, second])
+    bucket = TokenBucket(per_minute=60)
+    pool.on_rate_limited = bucket.pause
+
+    first.cool_down(5)
+    assert bucket.reserve(1) == 0
+
+    second.cool_down(2)
+    assert 1.5 < bucket.reserve(1) <= 2
+
+
+def test_concurrent_callers_in_half_open_send_a_single_probe():
+    requests = []
+
+    async def slow_ok(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"choices": []})
+
+    async def scenario():
+        backend = half_open_backend("concurrent-probe", slow_ok)
+        pool = BackendPool([backend])
+        calls = [pool.complete({"messages": []}, lambda payload: "{}") for _ in range(5)]
+        return backend, await asyncio.gather(*calls, return_exceptions=True)
+
+    backend, outcomes = asyncio.run(scenario())
+    assert len(requests) == 1
+    assert sum(not isinstance(outcome, BaseException) for outcome in outcomes) == 1
+    assert all(isinstance(outcome, UpstreamOverloaded) for outcome in outcomes if isinstance(outcome, BaseException))
+    assert backend.breaker.state == "closed"
+
+
+def test_probe_cancelled_before_it_starts_is_released():
+    async def hang(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(3600)
+
+    async def scenario():
+        backend = half_open_backend("unstarted-probe", hang)
+        pool = BackendPool([backend])
+        call = asyncio.ensure_future(pool.complete({"messages": []}, lambda payload: "{}"))
+        # Cancelled as soon as complete() has launched the probe, before send() runs
+        await asyncio.sleep(0)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        await asyncio.sleep(0)
+        return backend
+
+    backend = asyncio.run(scenario())
+    assert backend.available()
@@ -0,0 +1,25 @@
+# tests/test_platform.py
+import pytest
+from app.core.prefetch import Prefetch
+from app.core.tool_registry import registry
+from app.functions.slug_index import CourseSlugIndex, course_slugs
+
+
+@pytest.fixture
+def indexed(monkeypatch):
+    monkeypatch.setattr(course_slugs, "index", CourseSlugIndex([("python-basics", "Python Basics")]))
+
+
+def claims(first: str, second: str) -> bool:
+    spec = registry.get("search_courses")
+    # The task is only handed back, never awaited
+    prefetch = Prefetch(spec, spec.parse_arguments({"query": first}), task=object())
+    return prefetch.claim(spec, spec.parse_arguments({"query": second})) is not None
+
+
+def test_unresolved_queries_do_not_share_a_prefetch(indexed):
+    assert not claims("tell me about quantum knitting", "show me underwater basket weaving")
+
+
+def test_same_course_asked_differently_shares_a_prefetch(indexed):
+    assert claims("tell me about the course python basics", "python basics")
@@ -0,0 +1,128 @@
+# tests/test_progress_store.py
+import asyncio
+import pytest
+from app.core.progress_store import MAX_MODULES, FileProgressBackend, ProgressBackend, ProgressStore
+
+
+class RecordingBackend(ProgressBackend):
+    def __init__(self, documents=(), failures: int = 0):
+        self.documents = list(documents)
+        self.failures = failures
+        self.batches = []
+
+    def load(self):
+        return self.documents
+
+    def write_many(self, documents):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("backend down")
+        self.batches.append(documents)
+
+
+def make_store(backend: ProgressBackend, flush_batch: int = 1000) -> ProgressStore:
+    # Flushes are driven by the tests unless they start the background task
+    return ProgressStore(backend, flush_interval=3600, flush_batch=flush_batch)
+
+
+def test_repeated_updates_are_written_once():
+    backend = RecordingBackend()
+    store = make_store(backend)
+    for percentage in (10, 20, 30):
+        store.update("user1", "course1", {"completion_percentage": percentage})
+    store.update("user1", "course2", {"completion_percentage": 5})
+
+    assert asyncio.run(store.flush()) == 2
+    [batch] = backend.batches
+    written = {document["course_id"]: document["completion_percentage"] for document in batch}
+    assert written == {"course1": 30, "course2": 5}
+    assert asyncio.run(store.flush()) == 0
+
+
+def test_failed_flush_keeps_rows_for_the_next_one():
+    backend = RecordingBackend(failures=1)
+    store = make_store(backend)
+    store.update("user1", "course1", {"completion_percentage": 40})
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(store.flush())
+    assert store.stats()["pending"] == 1
+    assert store.stats()["failures"] == 1
+
+    # Updated again before the retry: the retry writes the latest values
+    store.update("user1", "course1", {"completion_percentage": 60})
+    assert asyncio.run(store.flush()) == 1
+    assert backend.batches[0][0]["completion_percentage"] == 60
+    assert store.stats()["pending"] == 0
+
+
+def test_background_task_flushes_once_the_batch_fills_up():
+    async def scenario():
+        backend = RecordingBackend()
+        store = make_store(backend, flush_batch=2)
+        await store.start()
+        store.update("user1", "course1", {"completion_percentage": 10})
+        await asyncio.sleep(0.05)
+        assert backend.batches == []
+        store.update("user2", "course1", {"completion_percentage": 10})
+        for _ in range(100):
+            if backend.batches:
+                break
+            await asyncio.sleep(0.01)
+        await store.stop()
+        return backend
+
+    backend = asyncio.run(scenario())
+    assert len(backend.batches[0]) == 2
+
+
+def test_stop_flushes_what_is_pending():
+    async def scenario():
+        backend = RecordingBackend()
+        store = make_store(backend)
+        await store.start()
+        store.update("user1", "course1", {"modules_completed": 3})
+        await store.stop()
+        return backend
+
+    backend = asyncio.run(scenario())
+    assert backend.batches[0][0]["modules_completed"] == 3
+
+
+def test_out_of_range_module_count_leaves_the_table_untouched():
+    store = make_store(RecordingBackend())
+    store.update("user1", "course1", {"modules_completed": 2, "total_modules": 10})
+
+    with pytest.raises(ValueError):
+        store.update("user1", "course2", {"modules_completed": MAX_MODULES + 1})
+    with pytest.raises(ValueError):
+        store.update("user1", "course1", {"completion_percentage": 90, "total_modules": -1})
+
+    assert len(store.table) == 1
+    assert store.get("user1", "course1")["completion_percentage"] == 0
+    assert store.get("user1", "course1")["total_modules"] == 10
+
+
+def test_file_backend_replays_the_latest_write(tmp_path):
+    path = str(tmp_path / "progress.jsonl")
+    store = make_store(FileProgressBackend(path))
+    store._load()
+    store.update("user1", "course1", {"completion_percentage": 10})
+    asyncio.run(store.flush())
+    store.update("user1", "course1", {"completion_percentage": 70, "next_milestone": "Final project"})
+    asyncio.run(store.flush())
+
+    reloaded = make_store(FileProgressBackend(path))
+    reloaded._load()
+    record = reloaded.get("user1", "course1")
+    assert record["completion_percentage"] == 70
+    assert record["next_milestone"] == "Final project"
+
+
+def test_incomplete_backend_fails_at_construction():
+    class WriteOnly(ProgressBackend):
+        def write_many(self, documents):
+            pass
+
+    with pytest.raises(TypeError):
+        WriteOnly()
@@ -0,0 +1,36 @@
+# tests/test_recommender.py
+from app.functions.recommender import CourseRecommender
+
+
+def course(number: int, title: str):
+    return {"id": number, "title": title, "category": "Programming", "skill_level": "beginner", "rating": 4.0}
+
+
+def test_snapshot_keeps_the_catalog_it_was_taken_from():
+    recommender = CourseRecommender([course(1, "Python basics")])
+    snapshot = recommender.snapshot()
+    recommender.add(course(2, "Python testing"))
+    recommender.remove("1")
+
+    vector = recommender.interest_vector(["python"])
+    assert [item["id"] for _, item in snapshot.recommend(vector)] == [1]
+    assert [item["id"] for _, item in recommender.recommend(vector)] == [2]
+
+
+def test_updates_stop_copying_the_matrix_after_the_copy():
+    recommender = CourseRecommender([course(1, "Python basics")])
+    snapshot = recommender.snapshot()
+    recommender.add(course(2, "Python testing"))
+    copied = recommender._matrix
+    assert copied is not snapshot._matrix
+
+    recommender.add(course(3, "Python packaging"))
+    assert recommender._matrix is copied
+
+
+def test_discarded_snapshot_does_not_force_a_copy():
+    recommender = CourseRecommender([course(1, "Python basics")])
+    recommender.snapshot()
+    matrix = recommender._matrix
+    recommender.add(course(2, "Python testing"))
+    assert recommender._matrix is matrix
@@ -0,0 +1,40 @@
+# tests/test_sessions.py
+import asyncio
+from app.core.sessions import MemorySessionBackend, SessionStore
+
+
+def test_delete_during_a_turn_waits_for_it_and_sticks():
+    async def scenario():
+        store = SessionStore(MemorySessionBackend())
+        session_id = (await store.create())["_id"]
+
+        async def turn():
+            async with store.lock(session_id):
+                session = await store.get(session_id)
+                await asyncio.sleep(0.05)  # The model is answering
+                await store.append(session, [{"role": "user", "content": "hi"}])
+
+        running = asyncio.ensure_future(turn())
+        await asyncio.sleep(0.01)
+        deleted = await store.delete(session_id)
+        await running
+        return deleted, await store.get(session_id)
+
+    deleted, session = asyncio.run(scenario())
+    assert deleted is True
+    assert session is None
+
+
+def test_append_to_a_session_deleted_elsewhere_is_dropped():
+    async def scenario():
+        backend = MemorySessionBackend()
+        store = SessionStore(backend)
+        session = await store.create()
+        # Deleted by another instance, behind this one's cache
+        await backend.delete(session["_id"])
+        appended = await store.append(session, [{"role": "user", "content": "hi"}])
+        return appended, await store.get(session["_id"])
+
+    appended, session = asyncio.run(scenario())
+    assert appended is False
+    assert session is None